@@ -0,0 +1,144 @@
+import json
+import numpy as np
+import pandas as pd
+
+UNKNOWN_ACTIVITY = '__unknown__'
+ACTIVITY_PREFIX = 'activity_'
+NUMERIC_FEATURES = ['activities_completed', 'time_since_start', 'current_activity_duration']
+ENCODINGS = ('onehot', 'sparse', 'ordinal')
+
+
+def activity_names(df):
+    """
+    The activity of each row of a feature table: its 'activity' column or, for tables that were
+    already one-hot encoded, the name of the activity_<name> column holding the row's maximum
+    (the first one on ties, like idxmax).
+    """
+    if 'activity' in df.columns:
+        return df['activity']
+    dummy_columns = [col for col in df.columns if col.startswith(ACTIVITY_PREFIX) and col != 'activity_code']
+    if not dummy_columns:
+        raise KeyError('activity')
+    positions = np.argmax(df[dummy_columns].to_numpy(), axis=1)
+    names = np.asarray([col[len(ACTIVITY_PREFIX):] for col in dummy_columns], dtype=object)
+    return pd.Series(names[positions], index=df.index, name='activity')
+
+
+class ActivityVocabulary:
+    """
+    Stable mapping from activity names to integer codes, shared by training and inference.
+    Code 0 is reserved for activities that were not seen during training.
+    """
+
+    def __init__(self, activities):
+        self.activities = [UNKNOWN_ACTIVITY] + [a for a in activities if a != UNKNOWN_ACTIVITY]
+        self._known = pd.Index(self.activities[1:])
+
+    @classmethod
+    def fit(cls, activities):
+        """
+        Builds a vocabulary from the distinct values of an activity column, sorted by name.
+        """
+        activities = pd.Series(activities)
+        if isinstance(activities.dtype, pd.CategoricalDtype):
+            observed = np.unique(activities.cat.codes.to_numpy())
+            distinct = activities.cat.categories[observed[observed >= 0]]
+        else:
+            distinct = pd.unique(activities.dropna())
+        return cls(sorted({str(a) for a in distinct}))
+
+    def __len__(self):
+        return len(self.activities)
+
+    def encode(self, activities):
+        """
+        Vectorized lookup of activity names; unseen names map to the reserved code 0.
+        Categorical input is looked up once per category rather than once per row.
+        """
+        activities = pd.Series(activities)
+        if isinstance(activities.dtype, pd.CategoricalDtype):
+            category_codes = np.append(self._known.get_indexer(activities.cat.categories.astype(str)) + 1, 0)
+            return category_codes[activities.cat.codes.to_numpy()]
+        return self._known.get_indexer(activities.astype(str)) + 1
+
+    def column_names(self, prefix=ACTIVITY_PREFIX):
+        return [f'{prefix}{activity}' for activity in self.activities]
+
+    def to_dict(self):
+        return {'activities': self.activities[1:]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['activities'])
+
+
+class FeatureSchema:
+    """
+    Describes how a feature table becomes a model input matrix: which numeric columns, in which
+    order, and how the 'activity' column is encoded with the shared ActivityVocabulary:
+    - 'onehot': dense DataFrame with one activity_<name> column per vocabulary entry
+    - 'sparse': scipy CSR matrix (numeric columns followed by the one-hot activity block)
+    - 'ordinal': DataFrame with a single integer 'activity_code' column
+    Training and inference use the same schema, so columns always line up.
+    """
+
+    def __init__(self, vocabulary, encoding='onehot', numeric_columns=None):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown activity encoding '{encoding}'. Expected one of {ENCODINGS}.")
+        self.vocabulary = vocabulary
+        self.encoding = encoding
+        self.numeric_columns = list(numeric_columns or NUMERIC_FEATURES)
+
+    @classmethod
+    def fit(cls, features_df, encoding='onehot', numeric_columns=None):
+        return cls(ActivityVocabulary.fit(features_df['activity']), encoding, numeric_columns)
+
+    @property
+    def feature_names(self):
+        if self.encoding == 'ordinal':
+            return self.numeric_columns + ['activity_code']
+        return self.numeric_columns + self.vocabulary.column_names()
+
+    def transform(self, df):
+        """
+        Builds the model input for a feature table (one row per process state).
+        """
+        codes = self.vocabulary.encode(activity_names(df))
+        numeric = df[self.numeric_columns]
+
+        if self.encoding == 'ordinal':
+            X = numeric.copy()
+            X['activity_code'] = codes
+            return X
+
+        if self.encoding == 'sparse':
+            from scipy.sparse import csr_matrix, hstack
+
+            n = len(df)
+            one_hot = csr_matrix((np.ones(n, dtype=np.float64), (np.arange(n), codes)), shape=(n, len(self.vocabulary)))
+            return hstack([csr_matrix(numeric.to_numpy(dtype=np.float64)), one_hot], format='csr')
+
+        one_hot = np.zeros((len(df), len(self.vocabulary)), dtype=bool)
+        one_hot[np.arange(len(df)), codes] = True
+        activity_block = pd.DataFrame(one_hot, columns=self.vocabulary.column_names(), index=df.index)
+        return pd.concat([numeric, activity_block], axis=1)
+
+    def to_dict(self):
+        return {
+            'encoding': self.encoding,
+            'numeric_columns': self.numeric_columns,
+            'vocabulary': self.vocabulary.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(ActivityVocabulary.from_dict(data['vocabulary']), data['encoding'], data['numeric_columns'])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
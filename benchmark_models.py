@@ -0,0 +1,55 @@
+import pickle
+import time
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, r2_score
+from activity_encoding import FeatureSchema
+from model_backends import MODEL_BACKENDS, make_model, backend_accepts_sparse
+from predictive_analytics_process import feature_engineer_process_data
+from synthetic_event_log import generate_event_log
+
+DEFAULT_SIZES = (1_000, 5_000, 20_000)
+
+
+def benchmark_backends(sizes=DEFAULT_SIZES, backends=None, encoding='onehot', seed=0):
+    """
+    Trains every backend on synthetic logs of `sizes` cases and measures, per (size, backend):
+    fit time, prediction throughput on the hold-out rows, pickled model size and hold-out MAE/R2.
+    Returns one row per combination.
+    """
+    backends = list(backends or MODEL_BACKENDS)
+    results = []
+    for n_cases in sizes:
+        features_df = feature_engineer_process_data(generate_event_log(n_cases, seed=seed), encode_activities=False)
+        X = FeatureSchema.fit(features_df, encoding).transform(features_df)
+        y = features_df['remaining_cycle_time']
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+        for backend in backends:
+            if encoding == 'sparse' and not backend_accepts_sparse(backend):
+                continue
+            model = make_model(backend)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            y_pred = model.predict(X_test)
+            predict_seconds = time.perf_counter() - start
+
+            results.append({
+                'n_cases': n_cases,
+                'n_events': len(features_df),
+                'backend': backend,
+                'fit_seconds': fit_seconds,
+                'predict_rows_per_second': len(y_test) / predict_seconds if predict_seconds > 0 else float('inf'),
+                'model_size_mb': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 2**20,
+                'mae_seconds': mean_absolute_error(y_test, y_pred),
+                'r2': r2_score(y_test, y_pred),
+            })
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    pd.set_option('display.width', 200)
+    print(benchmark_backends().to_string(index=False, float_format=lambda x: f'{x:,.3f}'))
@@ -0,0 +1,344 @@
+"""
+Throughput and memory baselines for loading an event log (from CSV and from a warm event log
+cache) and for every public function of process_mining_engine and predictive_analytics_process,
+on seeded synthetic logs of growing size:
+
+    python benchmark_suite.py --sizes 1000 100000 --output baseline.json
+    python benchmark_suite.py --sizes 1000 100000 --baseline baseline.json --output current.json
+
+Sizes are numbers of events (FULL_SIZES goes from 1k to 100M). Each function is timed on
+inputs prepared outside the measurement and reported in events/sec. A separate run under
+tracemalloc gives its peak Python/numpy allocation. With --baseline, functions whose throughput
+fell or whose peak memory grew by more than --tolerance are listed, and the exit status is 1.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+from functools import cached_property
+import numpy as np
+import pandas as pd
+import predictive_analytics_process as predictive
+import process_mining_engine as mining
+from case_index import CaseIndex
+from instrumentation import StageRecorder
+from event_log_cache import load_cached_event_log
+from event_log_loader import read_event_log
+from synthetic_event_log import EventLogModel, DEFAULT_CASES_PER_CHUNK, write_event_log
+from transition_graph import build_transition_graph
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+FULL_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+# Functions that fit a model are skipped above this size.
+MAX_TRAINING_EVENTS = 200_000
+# predict_and_alert renders one message per row.
+MAX_ALERT_EVENTS = 1_000_000
+# Peak-memory changes smaller than this are noise, whatever the relative change.
+MIN_MEMORY_CHANGE_MB = 1.0
+
+RESULT_FIELDS = ['function', 'size', 'n_events', 'n_cases', 'status', 'wall_seconds', 'cpu_seconds',
+                 'events_per_second', 'peak_rss_mb', 'tracemalloc_peak_mb']
+
+
+class BenchmarkContext:
+    """
+    Inputs for one log size, built on first use and shared by every benchmark of that size:
+    the log file (case_ids 1..n_cases, written chunk by chunk as it is generated, so the raw
+    log is never held in memory), a CSV copy of it with a warm event log cache entry, the log
+    read back from the file, its CaseIndex, features, two case partitions with their
+    aggregates, and a model trained on the earlier 80% of cases (at most MAX_TRAINING_EVENTS events).
+    """
+
+    def __init__(self, size, work_dir, seed=0, file_format='parquet', cases_per_chunk=DEFAULT_CASES_PER_CHUNK,
+                 **log_options):
+        self.size = size
+        self.work_dir = work_dir
+        self.seed = seed
+        self.file_format = file_format
+        self.cases_per_chunk = cases_per_chunk
+        self.log_model = EventLogModel(seed=seed, **log_options)
+        self.n_cases = self.log_model.cases_for_events(size)
+
+    @cached_property
+    def _log_file(self):
+        path = os.path.join(self.work_dir, f'events-{self.size}.{self.file_format}')
+        n_events = write_event_log(path, self.n_cases, self.file_format, self.cases_per_chunk, seed=self.seed,
+                                   model=self.log_model)
+        return path, n_events
+
+    @property
+    def log_path(self):
+        return self._log_file[0]
+
+    @property
+    def n_events(self):
+        return self._log_file[1]
+
+    @cached_property
+    def csv_log_path(self):
+        """
+        The log as CSV, for the loader benchmark (the same file as log_path if that is CSV).
+        """
+        if self.file_format == 'csv':
+            return self.log_path
+        path = os.path.join(self.work_dir, f'events-{self.size}.csv')
+        write_event_log(path, self.n_cases, 'csv', self.cases_per_chunk, seed=self.seed, model=self.log_model)
+        return path
+
+    @cached_property
+    def warm_cache_dir(self):
+        """
+        An event log cache directory already holding the entry for csv_log_path.
+        """
+        cache_dir = os.path.join(self.work_dir, f'cache-{self.size}')
+        load_cached_event_log(self.csv_log_path, cache_dir)
+        return cache_dir
+
+    @cached_property
+    def event_log(self):
+        return read_event_log(self.log_path)
+
+    @cached_property
+    def case_index(self):
+        return CaseIndex.from_event_log(self.event_log)
+
+    @cached_property
+    def features(self):
+        return predictive.feature_engineer_process_data(self.case_index, encode_activities=False)
+
+    @cached_property
+    def partitions(self):
+        """
+        The log split into two halves of its cases, with each half's event positions in the full log.
+        """
+        split = int(np.searchsorted(self.event_log['case_id'].to_numpy(), self.n_cases // 2, side='right'))
+        return [(self.event_log.iloc[:split], np.arange(split)),
+                (self.event_log.iloc[split:], np.arange(split, self.n_events))]
+
+    @cached_property
+    def kpi_parts(self):
+        return [mining.kpi_aggregates(part) for part, _ in self.partitions]
+
+    @cached_property
+    def duration_parts(self):
+        return [mining.activity_duration_aggregates(part, positions) for part, positions in self.partitions]
+
+    @cached_property
+    def transition_graph(self):
+        return build_transition_graph(self.case_index)
+
+    @cached_property
+    def training_features(self):
+        features = self.features[self.features['case_id'] <= int(self.n_cases * 0.8)]
+        if len(features) > MAX_TRAINING_EVENTS:
+            last_case = features['case_id'].iloc[MAX_TRAINING_EVENTS]
+            features = features[features['case_id'] < last_case]
+        return features
+
+    @cached_property
+    def model(self):
+        with _quiet():
+            model, _, _ = predictive.train_predictive_model(self.training_features)
+        return model
+
+    def fresh_model_dir(self):
+        """
+        A new model directory holding one artifact of `model`, trained through the earlier cases.
+        """
+        model_dir = tempfile.mkdtemp(prefix='models-', dir=self.work_dir)
+        with _quiet():
+            predictive.save_trained_model(self.model, self.training_features, model_dir)
+        return model_dir
+
+
+class Benchmark:
+    """
+    How to call one public function: `run(context, prepared)`. The BenchmarkContext attributes
+    named in `inputs` are built before timing starts, and `setup(context)` is called untimed
+    before every run to give `prepared` (None without setup). Sizes above `max_events` are skipped.
+    """
+
+    def __init__(self, run, inputs=('event_log',), setup=None, max_events=None):
+        self.run = run
+        self.inputs = inputs
+        self.setup = setup
+        self.max_events = max_events
+
+
+BENCHMARKS = {
+    'event_log_loader.read_event_log': Benchmark(
+        lambda ctx, _: read_event_log(ctx.csv_log_path), inputs=('csv_log_path',)),
+    'event_log_cache.load_cached_event_log': Benchmark(
+        lambda ctx, _: load_cached_event_log(ctx.csv_log_path, ctx.warm_cache_dir),
+        inputs=('csv_log_path', 'warm_cache_dir')),
+    'process_mining_engine.discover_process_flow': Benchmark(
+        lambda ctx, _: mining.discover_process_flow(ctx.event_log)),
+    'process_mining_engine.kpi_aggregates': Benchmark(
+        lambda ctx, _: mining.kpi_aggregates(ctx.event_log)),
+    'process_mining_engine.merge_kpi_aggregates': Benchmark(
+        lambda ctx, _: mining.merge_kpi_aggregates(ctx.kpi_parts), inputs=('kpi_parts',)),
+    'process_mining_engine.kpis_from_aggregates': Benchmark(
+        lambda ctx, _: mining.kpis_from_aggregates(mining.merge_kpi_aggregates(ctx.kpi_parts)), inputs=('kpi_parts',)),
+    'process_mining_engine.calculate_kpis': Benchmark(
+        lambda ctx, _: mining.calculate_kpis(ctx.event_log)),
+    'process_mining_engine.activity_duration_aggregates': Benchmark(
+        lambda ctx, _: mining.activity_duration_aggregates(ctx.event_log)),
+    'process_mining_engine.merge_activity_duration_aggregates': Benchmark(
+        lambda ctx, _: mining.merge_activity_duration_aggregates(ctx.duration_parts), inputs=('duration_parts',)),
+    'process_mining_engine.bottlenecks_from_aggregates': Benchmark(
+        lambda ctx, _: mining.bottlenecks_from_aggregates(mining.merge_activity_duration_aggregates(ctx.duration_parts)),
+        inputs=('duration_parts',)),
+    'process_mining_engine.identify_bottlenecks': Benchmark(
+        lambda ctx, _: mining.identify_bottlenecks(ctx.event_log)),
+    'process_mining_engine.rank_transitions': Benchmark(
+        lambda ctx, _: mining.rank_transitions(ctx.transition_graph), inputs=('transition_graph',)),
+    'process_mining_engine.identify_bottleneck_transitions': Benchmark(
+        lambda ctx, _: mining.identify_bottleneck_transitions(ctx.event_log)),
+    'process_mining_engine.summarize_process': Benchmark(
+        lambda ctx, _: mining.summarize_process(ctx.event_log)),
+    'process_mining_engine.run_process_mining': Benchmark(
+        lambda ctx, _: mining.run_process_mining(ctx.log_path), inputs=('log_path',)),
+    'predictive_analytics_process.feature_engineer_process_data': Benchmark(
+        lambda ctx, _: predictive.feature_engineer_process_data(ctx.event_log)),
+    'predictive_analytics_process.train_predictive_model': Benchmark(
+        lambda ctx, _: predictive.train_predictive_model(ctx.features), inputs=('features',),
+        max_events=MAX_TRAINING_EVENTS),
+    'predictive_analytics_process.predict_and_alert': Benchmark(
+        lambda ctx, _: predictive.predict_and_alert(ctx.model, ctx.features), inputs=('model', 'features'),
+        max_events=MAX_ALERT_EVENTS),
+    'predictive_analytics_process.save_trained_model': Benchmark(
+        lambda ctx, model_dir: predictive.save_trained_model(ctx.model, ctx.features, model_dir),
+        inputs=('model', 'features'), setup=lambda ctx: tempfile.mkdtemp(prefix='models-', dir=ctx.work_dir)),
+    'predictive_analytics_process.retrain_predictive_model': Benchmark(
+        lambda ctx, model_dir: predictive.retrain_predictive_model(ctx.case_index, model_dir, idle_seconds=0),
+        inputs=('case_index', 'model'), setup=lambda ctx: ctx.fresh_model_dir(), max_events=MAX_TRAINING_EVENTS),
+    'predictive_analytics_process.run_predictive_analytics': Benchmark(
+        lambda ctx, _: predictive.run_predictive_analytics(ctx.log_path), inputs=('log_path',),
+        max_events=MAX_TRAINING_EVENTS),
+}
+
+
+@contextlib.contextmanager
+def _quiet():
+    """
+    Discards what the measured functions print (reports, metrics), so it does not add to their cost.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _measure(benchmark, context, trace_memory):
+    for name in benchmark.inputs:
+        getattr(context, name)
+    prepared = benchmark.setup(context) if benchmark.setup is not None else None
+    recorder = StageRecorder(trace_memory=trace_memory)
+    with _quiet(), recorder.stage('run', rows=context.n_events):
+        benchmark.run(context, prepared)
+    return recorder.records[0]
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, functions=None, repeat=3, trace_memory=True, seed=0, file_format='parquet',
+                   work_dir=None, **log_options):
+    """
+    Runs the BENCHMARKS (or those whose name contains one of `functions`) on a synthetic log of
+    every size in `sizes` (events; generated with `seed` and `log_options`, see EventLogModel).
+    Each function is run `repeat` times for the fastest wall time, then once more under
+    tracemalloc for its peak allocation if `trace_memory`. Logs read by the run_* pipelines are
+    written as `file_format` into `work_dir` (a temporary directory by default).
+    Returns one row per (function, size) with RESULT_FIELDS.
+    """
+    names = [name for name in BENCHMARKS if not functions or any(part in name for part in functions)]
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+        for size in sizes:
+            context = BenchmarkContext(size, directory, seed=seed, file_format=file_format, **log_options)
+            for name in names:
+                benchmark = BENCHMARKS[name]
+                row = dict.fromkeys(RESULT_FIELDS)
+                row.update(function=name, size=size, n_cases=context.n_cases)
+                if benchmark.max_events is not None and size > benchmark.max_events:
+                    row['status'] = 'skipped'
+                    results.append(row)
+                    continue
+                row['n_events'] = context.n_events
+                runs = [_measure(benchmark, context, trace_memory=False) for _ in range(repeat)]
+                best = min(runs, key=lambda record: record['wall_seconds'])
+                row.update(status=best['status'], wall_seconds=best['wall_seconds'], cpu_seconds=best['cpu_seconds'],
+                           events_per_second=best['rows_per_second'], peak_rss_mb=max(r['peak_rss_mb'] or 0 for r in runs))
+                if trace_memory:
+                    row['tracemalloc_peak_mb'] = _measure(benchmark, context, trace_memory=True)['tracemalloc_peak_mb']
+                results.append(row)
+                print(f"{name:<62} {size:>12,} events  {row['status']:<4} "
+                      f"{row['events_per_second'] or 0:>14,.0f} events/s", file=sys.stderr)
+    return pd.DataFrame(results, columns=RESULT_FIELDS)
+
+
+def save_results(results, path):
+    """
+    Writes benchmark results as CSV if `path` ends in .csv, JSON otherwise.
+    """
+    if path.lower().endswith('.csv'):
+        results.to_csv(path, index=False)
+    else:
+        results.to_json(path, orient='records', indent=2)
+
+
+def load_results(path):
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_json(path, orient='records')
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Rows of `results` that regressed against `baseline` (both from run_benchmarks), matched on
+    function and size: throughput below (1 - tolerance) times the baseline, or tracemalloc peak
+    above (1 + tolerance) times the baseline and by more than MIN_MEMORY_CHANGE_MB. Returns the
+    current and baseline values side by side with the throughput and memory ratios.
+    """
+    ok = lambda frame: frame[frame['status'] == 'ok'][['function', 'size', 'events_per_second', 'tracemalloc_peak_mb']]
+    merged = ok(results).merge(ok(baseline), on=['function', 'size'], suffixes=('', '_baseline'))
+    merged['throughput_ratio'] = merged['events_per_second'] / merged['events_per_second_baseline']
+    merged['memory_ratio'] = merged['tracemalloc_peak_mb'] / merged['tracemalloc_peak_mb_baseline']
+    slower = merged['throughput_ratio'] < 1 - tolerance
+    larger = (merged['memory_ratio'] > 1 + tolerance) \
+        & (merged['tracemalloc_peak_mb'] - merged['tracemalloc_peak_mb_baseline'] > MIN_MEMORY_CHANGE_MB)
+    return merged[slower | larger].reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput and peak-memory baselines of the process modules.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Log sizes in events.")
+    parser.add_argument('--functions', nargs='+', help="Only run benchmarks whose name contains one of these.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per function and size.")
+    parser.add_argument('--no-trace-memory', action='store_true', help="Skip the tracemalloc peak-memory run.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', default='parquet', choices=('csv', 'parquet'), help="Log file format for run_*.")
+    parser.add_argument('--work-dir', help="Directory for the temporary log files and model artifacts.")
+    parser.add_argument('--output', help="Write the results to this .json or .csv file.")
+    parser.add_argument('--baseline', help="Compare against results saved by an earlier run.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown / memory growth.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, functions=args.functions, repeat=args.repeat,
+                             trace_memory=not args.no_trace_memory, seed=args.seed, file_format=args.format,
+                             work_dir=args.work_dir)
+    pd.set_option('display.width', 200)
+    print(results.drop(columns=['n_cases', 'cpu_seconds']).to_string(index=False, float_format=lambda x: f'{x:,.3f}'))
+    if args.output:
+        save_results(results, args.output)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        regressions = compare_to_baseline(results, load_results(args.baseline), args.tolerance)
+        if regressions.empty:
+            print(f"No regressions against {args.baseline}.")
+        else:
+            print(f"\nRegressions against {args.baseline}:")
+            print(regressions.to_string(index=False, float_format=lambda x: f'{x:,.3f}'))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
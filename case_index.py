@@ -0,0 +1,148 @@
+import numpy as np
+from event_log_cache import CachedEventLog
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+
+_NAT_INT = np.iinfo(np.int64).min
+
+
+def exact_sum(values):
+    """
+    Sums an int64 array without overflow and returns a Python int.
+    Nanosecond durations overflow int64 after ~292 years in total, which a large log
+    reaches easily, and float sums would depend on summation order.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    high, low = np.divmod(values, 1 << 32)
+    return (int(high.sum()) << 32) + int(low.sum())
+
+
+def exact_grouped_sum(values, groups, n_groups):
+    """
+    Per-group exact sums of an int64 array (see exact_sum). Returns a list of Python ints.
+    """
+    high, low = np.divmod(np.asarray(values, dtype=np.int64), 1 << 32)
+    high_sums = np.zeros(n_groups, dtype=np.int64)
+    low_sums = np.zeros(n_groups, dtype=np.int64)
+    np.add.at(high_sums, groups, high)
+    np.add.at(low_sums, groups, low)
+    return [(int(h) << 32) + int(l) for h, l in zip(high_sums, low_sums)]
+
+
+class CaseIndex:
+    """
+    Single-pass index over an event log sorted by case_id and timestamp.
+    Holds, per case, the [start, end) offsets of its events in the sorted arrays,
+    and per event the activity code, timestamp (int64 ns) and the delta (ns) since
+    the previous event of the same case (0 for the first event of a case).
+    Built once and shared by discovery, KPIs, bottlenecks and feature engineering,
+    so none of them needs its own groupby over the log.
+    """
+
+    def __init__(self, log):
+        timestamps = np.asarray(log.timestamps)
+        if (timestamps == _NAT_INT).any():
+            raise ValueError("Event log contains missing timestamps; drop or fill them before indexing.")
+
+        self.case_ids = log.case_ids
+        self.case_offsets = np.asarray(log.case_offsets)
+        self.activity_codes = log.activity_codes
+        self.activities = list(log.activities)
+        self.timestamps = timestamps
+
+        self.case_starts = self.case_offsets[:-1]
+        self.case_ends = self.case_offsets[1:]
+        # The log is sorted within each case, so the first/last event carry the min/max timestamp.
+        self.case_start_times = timestamps[self.case_starts]
+        self.case_end_times = timestamps[self.case_ends - 1]
+
+        self.deltas = np.zeros(len(timestamps), dtype=np.int64)
+        if len(timestamps) > 1:
+            self.deltas[1:] = np.diff(timestamps)
+        self.deltas[self.case_starts] = 0
+
+    @classmethod
+    def from_event_log(cls, event_log):
+        """
+        Builds the index from an event log DataFrame with 'case_id', 'activity', 'timestamp' columns.
+        """
+        return cls(CachedEventLog.from_event_log(event_log))
+
+    @classmethod
+    def from_cached(cls, cached_log):
+        """
+        Builds the index directly on the (memory-mapped) arrays of a CachedEventLog.
+        """
+        return cls(cached_log)
+
+    @property
+    def n_events(self):
+        return len(self.timestamps)
+
+    @property
+    def n_cases(self):
+        return len(self.case_ids)
+
+    @property
+    def empty(self):
+        return self.n_events == 0
+
+    def case_lengths(self):
+        return self.case_ends - self.case_starts
+
+    def cycle_times(self):
+        """
+        Cycle time (last event - first event) of every case, in int64 nanoseconds.
+        """
+        return self.case_end_times - self.case_start_times
+
+    def event_case_positions(self):
+        """
+        For every event, the position (0..n_cases-1) of the case it belongs to.
+        """
+        return np.repeat(np.arange(self.n_cases), self.case_lengths())
+
+    def has_successor(self):
+        """
+        Boolean mask of events that are followed by another event of the same case.
+        """
+        mask = np.ones(self.n_events, dtype=bool)
+        mask[self.case_ends - 1] = False
+        return mask
+
+    def activity_names(self, codes):
+        return tuple(self.activities[code] for code in codes)
+
+
+def as_case_index(event_log):
+    """
+    Returns `event_log` as a CaseIndex, accepting an existing CaseIndex,
+    a CachedEventLog or an event log DataFrame.
+    """
+    if isinstance(event_log, CaseIndex):
+        return event_log
+    if isinstance(event_log, CachedEventLog):
+        return CaseIndex.from_cached(event_log)
+    return CaseIndex.from_event_log(event_log)
+
+
+def extract_cases(log, case_positions):
+    """
+    The cases at `case_positions` (ascending) of a CachedEventLog or CaseIndex as a standalone
+    CachedEventLog, with the positions of their events in the full log. Only the selected
+    events are touched, so on a memory-mapped log only their pages are read.
+    """
+    case_offsets = np.asarray(log.case_offsets)
+    starts = case_offsets[case_positions]
+    lengths = case_offsets[case_positions + 1] - starts
+    shard_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    event_positions = np.arange(shard_offsets[-1]) + np.repeat(starts - shard_offsets[:-1], lengths)
+    shard = CachedEventLog(
+        activity_codes=np.asarray(log.activity_codes)[event_positions],
+        timestamps=np.asarray(log.timestamps)[event_positions],
+        case_offsets=shard_offsets,
+        case_ids=np.asarray(log.case_ids)[case_positions],
+        activities=log.activities,
+    )
+    return shard, event_positions
@@ -0,0 +1,152 @@
+"""
+Command-line entry point for the analytics pipelines:
+
+    python cli.py process-mining LOG [--cache-dir DIR] [--top-k K] [--workers N] [--approximate]
+    python cli.py predictive LOG [--cache-dir DIR] [--encoding E] [--backend B] [--model-dir DIR]
+    python cli.py market [--taxonomy FILE]
+    python cli.py startup-benchmark [--repeat N]
+
+The pipeline subcommands also accept --metrics FILE (.json or .csv), --profile-dir DIR and
+--trace-memory to record per-stage time and memory (see instrumentation.py).
+
+Up front only argparse and model_backends (a registry of names whose regressors import
+sklearn lazily) are imported, the latter for the --backend choices; each subcommand imports
+its pipeline when it runs, and the pipelines themselves defer sklearn and textblob until a
+model is fitted or text is scored.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from model_backends import DEFAULT_BACKEND, MODEL_BACKENDS
+
+# Modules whose import cost is large enough to track; startup-benchmark reports which ones
+# each subcommand pulls in before it starts working.
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy', 'sklearn', 'joblib', 'textblob', 'nltk', 'pyarrow')
+
+# Subcommand -> module holding its pipeline.
+COMMAND_MODULES = {
+    'process-mining': 'process_mining_engine',
+    'predictive': 'predictive_analytics_process',
+    'market': 'predictive_analytics_market',
+}
+
+
+def _recorder(args):
+    """
+    A StageRecorder if any instrumentation option was given, else None (no instrumentation).
+    """
+    if not (args.metrics or args.profile_dir or args.trace_memory):
+        return None
+    from instrumentation import StageRecorder
+
+    return StageRecorder(profile_dir=args.profile_dir, trace_memory=args.trace_memory)
+
+
+def _run_process_mining(args):
+    from process_mining_engine import run_process_mining
+
+    run_process_mining(args.file_path, cache_dir=args.cache_dir, top_k=args.top_k, workers=args.workers,
+                       approximate=args.approximate, recorder=args.recorder)
+
+
+def _run_predictive(args):
+    from predictive_analytics_process import run_predictive_analytics
+
+    run_predictive_analytics(args.file_path, cache_dir=args.cache_dir, encoding=args.encoding,
+                             model_dir=args.model_dir, backend=args.backend, recorder=args.recorder)
+
+
+def _run_market(args):
+    from predictive_analytics_market import run_market_consumer_analytics
+
+    run_market_consumer_analytics(taxonomy=args.taxonomy, recorder=args.recorder)
+
+
+def _import_cost(module, repeat):
+    """
+    Median wall time of `import module` in fresh interpreters, and the heavy modules it loaded.
+    """
+    code = ('import sys, time; t = time.perf_counter(); import {module}; '
+            'print(time.perf_counter() - t); print(",".join(m for m in {heavy!r} if m in sys.modules))'
+            ).format(module=module, heavy=HEAVY_MODULES)
+    timings, loaded = [], ''
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.splitlines()
+        timings.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ''
+    timings.sort()
+    return timings[len(timings) // 2], loaded
+
+
+def startup_benchmark(repeat=5):
+    """
+    Import cost of the CLI itself and of each subcommand's pipeline module, measured in fresh
+    interpreters (so nothing is already cached in sys.modules). Returns {name: (seconds, modules)}.
+    """
+    results = {'cli': _import_cost('cli', repeat)}
+    for command, module in COMMAND_MODULES.items():
+        results[command] = _import_cost(module, repeat)
+    return results
+
+
+def _run_startup_benchmark(args):
+    results = startup_benchmark(args.repeat)
+    print(f"{'command':<16} {'import (ms)':>12}  heavy modules loaded")
+    for name, (seconds, loaded) in results.items():
+        print(f"{name:<16} {seconds * 1000:>12.1f}  {loaded or '-'}")
+
+
+def _add_instrumentation_arguments(parser):
+    parser.add_argument('--metrics', help="Write per-stage time/memory metrics to this .json or .csv file.")
+    parser.add_argument('--profile-dir', help="Dump a cProfile file per stage into this directory.")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks per stage (slower).")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Process mining, predictive process analytics and market analytics.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    mining = subparsers.add_parser('process-mining', help="Discover flows, KPIs, bottlenecks and slow transitions.")
+    mining.add_argument('file_path', help="Event log (CSV, Parquet or Arrow) with case_id, activity, timestamp.")
+    mining.add_argument('--cache-dir', help="Reuse the parsed log from this memory-mapped cache directory.")
+    mining.add_argument('--top-k', type=int, default=10, help="Number of process flows to list.")
+    mining.add_argument('--workers', type=int, help="Hash-partition cases across this many processes.")
+    mining.add_argument('--approximate', action='store_true', help="Estimate KPIs, bottlenecks and wait quantiles with sketches, block by block "
+                        "(bounded memory together with --cache-dir).")
+    _add_instrumentation_arguments(mining)
+    mining.set_defaults(handler=_run_process_mining)
+
+    predictive = subparsers.add_parser('predictive', help="Train a remaining-time model and score sample cases.")
+    predictive.add_argument('file_path', help="Event log (CSV, Parquet or Arrow) with case_id, activity, timestamp.")
+    predictive.add_argument('--cache-dir', help="Reuse the parsed log from this memory-mapped cache directory.")
+    predictive.add_argument('--encoding', default='onehot', choices=('onehot', 'sparse', 'ordinal'))
+    predictive.add_argument('--backend', default=DEFAULT_BACKEND, choices=tuple(MODEL_BACKENDS))
+    predictive.add_argument('--model-dir', help="Save the trained model as a new artifact version here.")
+    _add_instrumentation_arguments(predictive)
+    predictive.set_defaults(handler=_run_predictive)
+
+    market = subparsers.add_parser('market', help="Market swings and consumer pain points on simulated data.")
+    market.add_argument('--taxonomy', help="Pain-point taxonomy file (JSON or category,keyword CSV).")
+    _add_instrumentation_arguments(market)
+    market.set_defaults(handler=_run_market)
+
+    benchmark = subparsers.add_parser('startup-benchmark', help="Measure import cost per subcommand.")
+    benchmark.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per measurement.")
+    benchmark.set_defaults(handler=_run_startup_benchmark)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.recorder = _recorder(args) if hasattr(args, 'metrics') else None
+    args.handler(args)
+    if args.recorder is not None and args.metrics:
+        args.recorder.save(args.metrics)
+        print(f"Stage metrics written to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from event_log_loader import read_event_log, DEFAULT_CHUNK_SIZE, DEFAULT_TIMESTAMP_FORMAT
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = '.event_log_cache'
+
+_ARRAY_FILES = ('activity_codes', 'timestamps', 'case_offsets', 'case_ids')
+
+
+class CachedEventLog:
+    """
+    A parsed event log, sorted by case_id and timestamp, stored as columnar arrays:
+    - activity_codes: int32 index into `activities`, one per event
+    - timestamps: int64 nanoseconds since the epoch, one per event (NaT is int64 min)
+    - case_offsets: int64, n_cases + 1 boundaries; events of case i are [case_offsets[i], case_offsets[i+1])
+    - case_ids: the case_id of each case, in sorted order
+    When opened from the cache the arrays are read-only memory maps, so nothing is copied
+    until an analysis touches the pages it needs, and `entry_dir` is the cache entry they map
+    (other processes can open it with from_entry_dir instead of receiving the arrays).
+    """
+
+    def __init__(self, activity_codes, timestamps, case_offsets, case_ids, activities, source=None, entry_dir=None):
+        self.activity_codes = activity_codes
+        self.timestamps = timestamps
+        self.case_offsets = case_offsets
+        self.case_ids = case_ids
+        self.activities = list(activities)
+        self.source = source
+        self.entry_dir = entry_dir
+
+    @classmethod
+    def from_entry_dir(cls, entry_dir):
+        """
+        Memory-maps a cache entry directory written by build_event_log_cache.
+        """
+        with open(os.path.join(entry_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(entry_dir, f'{name}.npy'), mmap_mode='r') for name in _ARRAY_FILES}
+        return cls(activities=meta['activities'], source=meta['source']['path'], entry_dir=entry_dir, **arrays)
+
+    @property
+    def n_events(self):
+        return len(self.activity_codes)
+
+    @property
+    def n_cases(self):
+        return len(self.case_ids)
+
+    @classmethod
+    def from_event_log(cls, event_log, source=None):
+        """
+        Builds the columnar form of an event log DataFrame.
+        Logs from load_event_log are already sorted by ('case_id', 'timestamp');
+        any other input is stably sorted that way first. Raises ValueError on missing case_ids.
+        """
+        case_ids = event_log['case_id'].astype('category')
+        if not case_ids.cat.categories.is_monotonic_increasing:
+            case_ids = case_ids.cat.reorder_categories(case_ids.cat.categories.sort_values())
+        activities = event_log['activity'].astype('category')
+
+        case_codes = case_ids.cat.codes.to_numpy()
+        if (case_codes == -1).any():
+            raise ValueError("Event log contains missing case_ids; drop them before caching (read_event_log does).")
+        activity_codes = activities.cat.codes.to_numpy().astype(np.int32)
+        timestamps = event_log['timestamp'].to_numpy().astype('datetime64[ns]').view(np.int64)
+
+        if len(case_codes) > 1:
+            case_steps = np.diff(case_codes)
+            if (case_steps < 0).any() or (np.diff(timestamps)[case_steps == 0] < 0).any():
+                order = np.lexsort((timestamps, case_codes))
+                case_codes, activity_codes, timestamps = case_codes[order], activity_codes[order], timestamps[order]
+
+        starts = np.flatnonzero(np.diff(case_codes)) + 1
+        case_offsets = np.concatenate(([0], starts, [len(case_codes)])).astype(np.int64) if len(case_codes) \
+            else np.zeros(1, dtype=np.int64)
+        case_values = np.asarray(case_ids.cat.categories)[case_codes[case_offsets[:-1]]]
+        if case_values.dtype == object:
+            case_values = case_values.astype(str)
+
+        return cls(
+            activity_codes=activity_codes,
+            timestamps=timestamps,
+            case_offsets=case_offsets,
+            case_ids=case_values,
+            activities=[str(a) for a in activities.cat.categories],
+            source=source,
+        )
+
+    def to_frame(self):
+        """
+        Returns the log as a DataFrame with the same columns and dtypes as load_event_log.
+        Activity codes and timestamps are wrapped rather than re-parsed; only the per-event
+        case_id column has to be expanded from the case boundaries.
+        """
+        case_lengths = np.diff(self.case_offsets)
+        case_codes = np.repeat(np.arange(self.n_cases), case_lengths)
+        return pd.DataFrame({
+            'case_id': pd.Categorical.from_codes(case_codes, categories=pd.Index(self.case_ids)),
+            'activity': pd.Categorical.from_codes(self.activity_codes, categories=self.activities),
+            'timestamp': np.asarray(self.timestamps).view('datetime64[ns]'),
+        }, copy=False)
+
+
+def _source_signature(file_path, timestamp_format):
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'timestamp_format': timestamp_format,
+        'version': CACHE_FORMAT_VERSION,
+    }
+
+
+def _cache_entry_dir(cache_dir, signature):
+    key = hashlib.sha1(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key)
+
+
+def open_event_log_cache(file_path, cache_dir=DEFAULT_CACHE_DIR, timestamp_format=DEFAULT_TIMESTAMP_FORMAT):
+    """
+    Opens the cached arrays for `file_path` as read-only memory maps.
+    Returns None if there is no cache entry for the file's current path, size and mtime.
+    """
+    signature = _source_signature(file_path, timestamp_format)
+    entry_dir = _cache_entry_dir(cache_dir, signature)
+    meta_path = os.path.join(entry_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('source') != signature:
+        return None
+    return CachedEventLog.from_entry_dir(entry_dir)
+
+
+def _prune_stale_entries(cache_dir, source_path, keep_dir):
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        if name.startswith('.tmp-') or entry_dir == keep_dir:
+            continue
+        try:
+            with open(os.path.join(entry_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                entry_source = json.load(f)['source']['path']
+        except (OSError, ValueError, KeyError):
+            continue
+        if entry_source == source_path:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+def build_event_log_cache(file_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=DEFAULT_CHUNK_SIZE,
+                          timestamp_format=DEFAULT_TIMESTAMP_FORMAT, file_format=None):
+    """
+    Parses and sorts `file_path` once and writes the result to the cache.
+    The entry is written to a temporary directory and renamed into place, so concurrent
+    readers never see a partial entry. Entries for older versions of the same file are removed.
+    Returns the freshly opened (memory-mapped) cache.
+    """
+    signature = _source_signature(file_path, timestamp_format)
+    event_log = read_event_log(file_path, chunksize=chunksize, timestamp_format=timestamp_format,
+                               file_format=file_format)
+    cached = CachedEventLog.from_event_log(event_log, source=signature['path'])
+    del event_log
+
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_dir = _cache_entry_dir(cache_dir, signature)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=cache_dir)
+    try:
+        for name in _ARRAY_FILES:
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), getattr(cached, name), allow_pickle=False)
+        meta = {
+            'source': signature,
+            'activities': cached.activities,
+            'n_events': cached.n_events,
+            'n_cases': cached.n_cases,
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    _prune_stale_entries(cache_dir, signature['path'], entry_dir)
+
+    return open_event_log_cache(file_path, cache_dir, timestamp_format)
+
+
+def load_cached_event_log(file_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=DEFAULT_CHUNK_SIZE,
+                          timestamp_format=DEFAULT_TIMESTAMP_FORMAT, file_format=None):
+    """
+    Returns the CachedEventLog for `file_path`, building the cache entry on first use
+    or when the file's size or mtime has changed since it was cached.
+    Reports errors like load_event_log and returns None.
+    """
+    try:
+        cached = open_event_log_cache(file_path, cache_dir, timestamp_format)
+        if cached is None:
+            cached = build_event_log_cache(file_path, cache_dir, chunksize=chunksize,
+                                           timestamp_format=timestamp_format, file_format=file_format)
+        return cached
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+        return None
+    except KeyError as e:
+        print(f"Error: Missing expected column in CSV: {e}. Required: 'case_id', 'activity', 'timestamp'")
+        return None
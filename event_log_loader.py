@@ -0,0 +1,235 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+REQUIRED_COLUMNS = ['case_id', 'activity', 'timestamp']
+DEFAULT_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+_NAT_INT = np.iinfo(np.int64).min
+
+
+def detect_file_format(file_path):
+    """
+    Guesses the on-disk format of an event log from its file extension.
+    Returns 'csv', 'parquet' or 'arrow'; unknown extensions are treated as CSV.
+    """
+    name = str(file_path).lower()
+    if name.endswith(PARQUET_EXTENSIONS):
+        return 'parquet'
+    if name.endswith(ARROW_EXTENSIONS):
+        return 'arrow'
+    return 'csv'
+
+
+def _check_columns(columns):
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise KeyError(missing[0])
+
+
+def _iter_csv_chunks(file_path, chunksize):
+    header = pd.read_csv(file_path, nrows=0)
+    _check_columns(header.columns)
+    # Activities repeat heavily, so they are parsed straight into a categorical.
+    # case_id is read as text in every chunk, so a chunk with blanks is not inferred as float
+    # while the others are int; read_event_log restores numeric ids once all chunks are in.
+    reader = pd.read_csv(
+        file_path,
+        usecols=REQUIRED_COLUMNS,
+        dtype={'case_id': str, 'activity': 'category', 'timestamp': str},
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _iter_parquet_chunks(file_path, chunksize):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet event logs requires 'pyarrow' (pip install pyarrow).") from e
+
+    parquet_file = pq.ParquetFile(file_path)
+    _check_columns(parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=REQUIRED_COLUMNS):
+        yield batch.to_pandas()
+
+
+def _iter_arrow_chunks(file_path, chunksize):
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Reading Arrow event logs requires 'pyarrow' (pip install pyarrow).") from e
+
+    source = pa.memory_map(str(file_path), 'r')
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        schema = reader.schema
+    except pa.ArrowInvalid:
+        source.seek(0)
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+        schema = reader.schema
+    _check_columns(schema.names)
+
+    for batch in batches:
+        batch = batch.select(REQUIRED_COLUMNS)
+        # Writers choose their own batch sizes; re-slice so memory stays bounded by chunksize.
+        for offset in range(0, batch.num_rows, chunksize):
+            yield batch.slice(offset, chunksize).to_pandas()
+
+
+def _compact_chunk(chunk, timestamp_format):
+    """
+    Converts a raw chunk to the compact columnar representation used by the loader:
+    categorical case_id/activity and datetime64[ns] timestamps.
+    """
+    timestamps = chunk['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        try:
+            timestamps = pd.to_datetime(timestamps, format=timestamp_format)
+        except ValueError:
+            # Not in the expected format; fall back to pandas' (much slower) format inference.
+            # Values it cannot parse either become NaT and are dropped by read_event_log.
+            timestamps = pd.to_datetime(timestamps, errors='coerce')
+    if getattr(timestamps.dt, 'tz', None) is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+
+    return pd.DataFrame({
+        'case_id': chunk['case_id'].astype('category'),
+        'activity': chunk['activity'].astype('category'),
+        'timestamp': timestamps.astype('datetime64[ns]'),
+    })
+
+
+def iter_event_log_chunks(file_path, chunksize=DEFAULT_CHUNK_SIZE, timestamp_format=DEFAULT_TIMESTAMP_FORMAT,
+                          file_format=None):
+    """
+    Streams an event log from CSV, Parquet or Arrow IPC/Feather in chunks of at most `chunksize` rows.
+    Each chunk has categorical 'case_id'/'activity' columns and datetime64[ns] 'timestamp'.
+    Timestamps stored as text are parsed with the fixed `timestamp_format`; chunks that do not
+    match it (or timestamp_format=None) fall back to pandas' format inference, which is much slower.
+    Chunks are yielded in file order; they are not sorted.
+    """
+    file_format = file_format or detect_file_format(file_path)
+    if file_format == 'csv':
+        raw_chunks = _iter_csv_chunks(file_path, chunksize)
+    elif file_format == 'parquet':
+        raw_chunks = _iter_parquet_chunks(file_path, chunksize)
+    elif file_format == 'arrow':
+        raw_chunks = _iter_arrow_chunks(file_path, chunksize)
+    else:
+        raise ValueError(f"Unsupported event log format: {file_format}. Expected 'csv', 'parquet' or 'arrow'.")
+
+    for chunk in raw_chunks:
+        yield _compact_chunk(chunk, timestamp_format)
+
+
+def _union_categoricals(parts, sort_categories):
+    try:
+        return union_categoricals(parts, sort_categories=sort_categories)
+    except TypeError:
+        # Chunks inferred different id dtypes (e.g. ints in one chunk, strings in another);
+        # a whole-file read would have produced strings, so do the same here.
+        parts = [part.rename_categories(part.categories.astype(str)) for part in parts]
+        return union_categoricals(parts, sort_categories=sort_categories)
+
+
+def _numeric_case_ids(case_ids):
+    """
+    Case ids read from text as their integer (or float) values when every id is numeric,
+    like a whole-file pd.read_csv would infer, with categories re-sorted numerically.
+    Otherwise (or if two spellings such as '1' and '01' would collide) returns them unchanged.
+    """
+    values = pd.to_numeric(pd.Series(case_ids.categories, dtype=object), errors='coerce')
+    if values.isna().any():
+        return case_ids
+    if (values == np.round(values)).all():
+        values = values.astype(np.int64)
+    if not values.is_unique:
+        return case_ids
+    case_ids = case_ids.rename_categories(pd.Index(values.to_numpy()))
+    return case_ids.reorder_categories(case_ids.categories.sort_values())
+
+
+def read_event_log(file_path, chunksize=DEFAULT_CHUNK_SIZE, timestamp_format=DEFAULT_TIMESTAMP_FORMAT,
+                   file_format=None):
+    """
+    Reads a full event log chunk by chunk and returns it sorted by ('case_id', 'timestamp').
+    Only the compact columns (category codes and int64 timestamps) of the chunks already read
+    are kept in memory, so peak memory is bounded by that plus one raw chunk rather than
+    by the size of the text file.
+    Events with a missing case_id or timestamp are dropped with a warning giving their count.
+    Raises FileNotFoundError / KeyError like pd.read_csv does; see load_event_log for the
+    error-reporting wrapper.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+
+    case_parts, activity_parts, timestamp_parts = [], [], []
+    for chunk in iter_event_log_chunks(file_path, chunksize, timestamp_format, file_format):
+        case_parts.append(chunk['case_id'].array)
+        activity_parts.append(chunk['activity'].array)
+        timestamp_parts.append(chunk['timestamp'].to_numpy().view(np.int64))
+
+    if not case_parts:
+        return pd.DataFrame({
+            'case_id': pd.Series([], dtype='category'),
+            'activity': pd.Series([], dtype='category'),
+            'timestamp': pd.Series([], dtype='datetime64[ns]'),
+        })
+
+    case_ids = _union_categoricals(case_parts, sort_categories=True)
+    if (file_format or detect_file_format(file_path)) == 'csv':
+        case_ids = _numeric_case_ids(case_ids)
+    activities = _union_categoricals(activity_parts, sort_categories=True)
+    timestamps = np.concatenate(timestamp_parts)
+    del case_parts, activity_parts, timestamp_parts
+
+    # Events without a case cannot be attributed, and events without a timestamp cannot be
+    # ordered within their case, so both are dropped.
+    has_case, has_timestamp = case_ids.codes != -1, timestamps != _NAT_INT
+    positions = np.flatnonzero(has_case & has_timestamp)
+    if len(positions) < len(timestamps):
+        for n_dropped, reason in ((len(timestamps) - int(has_case.sum()), 'missing case_ids'),
+                                  (len(timestamps) - int(has_timestamp.sum()), 'missing or unparseable timestamps')):
+            if n_dropped:
+                warnings.warn(f"Dropped {n_dropped} events with {reason} from {file_path}.", stacklevel=2)
+        case_ids, activities, timestamps = case_ids[positions], activities[positions], timestamps[positions]
+
+    # Same ordering as sort_values(by=['case_id', 'timestamp']): case categories are sorted
+    # and ties keep file order. The index holds each event's row number in the file.
+    order = np.lexsort((timestamps, case_ids.codes))
+
+    return pd.DataFrame({
+        'case_id': case_ids.take(order),
+        'activity': activities.take(order),
+        'timestamp': timestamps[order].view('datetime64[ns]'),
+    }, index=positions[order])
+
+
+def load_event_log(file_path, chunksize=DEFAULT_CHUNK_SIZE, timestamp_format=DEFAULT_TIMESTAMP_FORMAT,
+                   file_format=None):
+    """
+    Loads an event log from a CSV, Parquet or Arrow file.
+    Assumes the file has 'case_id', 'activity', 'timestamp' columns.
+    The log is streamed in chunks with categorical case_id/activity columns and timestamps
+    parsed with a fixed format, then sorted by case_id and timestamp.
+    """
+    try:
+        return read_event_log(file_path, chunksize=chunksize, timestamp_format=timestamp_format,
+                              file_format=file_format)
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+        return None
+    except KeyError as e:
+        print(f"Error: Missing expected column in CSV: {e}. Required: 'case_id', 'activity', 'timestamp'")
+        return None
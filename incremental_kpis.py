@@ -0,0 +1,142 @@
+import heapq
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from case_index import NS_PER_SECOND, NS_PER_DAY
+
+
+class IncrementalKPIs:
+    """
+    Keeps the KPIs of calculate_kpis up to date as event batches arrive, without re-reading the log.
+    Per case it stores only the first and last timestamp seen; running aggregates are adjusted by
+    the change in each touched case's cycle time, so an update costs O(batch), not O(log size).
+    Batches may arrive in any order and a case may span any number of batches.
+
+    Also keeps a throughput series: the number of cases whose latest event falls in each
+    `bucket` (a pandas frequency string such as '1D' or '1h').
+    """
+
+    def __init__(self, bucket='1D'):
+        self.bucket_ns = pd.Timedelta(bucket).value
+        self._case_start = {}
+        self._case_end = {}
+        self._cycle_sum = 0
+        self._max_cycle = None
+        # Cycle times only grow, so the maximum is a running max; the minimum needs a heap
+        # whose entries go stale when their case grows (checked lazily on read). Entries are
+        # (cycle, seq, case_id): the sequence number breaks ties, so case ids are never compared.
+        self._min_heap = []
+        self._heap_seq = 0
+        self._first_timestamp = None
+        self._last_timestamp = None
+        self._bucket_counts = {}
+
+    @property
+    def n_cases(self):
+        return len(self._case_start)
+
+    def _move_bucket(self, old_end, new_end):
+        if old_end is not None:
+            old_bucket = old_end // self.bucket_ns
+            self._bucket_counts[old_bucket] -= 1
+            if not self._bucket_counts[old_bucket]:
+                del self._bucket_counts[old_bucket]
+        new_bucket = new_end // self.bucket_ns
+        self._bucket_counts[new_bucket] = self._bucket_counts.get(new_bucket, 0) + 1
+
+    def update(self, batch):
+        """
+        Adds a batch of events (a DataFrame with 'case_id' and 'timestamp' columns).
+        """
+        if batch.empty:
+            return
+        timestamps = pd.to_datetime(batch['timestamp']).to_numpy().astype('datetime64[ns]').view(np.int64)
+        if (timestamps == np.iinfo(np.int64).min).any():
+            raise ValueError("Event batch contains missing timestamps; drop or fill them before updating KPIs.")
+
+        per_case = pd.DataFrame({'case_id': batch['case_id'].to_numpy(), 'timestamp': timestamps}) \
+            .groupby('case_id', sort=False, observed=True)['timestamp'].agg(['min', 'max'])
+
+        for case_id, batch_start, batch_end in zip(per_case.index.tolist(), per_case['min'].tolist(),
+                                                   per_case['max'].tolist()):
+            old_start = self._case_start.get(case_id)
+            if old_start is None:
+                start, end, old_end, old_cycle = batch_start, batch_end, None, 0
+            else:
+                old_end = self._case_end[case_id]
+                start, end = min(old_start, batch_start), max(old_end, batch_end)
+                if start == old_start and end == old_end:
+                    continue
+                old_cycle = old_end - old_start
+
+            cycle = end - start
+            self._case_start[case_id] = start
+            self._case_end[case_id] = end
+            self._cycle_sum += cycle - old_cycle
+            if self._max_cycle is None or cycle > self._max_cycle:
+                self._max_cycle = cycle
+            heapq.heappush(self._min_heap, (cycle, self._heap_seq, case_id))
+            self._heap_seq += 1
+            if end != old_end:
+                self._move_bucket(old_end, end)
+
+        batch_first, batch_last = int(timestamps.min()), int(timestamps.max())
+        if self._first_timestamp is None or batch_first < self._first_timestamp:
+            self._first_timestamp = batch_first
+        if self._last_timestamp is None or batch_last > self._last_timestamp:
+            self._last_timestamp = batch_last
+
+        if len(self._min_heap) > 2 * self.n_cases + 1024:
+            self._min_heap = [(self._case_end[c] - self._case_start[c], seq, c)
+                              for seq, c in enumerate(self._case_start)]
+            self._heap_seq = len(self._min_heap)
+            heapq.heapify(self._min_heap)
+
+    def _min_cycle(self):
+        while self._min_heap:
+            cycle, _, case_id = self._min_heap[0]
+            if self._case_end[case_id] - self._case_start[case_id] == cycle:
+                return cycle
+            heapq.heappop(self._min_heap)
+        return None
+
+    def kpis(self):
+        """
+        Current KPIs, in the same format as calculate_kpis on all events seen so far.
+        """
+        kpis = {}
+        num_cases = self.n_cases
+        if num_cases:
+            kpis['average_cycle_time'] = timedelta(seconds=self._cycle_sum / NS_PER_SECOND / num_cases)
+            kpis['min_cycle_time'] = timedelta(seconds=self._min_cycle() / NS_PER_SECOND)
+            kpis['max_cycle_time'] = timedelta(seconds=self._max_cycle / NS_PER_SECOND)
+        else:
+            kpis['average_cycle_time'] = 'N/A'
+            kpis['min_cycle_time'] = 'N/A'
+            kpis['max_cycle_time'] = 'N/A'
+
+        if num_cases:
+            process_duration_days = (self._last_timestamp - self._first_timestamp) // NS_PER_DAY
+            if process_duration_days > 0:
+                kpis['throughput_cases_per_day'] = num_cases / process_duration_days
+            else:
+                kpis['throughput_cases_per_day'] = num_cases # All cases completed within a day
+        else:
+            kpis['throughput_cases_per_day'] = 0
+
+        return kpis
+
+    def throughput_series(self):
+        """
+        Cases per time bucket, keyed by the bucket's start time, counting each case in the
+        bucket of its latest event. Empty buckets between the first and last are filled with 0.
+        """
+        if not self._bucket_counts:
+            return pd.Series([], dtype='int64', index=pd.DatetimeIndex([], name='bucket_start'), name='cases')
+        first, last = min(self._bucket_counts), max(self._bucket_counts)
+        counts = np.zeros(last - first + 1, dtype=np.int64)
+        for bucket, count in self._bucket_counts.items():
+            counts[bucket - first] = count
+        index = pd.DatetimeIndex((np.arange(first, last + 1) * self.bucket_ns).view('datetime64[ns]'),
+                                 name='bucket_start')
+        return pd.Series(counts, index=index, name='cases')
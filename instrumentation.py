@@ -0,0 +1,186 @@
+import cProfile
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+METRIC_FIELDS = ['stage', 'status', 'rows', 'wall_seconds', 'cpu_seconds', 'rows_per_second',
+                 'peak_rss_mb', 'rss_growth_mb', 'tracemalloc_peak_mb', 'profile']
+
+
+def _peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MiB (None where unavailable).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10 # bytes on macOS, KiB elsewhere
+
+
+class _NullStage:
+    """
+    Stage handle of a disabled recorder: entering, leaving and setting rows do nothing.
+    """
+    __slots__ = ('rows',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullRecorder:
+    """
+    Recorder used when instrumentation is off; stage() returns a shared no-op handle, so an
+    instrumented pipeline pays one method call per stage.
+    """
+    enabled = False
+    records = ()
+
+    def stage(self, name, rows=None):
+        return _NULL_STAGE
+
+
+NULL_RECORDER = NullRecorder()
+
+
+def as_recorder(recorder):
+    return NULL_RECORDER if recorder is None else recorder
+
+
+class _Stage:
+    def __init__(self, recorder, name, rows):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        recorder = self.recorder
+        self._profiler = None
+        if recorder.profile_dir and not recorder._profiling:
+            # cProfile cannot nest, so only the outermost profiled stage gets a dump.
+            self._profiler = cProfile.Profile()
+            recorder._profiling = True
+        if recorder.trace_memory:
+            self._enter_memory_trace()
+        self._rss_before = _peak_rss_mb()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def _enter_memory_trace(self):
+        # tracemalloc has a single peak, so a nested stage banks the enclosing stage's peak so
+        # far before resetting it, and hands its own peak back on exit; each stage reports the
+        # max of its own peak and those of the stages nested in it.
+        recorder = self.recorder
+        if not recorder._memory_stages and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            recorder._started_tracing = True
+        if recorder._memory_stages:
+            parent = recorder._memory_stages[-1]
+            parent._nested_peak = max(parent._nested_peak, tracemalloc.get_traced_memory()[1])
+        recorder._memory_stages.append(self)
+        self._nested_peak = 0
+        tracemalloc.reset_peak()
+
+    def _exit_memory_trace(self):
+        """
+        Leaves the stage's memory trace and returns its peak traced memory in bytes.
+        """
+        recorder = self.recorder
+        peak = max(tracemalloc.get_traced_memory()[1], self._nested_peak)
+        recorder._memory_stages.pop()
+        if recorder._memory_stages:
+            parent = recorder._memory_stages[-1]
+            parent._nested_peak = max(parent._nested_peak, peak)
+        elif recorder._started_tracing:
+            # Tracing slows every allocation, so it does not outlive the stages that needed it.
+            tracemalloc.stop()
+            recorder._started_tracing = False
+        return peak
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is not None:
+            self._profiler.disable()
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        recorder = self.recorder
+        peak_rss = _peak_rss_mb()
+        record = {
+            'stage': self.name,
+            'status': 'ok' if exc_type is None else f'error: {exc_type.__name__}',
+            'rows': self.rows,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'rows_per_second': self.rows / wall if self.rows is not None and wall > 0 else None,
+            'peak_rss_mb': peak_rss,
+            'rss_growth_mb': peak_rss - self._rss_before if peak_rss is not None else None,
+            'tracemalloc_peak_mb': self._exit_memory_trace() / 2**20 if recorder.trace_memory else None,
+            'profile': None,
+        }
+        if self._profiler is not None:
+            recorder._profiling = False
+            os.makedirs(recorder.profile_dir, exist_ok=True)
+            path = os.path.join(recorder.profile_dir, f'{len(recorder.records):02d}-{self.name}.prof')
+            self._profiler.dump_stats(path)
+            record['profile'] = path
+        recorder.records.append(record)
+        return False
+
+
+class StageRecorder:
+    """
+    Opt-in, stage-level metrics for the run_* pipelines. Each `with recorder.stage(name, rows=n)`
+    block records wall and CPU time, the process' peak RSS (and how much the stage raised it),
+    the tracemalloc peak within the stage (nested stages included) if `trace_memory` (which
+    slows allocation-heavy code; tracing started here stops when the outermost stage ends),
+    and the row count, which can also be set inside the block via `stage.rows`. With
+    `profile_dir`, each outermost stage is run under cProfile and dumped to
+    <profile_dir>/<nn>-<stage>.prof (readable with pstats or snakeviz).
+    Pipelines take `recorder=None`, which means NULL_RECORDER: no measurement at all.
+    """
+    enabled = True
+
+    def __init__(self, profile_dir=None, trace_memory=False):
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.records = []
+        self._profiling = False
+        self._memory_stages = []
+        self._started_tracing = False
+
+    def stage(self, name, rows=None):
+        return _Stage(self, name, rows)
+
+    def to_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self.records}, f, indent=2)
+
+    def to_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=METRIC_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def save(self, path):
+        """
+        Writes the records as CSV if `path` ends in .csv, JSON otherwise.
+        """
+        if path.lower().endswith('.csv'):
+            self.to_csv(path)
+        else:
+            self.to_json(path)
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+FEATURE_COLUMNS = ['price_lag1', 'rolling_avg_price', 'news_sentiment']
+DEFAULT_WINDOW = 5
+SWING_SENTIMENT_THRESHOLD = 5
+# Normal equations whose condition number exceeds this are solved with the pseudo-inverse.
+_MAX_CONDITION = 1e12
+
+
+def simulate_market_panel(n_symbols=1000, n_days=100, seed=0):
+    """
+    Seeded long-format panel (symbol, date, market_price, news_sentiment): per symbol a random
+    trend with weekly fluctuations plus noise, and a sentiment score that leads price moves.
+    """
+    rng = np.random.default_rng(seed)
+    days = np.arange(n_days)
+    trend = rng.uniform(-0.5, 1.0, size=(n_symbols, 1))
+    base = rng.uniform(20, 500, size=(n_symbols, 1))
+    sentiment = rng.normal(0, 4, size=(n_symbols, n_days))
+    prices = base + trend * days + ((days % 10) - 5) * 2 + np.cumsum(0.3 * sentiment, axis=1) \
+        + rng.normal(0, 1, size=(n_symbols, n_days))
+    return pd.DataFrame({
+        'symbol': np.repeat([f'SYM{i:05d}' for i in range(n_symbols)], n_days),
+        'date': np.tile(pd.date_range('2023-01-01', periods=n_days).to_numpy(), n_symbols),
+        'market_price': prices.ravel(),
+        'news_sentiment': sentiment.ravel(),
+    })
+
+
+def market_panel_features(panel, window=DEFAULT_WINDOW):
+    """
+    Adds the analyze_market_swings features to every symbol of a long-format panel in one pass:
+    price_lag1 (previous price) and rolling_avg_price (mean of the `window` previous prices),
+    NaN where a symbol's history is too short. Returns a new frame sorted by symbol and date;
+    the input is not modified.
+    """
+    symbol_codes, symbols = pd.factorize(panel['symbol'])
+    order = np.lexsort((panel['date'].to_numpy(), symbol_codes))
+    codes = symbol_codes[order]
+    prices = panel['market_price'].to_numpy(dtype=np.float64)[order]
+
+    group_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    group_sizes = np.diff(np.r_[group_starts, len(codes)])
+    position = np.arange(len(codes)) - np.repeat(group_starts, group_sizes)
+
+    price_lag1 = np.full(len(prices), np.nan)
+    price_lag1[1:] = prices[:-1]
+    price_lag1[position < 1] = np.nan
+
+    rolling_avg_price = np.full(len(prices), np.nan)
+    if len(prices) > window:
+        # Mean of prices[i - window:i]: a window that ends one row earlier (rolling().mean().shift(1)).
+        rolling_avg_price[window:] = sliding_window_view(prices, window)[:-1].mean(axis=1)
+    rolling_avg_price[position < window] = np.nan
+
+    features = panel.iloc[order].reset_index(drop=True)
+    features['price_lag1'] = price_lag1
+    features['rolling_avg_price'] = rolling_avg_price
+    return features
+
+
+def _split_masks(group_sizes, test_size, random_state):
+    """
+    Per-row test mask reproducing train_test_split(test_size, random_state) within each group:
+    the shuffle only depends on the group size, so it is drawn once per distinct size.
+    """
+    starts = np.r_[0, np.cumsum(group_sizes)[:-1]]
+    is_test = np.zeros(int(group_sizes.sum()), dtype=bool)
+    for size in np.unique(group_sizes):
+        if size < 2:
+            continue
+        n_test = int(np.ceil(test_size * size))
+        template = np.zeros(size, dtype=bool)
+        template[np.random.RandomState(random_state).permutation(size)[:n_test]] = True
+        groups = np.flatnonzero(group_sizes == size)
+        is_test[(starts[groups, None] + np.arange(size)).ravel()] = np.tile(template, len(groups))
+    return is_test
+
+
+def _grouped_mean(values, groups, n_groups, counts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if values.ndim == 1:
+            return np.bincount(groups, weights=values, minlength=n_groups) / counts
+        return np.column_stack([np.bincount(groups, weights=values[:, j], minlength=n_groups)
+                                for j in range(values.shape[1])]) / counts[:, None]
+
+
+def fit_market_panel(panel, window=DEFAULT_WINDOW, test_size=0.2, random_state=42,
+                     swing_threshold=SWING_SENTIMENT_THRESHOLD):
+    """
+    Panel counterpart of analyze_market_swings: fits market_price ~ price_lag1 + rolling_avg_price
+    + news_sentiment separately for every symbol, on the same per-symbol train/test split
+    (train_test_split with `test_size` and `random_state`), with all fits solved together.
+
+    Each symbol's training rows are centered (as LinearRegression does) and its 3x3 normal
+    equations are built with grouped sums and solved in one batched np.linalg.solve, falling back
+    to the pseudo-inverse for ill-conditioned symbols. Returns one row per symbol with its
+    intercept and coefficients, row counts, test MAE/R2, latest sentiment, swing flag ('down',
+    'up' or 'neutral' against +-`swing_threshold`) and the predicted price for the next day.
+    """
+    features = market_panel_features(panel, window)
+    valid = features[FEATURE_COLUMNS + ['market_price']].notna().all(axis=1).to_numpy()
+    rows = features[valid]
+    symbol_codes, symbols = pd.factorize(rows['symbol'])
+    n_symbols = len(symbols)
+    group_sizes = np.bincount(symbol_codes, minlength=n_symbols)
+
+    X = rows[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = rows['market_price'].to_numpy(dtype=np.float64)
+    is_test = _split_masks(group_sizes, test_size, random_state)
+    train, test = ~is_test, is_test
+    n_train = np.bincount(symbol_codes[train], minlength=n_symbols)
+    n_test = np.bincount(symbol_codes[test], minlength=n_symbols)
+
+    x_mean = _grouped_mean(X[train], symbol_codes[train], n_symbols, n_train)
+    y_mean = _grouped_mean(y[train], symbol_codes[train], n_symbols, n_train)
+    Xc = X[train] - x_mean[symbol_codes[train]]
+    yc = y[train] - y_mean[symbol_codes[train]]
+    p = X.shape[1]
+    XtX = np.empty((n_symbols, p, p))
+    for i in range(p):
+        for j in range(i, p):
+            XtX[:, i, j] = XtX[:, j, i] = np.bincount(symbol_codes[train], weights=Xc[:, i] * Xc[:, j],
+                                                      minlength=n_symbols)
+    Xty = np.column_stack([np.bincount(symbol_codes[train], weights=Xc[:, j] * yc, minlength=n_symbols)
+                           for j in range(p)])
+
+    fitted = n_train > 0
+    coefs = np.full((n_symbols, p), np.nan)
+    well_conditioned = fitted.copy()
+    well_conditioned[fitted] = np.linalg.cond(XtX[fitted]) < _MAX_CONDITION
+    if well_conditioned.any():
+        coefs[well_conditioned] = np.linalg.solve(XtX[well_conditioned], Xty[well_conditioned][..., None])[..., 0]
+    ill_conditioned = fitted & ~well_conditioned
+    if ill_conditioned.any():
+        coefs[ill_conditioned] = (np.linalg.pinv(XtX[ill_conditioned]) @ Xty[ill_conditioned][..., None])[..., 0]
+    intercepts = y_mean - np.einsum('gp,gp->g', x_mean, coefs)
+
+    test_codes = symbol_codes[test]
+    y_pred = intercepts[test_codes] + np.einsum('np,np->n', X[test], coefs[test_codes])
+    residuals = y[test] - y_pred
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mae = np.bincount(test_codes, weights=np.abs(residuals), minlength=n_symbols) / n_test
+        y_test_mean = np.bincount(test_codes, weights=y[test], minlength=n_symbols) / n_test
+        ss_res = np.bincount(test_codes, weights=residuals ** 2, minlength=n_symbols)
+        ss_tot = np.bincount(test_codes, weights=(y[test] - y_test_mean[test_codes]) ** 2, minlength=n_symbols)
+        # Same conventions as sklearn's r2_score: perfect fit of a constant target is 1, otherwise 0.
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.where(ss_res == 0, 1.0, 0.0))
+    r2[n_test < 2] = np.nan
+
+    # Latest (valid) row per symbol; rows are sorted by symbol and date.
+    last_rows = np.r_[np.flatnonzero(symbol_codes[1:] != symbol_codes[:-1]), len(symbol_codes) - 1] \
+        if len(symbol_codes) else np.empty(0, dtype=np.int64)
+    latest_sentiment = rows['news_sentiment'].to_numpy(dtype=np.float64)[last_rows]
+    swing = np.where(latest_sentiment < -swing_threshold, 'down',
+                     np.where(latest_sentiment > swing_threshold, 'up', 'neutral'))
+
+    # Next-day features of every symbol, from the last `window` prices of its full history.
+    prices = features['market_price'].to_numpy(dtype=np.float64)
+    feature_codes = pd.Index(symbols).get_indexer(features['symbol'])
+    ends = np.r_[np.flatnonzero(feature_codes[1:] != feature_codes[:-1]), len(feature_codes) - 1]
+    ends = ends[feature_codes[ends] >= 0] if len(feature_codes) else ends[:0]
+    recent_mean = sliding_window_view(prices, window).mean(axis=1)[ends - window + 1] if len(ends) else ends[:0]
+    next_X = np.column_stack([prices[ends], recent_mean, latest_sentiment])
+    next_price = intercepts + np.einsum('gp,gp->g', next_X, coefs)
+
+    return pd.DataFrame({
+        'symbol': symbols,
+        'n_obs': group_sizes,
+        'n_train': n_train,
+        'n_test': n_test,
+        'intercept': intercepts,
+        **{f'coef_{name}': coefs[:, j] for j, name in enumerate(FEATURE_COLUMNS)},
+        'mae': mae,
+        'r2': r2,
+        'latest_sentiment': latest_sentiment,
+        'swing': swing,
+        'next_price_prediction': next_price,
+    })
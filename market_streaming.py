@@ -0,0 +1,146 @@
+import math
+import numpy as np
+import pandas as pd
+from market_panel import FEATURE_COLUMNS, DEFAULT_WINDOW, SWING_SENTIMENT_THRESHOLD
+
+# Running sums are recomputed from the ring buffer this often, so rounding errors from
+# adding and removing values cannot build up over a long-lived feed.
+_RESYNC_TICKS = 1024
+
+
+class _SymbolWindow:
+    """
+    Ring buffers of the last `window` prices and sentiments of one symbol, with running sums.
+    """
+    __slots__ = ('prices', 'sentiments', 'position', 'count', 'price_sum', 'price_sumsq', 'sentiment_sum',
+                 'last_price')
+
+    def __init__(self, window):
+        self.prices = [0.0] * window
+        self.sentiments = [0.0] * window
+        self.position = 0
+        self.count = 0
+        self.price_sum = 0.0
+        self.price_sumsq = 0.0
+        self.sentiment_sum = 0.0
+        self.last_price = math.nan
+
+    def push(self, price, sentiment):
+        window = len(self.prices)
+        if self.count >= window:
+            old_price, old_sentiment = self.prices[self.position], self.sentiments[self.position]
+            self.price_sum -= old_price
+            self.price_sumsq -= old_price * old_price
+            self.sentiment_sum -= old_sentiment
+        self.prices[self.position] = price
+        self.sentiments[self.position] = sentiment
+        self.price_sum += price
+        self.price_sumsq += price * price
+        self.sentiment_sum += sentiment
+        self.position = (self.position + 1) % window
+        self.count += 1
+        self.last_price = price
+        if self.count % _RESYNC_TICKS == 0:
+            self.price_sum = math.fsum(self.prices)
+            self.price_sumsq = math.fsum(p * p for p in self.prices)
+            self.sentiment_sum = math.fsum(self.sentiments)
+
+
+class MarketFeatureStream:
+    """
+    Live counterpart of the market swings features and model. Keeps a ring buffer per symbol, so
+    every tick costs O(1) regardless of history: price_lag1, rolling mean / standard deviation of
+    the last `window` prices and the rolling mean sentiment are updated from running sums.
+
+    `models` holds the per-symbol fits of market_panel.fit_market_panel (symbol, intercept,
+    coef_<feature> columns). For each tick, update() returns the tick's features, the model's
+    prediction for its price (made from the history before it, like the batch test predictions),
+    the prediction for the next day once the tick is included, and the sentiment swing flag.
+    On replay of the same panel the values equal the batch path up to floating-point rounding.
+    Ticks of a symbol must arrive in date order. Swing changes to 'up' or 'down' are passed to
+    `on_alert` as messages.
+    """
+
+    def __init__(self, models=None, window=DEFAULT_WINDOW, swing_threshold=SWING_SENTIMENT_THRESHOLD, on_alert=None):
+        self.window = window
+        self.swing_threshold = swing_threshold
+        self.on_alert = on_alert
+        self._symbols = {}
+        self._models = {}
+        if models is not None:
+            coef_columns = [f'coef_{name}' for name in FEATURE_COLUMNS]
+            for symbol, intercept, coefs in zip(models['symbol'], models['intercept'],
+                                                models[coef_columns].to_numpy(dtype=np.float64).tolist()):
+                self._models[symbol] = (intercept, coefs)
+        self._swings = {}
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def _predict(self, symbol, price_lag1, rolling_avg_price, sentiment):
+        model = self._models.get(symbol)
+        if model is None or math.isnan(price_lag1) or math.isnan(rolling_avg_price):
+            return math.nan
+        intercept, (coef_lag, coef_rolling, coef_sentiment) = model
+        return intercept + coef_lag * price_lag1 + coef_rolling * rolling_avg_price + coef_sentiment * sentiment
+
+    def _swing(self, sentiment):
+        if sentiment < -self.swing_threshold:
+            return 'down'
+        if sentiment > self.swing_threshold:
+            return 'up'
+        return 'neutral'
+
+    def update(self, symbol, date, price, sentiment):
+        """
+        Adds one tick and returns its features and predictions as a dict.
+        """
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _SymbolWindow(self.window)
+        window = self.window
+
+        # Features of this tick come from the history before it (shift(1) in the batch path).
+        price_lag1 = state.last_price
+        rolling_avg_price = state.price_sum / window if state.count >= window else math.nan
+        predicted_price = self._predict(symbol, price_lag1, rolling_avg_price, sentiment)
+
+        state.push(price, sentiment)
+        n = min(state.count, window)
+        recent_mean = state.price_sum / n
+        variance = (state.price_sumsq - state.price_sum * recent_mean) / (n - 1) if n > 1 else math.nan
+        next_price_prediction = self._predict(symbol, price, recent_mean, sentiment) if state.count >= window else math.nan
+
+        swing = self._swing(sentiment)
+        if self.on_alert is not None and swing != 'neutral' and self._swings.get(symbol) != swing:
+            direction = 'Downward' if swing == 'down' else 'Upward'
+            message = f"Potential {direction} Swing for {symbol} on {date}: news sentiment {sentiment:.2f}."
+            if not math.isnan(next_price_prediction):
+                message += f" Predicted next price: {next_price_prediction:.2f}"
+            self.on_alert(message)
+        self._swings[symbol] = swing
+
+        return {
+            'symbol': symbol,
+            'date': date,
+            'market_price': price,
+            'news_sentiment': sentiment,
+            'price_lag1': price_lag1,
+            'rolling_avg_price': rolling_avg_price,
+            'rolling_std_price': math.sqrt(max(variance, 0.0)) if n > 1 else math.nan,
+            'rolling_avg_sentiment': state.sentiment_sum / n,
+            'predicted_price': predicted_price,
+            'next_price_prediction': next_price_prediction,
+            'swing': swing,
+        }
+
+    def replay(self, panel):
+        """
+        Feeds a long-format panel tick by tick in date order and returns the update() results
+        as a frame (rows ordered by date, then by symbol order of first appearance).
+        """
+        symbol_codes, _ = pd.factorize(panel['symbol'])
+        order = np.lexsort((symbol_codes, panel['date'].to_numpy()))
+        ticks = panel.iloc[order]
+        return pd.DataFrame([self.update(symbol, date, price, sentiment) for symbol, date, price, sentiment in zip(
+            ticks['symbol'], ticks['date'], ticks['market_price'].astype(float), ticks['news_sentiment'].astype(float))])
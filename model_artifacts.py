@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone
+import joblib
+from activity_encoding import FeatureSchema
+
+ARTIFACT_FORMAT_VERSION = 1
+DEFAULT_MODEL_DIR = 'models'
+
+_LATEST_FILE = 'LATEST'
+_MODEL_FILE = 'model.joblib'
+_SCHEMA_FILE = 'schema.json'
+_MANIFEST_FILE = 'manifest.json'
+
+
+class ModelArtifact:
+    """
+    A trained remaining-time model together with everything inference needs to use it:
+    - model: the fitted estimator (with `feature_schema_` set when it was trained on a schema)
+    - schema: the FeatureSchema (numeric columns, activity encoding and vocabulary), or None
+      for models trained on pre-encoded activity_* columns
+    - manifest: format version, artifact id, version number, creation time, model class,
+      library versions, feature names and any training metadata (metrics, data cut-off, ...)
+    """
+
+    def __init__(self, model, schema, manifest, path=None):
+        self.model = model
+        self.schema = schema
+        self.manifest = manifest
+        self.path = path
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def artifact_id(self):
+        return self.manifest['artifact_id']
+
+    @property
+    def metadata(self):
+        return self.manifest.get('metadata', {})
+
+
+def _version_dir_name(version):
+    return f'v{version:04d}'
+
+
+def list_model_versions(model_dir=DEFAULT_MODEL_DIR):
+    """
+    Version numbers of the artifacts stored in `model_dir`, oldest first.
+    """
+    if not os.path.isdir(model_dir):
+        return []
+    versions = []
+    for name in os.listdir(model_dir):
+        if name.startswith('v') and name[1:].isdigit() and \
+                os.path.exists(os.path.join(model_dir, name, _MANIFEST_FILE)):
+            versions.append(int(name[1:]))
+    return sorted(versions)
+
+
+def latest_model_version(model_dir=DEFAULT_MODEL_DIR):
+    """
+    Version number the LATEST pointer of `model_dir` refers to, or None if nothing was saved yet.
+    """
+    try:
+        with open(os.path.join(model_dir, _LATEST_FILE), 'r', encoding='utf-8') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        versions = list_model_versions(model_dir)
+        return versions[-1] if versions else None
+
+
+def artifact_signature(model_dir=DEFAULT_MODEL_DIR):
+    """
+    Cheap token that changes whenever a new artifact is published to `model_dir`
+    (the LATEST pointer's mtime and contents), for callers that cache model output.
+    """
+    path = os.path.join(model_dir, _LATEST_FILE)
+    try:
+        stat = os.stat(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return (f.read().strip(), stat.st_mtime_ns)
+    except OSError:
+        return None
+
+
+def _write_latest(model_dir, version):
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=model_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(f'{version}\n')
+    os.replace(tmp_path, os.path.join(model_dir, _LATEST_FILE))
+
+
+def save_model_artifact(model, model_dir=DEFAULT_MODEL_DIR, metadata=None):
+    """
+    Stores `model` as the next version in `model_dir` and points LATEST at it.
+    The model is written uncompressed with joblib so its arrays can be memory-mapped on load;
+    the feature schema and manifest are plain JSON. Each version is written to a temporary
+    directory and renamed into place, so readers never see a partial artifact.
+    Returns the saved ModelArtifact.
+    """
+    import sklearn
+
+    os.makedirs(model_dir, exist_ok=True)
+    schema = getattr(model, 'feature_schema_', None)
+    feature_names = schema.feature_names if schema is not None else \
+        [str(name) for name in getattr(model, 'feature_names_in_', [])]
+    versions = list_model_versions(model_dir)
+    version = versions[-1] + 1 if versions else 1
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'artifact_id': uuid.uuid4().hex,
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'model_class': f'{type(model).__module__}.{type(model).__name__}',
+        'sklearn_version': sklearn.__version__,
+        'joblib_version': joblib.__version__,
+        'feature_names': feature_names,
+        'metadata': metadata or {},
+    }
+
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=model_dir)
+    try:
+        joblib.dump(model, os.path.join(tmp_dir, _MODEL_FILE), compress=0)
+        if schema is not None:
+            schema.save(os.path.join(tmp_dir, _SCHEMA_FILE))
+        with open(os.path.join(tmp_dir, _MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_dir, os.path.join(model_dir, _version_dir_name(version)))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    _write_latest(model_dir, version)
+
+    return ModelArtifact(model, schema, manifest, os.path.join(model_dir, _version_dir_name(version)))
+
+
+def _artifact_dir(model_dir, version):
+    if version is None:
+        version = latest_model_version(model_dir)
+        if version is None:
+            raise FileNotFoundError(f"No model artifact found in {model_dir}")
+    return os.path.join(model_dir, _version_dir_name(version))
+
+
+def load_model_manifest(model_dir=DEFAULT_MODEL_DIR, version=None):
+    """
+    Reads only the manifest of an artifact (the latest one by default), without loading the model.
+    """
+    with open(os.path.join(_artifact_dir(model_dir, version), _MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format {manifest.get('format_version')!r} "
+                         f"(expected {ARTIFACT_FORMAT_VERSION}).")
+    return manifest
+
+
+def load_model_artifact(model_dir=DEFAULT_MODEL_DIR, version=None, mmap=True):
+    """
+    Loads an artifact (the latest one by default). With `mmap`, the arrays joblib stored
+    are memory-mapped read-only instead of copied into memory; estimators that rebuild
+    their own buffers on unpickling (e.g. sklearn trees) still copy those.
+    """
+    artifact_dir = _artifact_dir(model_dir, version)
+    manifest = load_model_manifest(model_dir, version)
+    model = joblib.load(os.path.join(artifact_dir, _MODEL_FILE), mmap_mode='r' if mmap else None)
+    schema_path = os.path.join(artifact_dir, _SCHEMA_FILE)
+    schema = FeatureSchema.load(schema_path) if os.path.exists(schema_path) else None
+    if schema is not None:
+        model.feature_schema_ = schema
+    return ModelArtifact(model, schema, manifest, artifact_dir)
@@ -0,0 +1,49 @@
+DEFAULT_BACKEND = 'random_forest'
+
+
+def _random_forest(random_state):
+    from sklearn.ensemble import RandomForestRegressor
+
+    return RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=-1)
+
+
+def _hist_gradient_boosting(random_state):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    return HistGradientBoostingRegressor(max_iter=200, random_state=random_state)
+
+
+def _linear(random_state):
+    from sklearn.linear_model import Ridge
+
+    return Ridge(alpha=1.0)
+
+
+# name -> (factory(random_state) -> unfitted regressor, accepts sparse input)
+MODEL_BACKENDS = {
+    'random_forest': (_random_forest, True),
+    'hist_gradient_boosting': (_hist_gradient_boosting, False),
+    'linear': (_linear, True),
+}
+
+
+def register_model_backend(name, factory, accepts_sparse=False):
+    """
+    Makes a regressor available to train_predictive_model as backend=`name`.
+    `factory(random_state)` must return an unfitted estimator with fit/predict.
+    """
+    MODEL_BACKENDS[name] = (factory, accepts_sparse)
+
+
+def make_model(backend=DEFAULT_BACKEND, random_state=42):
+    """
+    A new, unfitted regressor for `backend`. sklearn is only imported for the chosen backend.
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Expected one of {tuple(MODEL_BACKENDS)}.")
+    factory, _ = MODEL_BACKENDS[backend]
+    return factory(random_state)
+
+
+def backend_accepts_sparse(backend):
+    return MODEL_BACKENDS[backend][1]
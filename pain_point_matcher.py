@@ -0,0 +1,130 @@
+import json
+import re
+import numpy as np
+import pandas as pd
+
+DEFAULT_PAIN_POINTS = {
+    'slow service': ['slow', 'delay', 'wait', 'frustrat'],
+    'high price': ['price', 'expensive', 'cost', 'charge'],
+    'missing feature': ['missing', 'lack', 'wish', 'no app', 'limited'],
+    'confusing process': ['confus', 'unclear', 'onboard', 'difficult'],
+}
+
+
+def load_taxonomy(path):
+    """
+    Reads a pain-point taxonomy {category: [keywords]} from a JSON file of that shape, or from a
+    CSV file with 'category' and 'keyword' columns (one row per keyword).
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return {category: list(keywords) for category, keywords in json.load(f).items()}
+    rows = pd.read_csv(path, usecols=['category', 'keyword'], dtype=str).dropna()
+    return {category: group.tolist() for category, group in rows.groupby('category', sort=False)['keyword']}
+
+
+def _trie_pattern(node):
+    """
+    Regex for the keywords below a trie node. Children start with distinct characters, so the
+    alternation never needs to backtrack between branches; a keyword that is a prefix of a longer
+    one becomes an optional (greedy) tail, so the longest keyword wins.
+    """
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char != '']
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        return f'(?:{body})?'
+    return body
+
+
+class PainPointMatcher:
+    """
+    Labels texts with every taxonomy category whose keywords occur in them (case-insensitive
+    substring match, like `keyword in text.lower()`), in one regex pass per text.
+
+    All keywords are compiled into a single trie-shaped regex wrapped in a lookahead, so it is
+    tried at every position of the text and reports the longest keyword starting there.
+    Any other keyword starting at that position is a prefix of the longest one, so each
+    keyword maps to the categories of all its keyword prefixes and one match per position
+    finds every category. Matching cost depends on text length, not on the number of keywords.
+    """
+
+    def __init__(self, taxonomy=None):
+        taxonomy = DEFAULT_PAIN_POINTS if taxonomy is None else taxonomy
+        self.categories = list(taxonomy)
+        keyword_categories = {}
+        for position, keywords in enumerate(taxonomy.values()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    keyword_categories.setdefault(keyword, set()).add(position)
+
+        trie = {}
+        for keyword in keyword_categories:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        # Categories of a (longest) match: those of every keyword that is a prefix of it.
+        self._match_categories = {}
+        for keyword in keyword_categories:
+            positions = set()
+            for end in range(1, len(keyword) + 1):
+                positions |= keyword_categories.get(keyword[:end], set())
+            self._match_categories[keyword] = sorted(positions)
+
+        pattern = _trie_pattern(trie) if trie else '(?!)'
+        self._regex = re.compile(f'(?=({pattern}))')
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_taxonomy(path))
+
+    def categories_of(self, text):
+        """
+        Category names matched in one text, in taxonomy order.
+        """
+        positions = set()
+        for keyword in self._regex.findall(text.lower()):
+            positions.update(self._match_categories[keyword])
+        return [self.categories[position] for position in sorted(positions)]
+
+    def match(self, texts):
+        """
+        Boolean DataFrame (one row per text, same index for a Series; one column per category).
+        Repeated texts are matched once. Missing values match nothing; other non-strings are
+        matched as their str().
+        """
+        texts = pd.Series(texts, dtype=object)
+        codes, uniques = pd.factorize(texts.fillna('').astype(str))
+        unique_matches = np.zeros((len(uniques), len(self.categories)), dtype=bool)
+        for row, text in enumerate(pd.Index(uniques).str.lower()):
+            for keyword in self._regex.findall(text):
+                unique_matches[row, self._match_categories[keyword]] = True
+        return pd.DataFrame(unique_matches[codes], index=texts.index, columns=self.categories)
+
+    def count(self, texts):
+        """
+        Number of texts matching each category, for categories with at least one match, ordered
+        by first matching text (then taxonomy order), like counting with a per-text loop.
+        """
+        matches = self.match(texts).to_numpy()
+        counts = matches.sum(axis=0)
+        first_text = np.argmax(matches, axis=0)
+        present = np.flatnonzero(counts)
+        order = present[np.lexsort((present, first_text[present]))]
+        return {self.categories[position]: int(counts[position]) for position in order}
+
+
+_default_matcher = None
+
+
+def default_matcher():
+    """
+    The PainPointMatcher for DEFAULT_PAIN_POINTS, compiled on first use and then reused.
+    """
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = PainPointMatcher(DEFAULT_PAIN_POINTS)
+    return _default_matcher
@@ -1,11 +1,9 @@
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression # For market trend prediction
-from sklearn.feature_extraction.text import TfidfVectorizer # For sentiment analysis (conceptual)
-from sklearn.naive_bayes import MultinomialNB # For sentiment analysis (conceptual)
-from sklearn.pipeline import make_pipeline
-from textblob import TextBlob # Simple sentiment analysis for demo
+from sentiment_scoring import score_sentiment
+from pain_point_matcher import PainPointMatcher, default_matcher
+from market_panel import fit_market_panel
+from instrumentation import as_recorder
 
 def simulate_market_data():
     """
@@ -29,7 +27,7 @@ def simulate_market_data():
         "Innovative tech showcased at conference.",
         "Inflation fears loom large."
     ]
-    news_sentiment_scores = [TextBlob(s).sentiment.polarity * 10 for s in (sentiments * 10)[:100]] # Scale for effect
+    news_sentiment_scores = score_sentiment((sentiments * 10)[:100]) * 10 # Scale for effect; each distinct headline is scored once
     
     data = pd.DataFrame({
         'date': dates,
@@ -67,12 +65,18 @@ def analyze_market_swings(market_data):
     Analyzes market data for swings and predicts future trends.
     Uses a simple linear regression for price trend and sentiment for early indicators.
     """
+    # sklearn is imported here rather than at module load, so commands that never fit a model skip it
+    from sklearn.model_selection import train_test_split
+    from sklearn.linear_model import LinearRegression # For market trend prediction
+    from sklearn.metrics import mean_absolute_error, r2_score
+
     print("\n--- Market Swings Analysis ---")
     
-    # Feature engineering: lagged prices, rolling averages
-    market_data['price_lag1'] = market_data['market_price'].shift(1)
-    market_data['rolling_avg_price'] = market_data['market_price'].rolling(window=5).mean().shift(1)
-    market_data = market_data.dropna()
+    # Feature engineering: lagged prices, rolling averages (on a copy; the caller's frame is left as is)
+    market_data = market_data.assign(
+        price_lag1=market_data['market_price'].shift(1),
+        rolling_avg_price=market_data['market_price'].rolling(window=5).mean().shift(1),
+    ).dropna()
 
     if market_data.empty:
         print("Insufficient market data for analysis.")
@@ -107,18 +111,50 @@ def analyze_market_swings(market_data):
         next_day_price_pred = model.predict(sample_input)[0]
         print(f"  Predicted next day's market price (based on last known data): ${next_day_price_pred:.2f}")
 
-def identify_consumer_pain_points(feedback_data):
+def analyze_market_panel(panel_data, window=5):
+    """
+    Market swings analysis for many instruments at once. `panel_data` is a long-format table with
+    symbol, date, market_price and news_sentiment columns; every symbol gets the model of
+    analyze_market_swings, fitted together in one batched solve (see market_panel.fit_market_panel).
+    Returns the per-symbol results (coefficients, MAE/R2, swing flag, next-day prediction).
+    """
+    print("\n--- Market Panel Swings Analysis ---")
+
+    results = fit_market_panel(panel_data, window=window)
+    if results.empty:
+        print("Insufficient market data for analysis.")
+        return results
+
+    print(f"  Fitted {len(results)} symbols. Median MAE: {results['mae'].median():.2f}, median R2: {results['r2'].median():.2f}")
+    swings = results['swing'].value_counts()
+    print(f"  Potential downward swings: {swings.get('down', 0)}, upward swings: {swings.get('up', 0)}, "
+          f"neutral: {swings.get('neutral', 0)}")
+    return results
+
+def identify_consumer_pain_points(feedback_data, taxonomy=None):
     """
     Identifies consumer pain points using sentiment and keyword analysis.
+    `taxonomy` is a {category: [keywords]} dict, the path of a taxonomy file (see
+    pain_point_matcher.load_taxonomy) or a compiled PainPointMatcher; the default is
+    pain_point_matcher.DEFAULT_PAIN_POINTS.
     """
     print("\n--- Consumer Pain Points Identification ---")
 
+    if taxonomy is None:
+        pain_point_matcher = default_matcher()
+    elif isinstance(taxonomy, PainPointMatcher):
+        pain_point_matcher = taxonomy
+    elif isinstance(taxonomy, str):
+        pain_point_matcher = PainPointMatcher.from_file(taxonomy)
+    else:
+        pain_point_matcher = PainPointMatcher(taxonomy)
+
     if feedback_data.empty:
         print("No consumer feedback data for analysis.")
         return
 
-    # Basic sentiment analysis using TextBlob
-    feedback_data['sentiment_score'] = feedback_data['feedback_text'].apply(lambda text: TextBlob(text).sentiment.polarity)
+    # Basic sentiment analysis using TextBlob (deduplicated and cached, see sentiment_scoring)
+    feedback_data['sentiment_score'] = score_sentiment(feedback_data['feedback_text'])
     
     negative_feedback = feedback_data[feedback_data['sentiment_score'] < 0]
 
@@ -127,20 +163,8 @@ def identify_consumer_pain_points(feedback_data):
         for _, row in negative_feedback.head(3).iterrows():
             print(f"    - '{row['feedback_text']}' (Sentiment: {row['sentiment_score']:.2f})")
 
-        # Conceptual keyword extraction for pain points
-        common_pain_points = {
-            'slow service': ['slow', 'delay', 'wait', 'frustrat'],
-            'high price': ['price', 'expensive', 'cost', 'charge'],
-            'missing feature': ['missing', 'lack', 'wish', 'no app', 'limited'],
-            'confusing process': ['confus', 'unclear', 'onboard', 'difficult']
-        }
-        
-        pain_point_summary = {}
-        for text in negative_feedback['feedback_text']:
-            text_lower = text.lower()
-            for pp_category, keywords in common_pain_points.items():
-                if any(keyword in text_lower for keyword in keywords):
-                    pain_point_summary[pp_category] = pain_point_summary.get(pp_category, 0) + 1
+        # Keyword extraction for pain points: all categories in one compiled pass per text
+        pain_point_summary = pain_point_matcher.count(negative_feedback['feedback_text'])
         
         if pain_point_summary:
             print("\n  Summary of Potential Pain Points:")
@@ -166,24 +190,32 @@ def identify_consumer_pain_points(feedback_data):
         print("\n  No significant negative feedback to analyze.")
 
 
-def run_market_consumer_analytics():
+def run_market_consumer_analytics(taxonomy=None, recorder=None):
     """
     Main function to run market swings and consumer pain points predictive analytics.
+    `taxonomy` is passed to identify_consumer_pain_points (default pain-point keywords if None).
+    With a `recorder` (instrumentation.StageRecorder), time and memory of each stage are recorded.
     """
+    recorder = as_recorder(recorder)
     print("\n--- Running Market & Consumer Predictive Analytics ---")
 
     # 1. Simulate and analyze market data
-    market_data = simulate_market_data()
-    analyze_market_swings(market_data)
+    with recorder.stage('simulate_market_data') as stage:
+        market_data = simulate_market_data()
+        stage.rows = len(market_data)
+    with recorder.stage('market_swings', rows=len(market_data)):
+        analyze_market_swings(market_data)
 
     # 2. Simulate and identify consumer pain points
     consumer_feedback_data = simulate_consumer_feedback_data()
-    identify_consumer_pain_points(consumer_feedback_data)
+    with recorder.stage('pain_points', rows=len(consumer_feedback_data)):
+        identify_consumer_pain_points(consumer_feedback_data, taxonomy)
 
     print("\n--- End of Market & Consumer Report ---")
 
 if __name__ == "__main__":
     # Ensure TextBlob is downloaded (run once)
+    from textblob import TextBlob # Simple sentiment analysis for demo
     try:
         TextBlob("test")
     except LookupError:
@@ -1,108 +1,100 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
 import warnings
+from event_log_loader import load_event_log
+from event_log_cache import load_cached_event_log
+from case_index import CaseIndex, as_case_index, extract_cases, NS_PER_SECOND
+from activity_encoding import FeatureSchema
+from model_backends import DEFAULT_BACKEND, make_model, backend_accepts_sparse
+from instrumentation import as_recorder
+from process_scoring import align_process_states, score_process_states, render_alerts
 
 # Suppress specific sklearn warnings
 warnings.filterwarnings("ignore", category=UserWarning, module='sklearn')
 
-def load_event_log(file_path):
-    """
-    Loads an event log from a CSV file.
-    Assumes CSV has 'case_id', 'activity', 'timestamp' columns.
-    Timestamp column is converted to datetime objects.
-    """
-    try:
-        df = pd.read_csv(file_path)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values(by=['case_id', 'timestamp'])
-        return df
-    except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
-        return None
-    except KeyError as e:
-        print(f"Error: Missing expected column in CSV: {e}. Required: 'case_id', 'activity', 'timestamp'")
-        return None
-
-def feature_engineer_process_data(event_log):
+def feature_engineer_process_data(event_log, encode_activities=True):
     """
     Engineers features from event log data for predictive modeling.
     Calculates features like:
-    - total_activities_in_case
+    - activities_completed (running event count within the case)
     - time_since_start
     - current_activity_duration (simplified as time between current and previous, or 0 for first)
     - one-hot encoding for activity
     - target: remaining_cycle_time
+    Accepts an event log DataFrame or a prebuilt CaseIndex.
+    With encode_activities=False the categorical 'activity' column is kept as-is, to be encoded
+    later by a FeatureSchema (shared activity vocabulary; one-hot, sparse or ordinal).
+    Vectorized over the case index: its per-case offsets and start/end times play the role of a
+    groupby cumcount / cummin / max, and its per-event deltas are the groupby diff.
     """
-    features = []
-    for case_id, group in event_log.groupby('case_id'):
-        group = group.sort_values(by='timestamp').reset_index(drop=True)
-        start_time = group['timestamp'].min()
-        end_time = group['timestamp'].max()
-        full_cycle_time = (end_time - start_time).total_seconds() if pd.notna(start_time) and pd.notna(end_time) else 0
-
-        for i in range(len(group)):
-            current_time = group.loc[i, 'timestamp']
-            activity = group.loc[i, 'activity']
-            
-            # Features for the current state
-            time_since_start = (current_time - start_time).total_seconds()
-            activities_completed = i + 1
-            
-            # Simplified activity duration
-            current_activity_duration = 0
-            if i > 0:
-                current_activity_duration = (current_time - group.loc[i-1, 'timestamp']).total_seconds()
-
-            # Target: Remaining cycle time
-            remaining_cycle_time = full_cycle_time - time_since_start
-            if remaining_cycle_time < 0: remaining_cycle_time = 0 # Handle cases where current_time > end_time due to max calculation
-
-            features.append({
-                'case_id': case_id,
-                'activity': activity,
-                'timestamp': current_time,
-                'activities_completed': activities_completed,
-                'time_since_start': time_since_start,
-                'current_activity_duration': current_activity_duration,
-                'remaining_cycle_time': remaining_cycle_time,
-                'full_cycle_time': full_cycle_time
-            })
-    
-    features_df = pd.DataFrame(features)
-    
-    # One-hot encode the 'activity' column
-    features_df = pd.get_dummies(features_df, columns=['activity'], prefix='activity')
-    
+    index = as_case_index(event_log)
+    case_pos = index.event_case_positions()
+    timestamps = index.timestamps
+    case_start = index.case_start_times[case_pos]
+
+    time_since_start = (timestamps - case_start) / NS_PER_SECOND
+    full_cycle_time = index.cycle_times()[case_pos] / NS_PER_SECOND
+    # Target: Remaining cycle time (never negative)
+    remaining_cycle_time = np.maximum(full_cycle_time - time_since_start, 0)
+
+    features_df = pd.DataFrame({
+        'case_id': np.asarray(index.case_ids)[case_pos],
+        'activity': pd.Categorical.from_codes(np.asarray(index.activity_codes), categories=index.activities),
+        'timestamp': timestamps.view('datetime64[ns]'),
+        'activities_completed': np.arange(index.n_events) - index.case_starts[case_pos] + 1,
+        'time_since_start': time_since_start,
+        'current_activity_duration': index.deltas / NS_PER_SECOND,
+        'remaining_cycle_time': remaining_cycle_time,
+        'full_cycle_time': full_cycle_time,
+    })
+
+    if encode_activities:
+        # One-hot encode the 'activity' column
+        features_df['activity'] = features_df['activity'].cat.remove_unused_categories()
+        features_df = pd.get_dummies(features_df, columns=['activity'], prefix='activity')
+
     return features_df
 
-def train_predictive_model(features_df):
+def train_predictive_model(features_df, encoding='onehot', schema=None, backend=DEFAULT_BACKEND):
     """
-    Trains a RandomForestRegressor model to predict remaining_cycle_time.
+    Trains a regressor to predict remaining_cycle_time. `backend` names an entry of
+    model_backends.MODEL_BACKENDS ('random_forest' by default, 'hist_gradient_boosting', 'linear').
+    The hold-out MAE and R2 are kept on the model as `training_metrics_`.
+    If features_df keeps the raw 'activity' column (feature_engineer_process_data with
+    encode_activities=False), activities are encoded through a FeatureSchema ('onehot', 'sparse'
+    CSR or 'ordinal'), which is attached to the model as `feature_schema_` so inference encodes
+    new states identically. Pre-encoded activity_* columns are used as they are.
     """
     if features_df.empty:
         print("No features to train the model.")
         return None, None, None
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error, r2_score
 
-    # Exclude non-feature columns and target
-    X = features_df.drop(columns=['case_id', 'timestamp', 'remaining_cycle_time', 'full_cycle_time'])
-    y = features_df['remaining_cycle_time']
+    model = make_model(backend)
+    if encoding == 'sparse' and not backend_accepts_sparse(backend):
+        raise ValueError(f"Model backend '{backend}' needs dense input; use the 'onehot' or 'ordinal' encoding.")
 
-    # Align columns in case new activities appear in test set
-    # This step is crucial if you're predicting on new data with potentially new activities.
-    # For now, assuming training and prediction data have same activities.
+    if 'activity' in features_df.columns:
+        schema = schema or FeatureSchema.fit(features_df, encoding)
+        X = schema.transform(features_df)
+    else:
+        # Exclude non-feature columns and target
+        X = features_df.drop(columns=['case_id', 'timestamp', 'remaining_cycle_time', 'full_cycle_time'])
+    y = features_df['remaining_cycle_time']
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
     model.fit(X_train, y_train)
+    if 'activity' in features_df.columns:
+        model.feature_schema_ = schema
 
     y_pred = model.predict(X_test)
 
     mae = mean_absolute_error(y_test, y_pred)
     r2 = r2_score(y_test, y_pred)
+    model.training_metrics_ = {'mae': float(mae), 'r2': float(r2), 'n_train': len(y_train), 'n_test': len(y_test)}
 
     print(f"\nModel Training Results:")
     print(f"  Mean Absolute Error (MAE): {mae:.2f} seconds")
@@ -113,85 +105,171 @@ def train_predictive_model(features_df):
 def predict_and_alert(model, current_process_state_df, sla_threshold_seconds=timedelta(hours=1).total_seconds()):
     """
     Predicts remaining cycle time for current process states and generates alerts.
+    Returns one message per state. For large batches use process_scoring.score_process_states,
+    which returns a columnar result, and render_alerts for the breaching cases only.
     """
     if model is None or current_process_state_df.empty:
         print("Cannot predict: model not trained or no current process data.")
         return []
 
-    # Ensure current_process_state_df has the same columns as the training data, fill missing activity columns with 0
-    # For a robust solution, you'd save the columns from training and use them here.
-    # For this example, we assume `current_process_state_df` is created similarly to `features_df`
-    # and we need to align the columns for prediction.
-    
-    # Identify all possible activity columns from original training
-    training_activity_cols = [col for col in model.feature_names_in_ if col.startswith('activity_')]
-    
-    # Add any missing activity columns to current_process_state_df and fill with 0
-    for col in training_activity_cols:
-        if col not in current_process_state_df.columns:
-            current_process_state_df[col] = 0
-
-    # Ensure columns order matches the training data
-    current_process_state_aligned = current_process_state_df[model.feature_names_in_]
-    
-    predictions = model.predict(current_process_state_aligned)
-    
-    alerts = []
-    for i, pred_rem_time in enumerate(predictions):
-        case_id = current_process_state_df.iloc[i]['case_id']
-        current_activity = current_process_state_df.iloc[i].filter(like='activity_').idxmax()
-        
-        # This is a simplified way to get current activity name (gets the column name of the max value)
-        current_activity_name = current_activity.replace('activity_', '')
-
-        total_predicted_time = current_process_state_df.iloc[i]['time_since_start'] + pred_rem_time
-        
-        if total_predicted_time > sla_threshold_seconds:
-            alerts.append(f"ALERT: Case {case_id} ({current_activity_name}) is predicted to exceed SLA. "
-                          f"Predicted total time: {timedelta(seconds=total_predicted_time)}. "
-                          f"Remaining: {timedelta(seconds=pred_rem_time)}")
-        else:
-            alerts.append(f"Prediction: Case {case_id} ({current_activity_name}) will complete within "
-                          f"approx. {timedelta(seconds=total_predicted_time)}. Remaining: {timedelta(seconds=pred_rem_time)}")
-    return alerts
+    scores = score_process_states(model, current_process_state_df, sla_threshold_seconds)
+    return render_alerts(scores, only_breaches=False)
+
+def save_trained_model(model, features_df, model_dir=None):
+    """
+    Publishes a trained model as a new artifact version in `model_dir` (default
+    model_artifacts.DEFAULT_MODEL_DIR), recording its hold-out metrics and the latest event
+    timestamp it was trained on (the cut-off for retraining).
+    """
+    # Imported here: model_artifacts pulls in joblib, which scoring-only runs never need.
+    from model_artifacts import save_model_artifact, DEFAULT_MODEL_DIR
+
+    metadata = dict(getattr(model, 'training_metrics_', {}))
+    metadata['n_cases'] = int(features_df['case_id'].nunique())
+    metadata['trained_through'] = pd.Timestamp(features_df['timestamp'].max()).isoformat()
+    return save_model_artifact(model, model_dir or DEFAULT_MODEL_DIR, metadata=metadata)
 
-def run_predictive_analytics(file_path):
+def _model_input(model, features_df):
+    """
+    Model input for a feature table with the raw 'activity' column, encoded the way `model` was trained.
+    """
+    if getattr(model, 'feature_schema_', None) is None:
+        features_df = features_df.copy()
+        features_df['activity'] = features_df['activity'].cat.remove_unused_categories()
+        features_df = pd.get_dummies(features_df, columns=['activity'], prefix='activity')
+    return align_process_states(model, features_df)
+
+def retrain_predictive_model(event_log, model_dir=None, n_new_estimators=20, max_estimators=None,
+                             end_activities=None, idle_seconds=None):
+    """
+    Updates the latest model artifact in `model_dir` (default model_artifacts.DEFAULT_MODEL_DIR)
+    with the cases completed since it was trained, instead of refitting on the whole history.
+    New cases are those whose last event is later than the artifact's `trained_through` cut-off and
+    that are complete: their last activity is one of `end_activities`, or their last event is more
+    than `idle_seconds` older than the latest event in the log. At least one of the two must be
+    given, so running cases are never trained on as if they had finished.
+    Features are built only for the new cases. Their events are split 80/20 like
+    train_predictive_model; `n_new_estimators` trees are grown on the new training rows
+    with warm_start and added to the forest. With `max_estimators`, the oldest trees are dropped so
+    the forest is a sliding window over the most recent data.
+    The feature schema is kept as is, so activities first seen after the cut-off fall into the
+    unknown bucket. Prints and returns MAE/R2 of the old and updated model on the new hold-out rows,
+    and saves the updated model as a new artifact version. Returns (artifact, report), or
+    (None, None) when there is nothing to retrain on.
+    """
+    if end_activities is None and idle_seconds is None:
+        raise ValueError("Pass end_activities and/or idle_seconds to tell completed cases from running ones.")
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from model_artifacts import load_model_artifact, save_model_artifact, DEFAULT_MODEL_DIR
+
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    artifact = load_model_artifact(model_dir, mmap=False)
+    model = artifact.model
+    if not hasattr(model, 'estimators_'):
+        print(f"Cannot retrain incrementally: {type(model).__name__} cannot be extended with new trees; retrain it with train_predictive_model.")
+        return None, None
+    cutoff = pd.Timestamp(artifact.metadata['trained_through']).value
+
+    index = as_case_index(event_log)
+    is_complete = np.zeros(index.n_cases, dtype=bool)
+    if end_activities is not None:
+        last_activities = np.asarray(index.activities, dtype=object)[np.asarray(index.activity_codes)[index.case_ends - 1]]
+        is_complete |= np.isin(last_activities, list(end_activities))
+    if idle_seconds is not None and index.n_cases:
+        is_complete |= index.case_end_times < index.case_end_times.max() - int(idle_seconds * NS_PER_SECOND)
+    new_cases = np.flatnonzero(is_complete & (index.case_end_times > cutoff))
+    if not len(new_cases):
+        print(f"No new completed cases since {pd.Timestamp(cutoff)}; model version {artifact.version} is current.")
+        return None, None
+
+    new_log, _ = extract_cases(index, new_cases)
+    features_df = feature_engineer_process_data(CaseIndex.from_cached(new_log), encode_activities=False)
+    X = _model_input(model, features_df)
+    y = features_df['remaining_cycle_time']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    y_before = model.predict(X_test)
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_estimators)
+    model.fit(X_train, y_train)
+    if max_estimators is not None and len(model.estimators_) > max_estimators:
+        model.estimators_ = model.estimators_[-max_estimators:]
+        model.n_estimators = max_estimators
+    model.set_params(warm_start=False)
+    y_after = model.predict(X_test)
+
+    report = {
+        'parent_version': artifact.version,
+        'new_cases': len(new_cases),
+        'new_events': len(features_df),
+        'n_estimators': len(model.estimators_),
+        'mae_before': float(mean_absolute_error(y_test, y_before)),
+        'r2_before': float(r2_score(y_test, y_before)),
+        'mae_after': float(mean_absolute_error(y_test, y_after)),
+        'r2_after': float(r2_score(y_test, y_after)),
+    }
+    print(f"\nIncremental Retraining on {report['new_cases']} new cases ({report['new_events']} events):")
+    print(f"  Before: MAE {report['mae_before']:.2f} seconds, R2 {report['r2_before']:.2f}")
+    print(f"  After:  MAE {report['mae_after']:.2f} seconds, R2 {report['r2_after']:.2f}")
+
+    model.training_metrics_ = {'mae': report['mae_after'], 'r2': report['r2_after'],
+                               'n_train': len(y_train), 'n_test': len(y_test)}
+    metadata = dict(model.training_metrics_, **report)
+    metadata['n_cases'] = report['new_cases']
+    metadata['trained_through'] = pd.Timestamp(features_df['timestamp'].max()).isoformat()
+    new_artifact = save_model_artifact(model, model_dir, metadata=metadata)
+    print(f"  Saved model artifact version {new_artifact.version} to {new_artifact.path}")
+    return new_artifact, report
+
+def run_predictive_analytics(file_path, cache_dir=None, encoding='onehot', model_dir=None, backend=DEFAULT_BACKEND,
+                             recorder=None):
     """
     Main function to run predictive analytics on process data.
+    If `cache_dir` is given, the parsed and sorted log is reused from (or stored in)
+    the memory-mapped event log cache instead of re-reading the file.
+    `encoding` selects how activities are fed to the model: 'onehot', 'sparse' or 'ordinal'.
+    If `model_dir` is given, the trained model is saved there as a new artifact version.
+    `backend` selects the regressor (see model_backends.MODEL_BACKENDS).
+    With a `recorder` (instrumentation.StageRecorder), time and memory of each stage are recorded.
     """
-    event_log = load_event_log(file_path)
-    if event_log is None or event_log.empty:
+    recorder = as_recorder(recorder)
+    with recorder.stage('load') as stage:
+        if cache_dir:
+            cached_log = load_cached_event_log(file_path, cache_dir)
+            case_index = CaseIndex.from_cached(cached_log) if cached_log is not None else None
+        else:
+            event_log = load_event_log(file_path)
+            case_index = CaseIndex.from_event_log(event_log) if event_log is not None else None
+        stage.rows = case_index.n_events if case_index is not None else 0
+    if case_index is None or case_index.empty:
         print("No event log data to process for predictive analytics.")
         return
 
     print(f"\n--- Predictive Analytics Report for: {file_path} ---")
 
     # 1. Feature Engineering
-    features_df = feature_engineer_process_data(event_log)
+    with recorder.stage('feature_engineering', rows=case_index.n_events):
+        features_df = feature_engineer_process_data(case_index, encode_activities=False)
     print(f"\n1. Features Engineered for {features_df['case_id'].nunique()} cases and {len(features_df)} events.")
     # print(features_df.head()) # Uncomment to see engineered features
 
     # 2. Model Training
-    model, _, X_test_df = train_predictive_model(features_df)
+    with recorder.stage('training', rows=len(features_df)):
+        model, _, _ = train_predictive_model(features_df, encoding=encoding, backend=backend)
     if model is None:
         return
+    if model_dir:
+        with recorder.stage('save_model'):
+            artifact = save_trained_model(model, features_df, model_dir)
+        print(f"  Saved model artifact version {artifact.version} to {artifact.path}")
 
     # 3. Prediction and Alerting for a few sample in-progress cases
     print("\n3. Predicting and Alerting for Sample Cases:")
-    # For demonstration, we use some test data points. In a real scenario, this would be live data.
-    sample_current_states = X_test_df.sample(min(5, len(X_test_df)), random_state=42).copy() # Get 5 random samples
-    
-    # We need to add the 'case_id', 'timestamp', 'time_since_start' back to the sample for reporting
-    sample_indices = sample_current_states.index
-    original_sample_data = features_df.loc[sample_indices, ['case_id', 'timestamp', 'time_since_start']].copy()
-    
-    # Merge activity columns from sample_current_states back into original_sample_data
-    # This is a bit of a hack for the demo; in production, you'd prepare current state data properly.
-    for col in sample_current_states.columns:
-        if col.startswith('activity_'):
-            original_sample_data[col] = sample_current_states[col]
-
-    alerts = predict_and_alert(model, original_sample_data, sla_threshold_seconds=timedelta(minutes=60).total_seconds()) # 60 minute SLA
+    # For demonstration, we score a few engineered states. In a real scenario, this would be live data.
+    sample_current_states = features_df.sample(min(5, len(features_df)), random_state=42) # Get 5 random samples
+
+    with recorder.stage('scoring', rows=len(sample_current_states)):
+        alerts = predict_and_alert(model, sample_current_states, sla_threshold_seconds=timedelta(minutes=60).total_seconds()) # 60 minute SLA
     for alert in alerts:
         print(f"  - {alert}")
 
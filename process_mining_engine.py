@@ -1,62 +1,85 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-
-def load_event_log(file_path):
-    """
-    Loads an event log from a CSV file.
-    Assumes CSV has 'case_id', 'activity', 'timestamp' columns.
-    Timestamp column is converted to datetime objects.
-    """
-    try:
-        df = pd.read_csv(file_path)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values(by=['case_id', 'timestamp'])
-        return df
-    except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
-        return None
-    except KeyError as e:
-        print(f"Error: Missing expected column in CSV: {e}. Required: 'case_id', 'activity', 'timestamp'")
-        return None
+from event_log_loader import load_event_log
+from event_log_cache import CachedEventLog, load_cached_event_log
+from case_index import CaseIndex, as_case_index, exact_sum, exact_grouped_sum, NS_PER_SECOND, NS_PER_DAY
+from transition_graph import (
+    TransitionGraph, TransitionAggregator, build_transition_graph, transition_aggregates, DEFAULT_QUANTILE_K,
+)
+from variant_index import (
+    build_variant_index, variant_aggregates, merge_variant_aggregates_into, top_variants_from_aggregates,
+)
+from process_mining_sketch import ProcessSketch, iter_case_blocks, DEFAULT_CASES_PER_BLOCK
+from instrumentation import as_recorder
 
 def discover_process_flow(event_log):
     """
     Discovers a simplified process flow by sequencing activities for each case.
     Returns a dictionary where keys are sequences and values are their counts.
+    Accepts an event log DataFrame or a prebuilt CaseIndex; use build_variant_index
+    directly for top-k, prefix and per-case variant queries.
     """
-    process_flows = {}
-    for case_id, group in event_log.groupby('case_id'):
-        flow = tuple(group['activity'].tolist())
-        process_flows[flow] = process_flows.get(flow, 0) + 1
-    return process_flows
+    return build_variant_index(event_log).to_flow_counts()
 
-def calculate_kpis(event_log):
+def _empty_kpi_aggregates():
+    return {'n_cases': 0, 'cycle_sum': 0, 'cycle_min': None, 'cycle_max': None,
+            'first_timestamp': None, 'last_timestamp': None}
+
+def kpi_aggregates(event_log):
     """
-    Calculates key performance indicators (KPIs) like cycle time and throughput.
+    Mergeable cycle-time and throughput aggregates of a log, or of one partition of its cases.
+    Sums are exact integer nanoseconds, so merged partitions give exactly the serial result.
+    """
+    index = as_case_index(event_log)
+    if index.empty:
+        return _empty_kpi_aggregates()
+    cycle_times = index.cycle_times()
+    return {
+        'n_cases': index.n_cases,
+        'cycle_sum': exact_sum(cycle_times),
+        'cycle_min': int(cycle_times.min()),
+        'cycle_max': int(cycle_times.max()),
+        'first_timestamp': int(index.case_start_times.min()),
+        'last_timestamp': int(index.case_end_times.max()),
+    }
+
+def merge_kpi_aggregates(parts):
+    """
+    Combines kpi_aggregates of disjoint sets of cases.
+    """
+    parts = [part for part in parts if part['n_cases']]
+    if not parts:
+        return _empty_kpi_aggregates()
+    return {
+        'n_cases': sum(part['n_cases'] for part in parts),
+        'cycle_sum': sum(part['cycle_sum'] for part in parts),
+        'cycle_min': min(part['cycle_min'] for part in parts),
+        'cycle_max': max(part['cycle_max'] for part in parts),
+        'first_timestamp': min(part['first_timestamp'] for part in parts),
+        'last_timestamp': max(part['last_timestamp'] for part in parts),
+    }
+
+def kpis_from_aggregates(aggregates):
+    """
+    Turns kpi_aggregates into the KPI dictionary reported by calculate_kpis.
     """
     kpis = {}
 
     # Cycle Time
-    cycle_times = []
-    for case_id, group in event_log.groupby('case_id'):
-        start_time = group['timestamp'].min()
-        end_time = group['timestamp'].max()
-        if pd.notna(start_time) and pd.notna(end_time):
-            cycle_times.append((end_time - start_time).total_seconds())
-
-    if cycle_times:
-        kpis['average_cycle_time'] = timedelta(seconds=sum(cycle_times) / len(cycle_times))
-        kpis['min_cycle_time'] = timedelta(seconds=min(cycle_times))
-        kpis['max_cycle_time'] = timedelta(seconds=max(cycle_times))
+    num_cases = aggregates['n_cases']
+    if num_cases:
+        kpis['average_cycle_time'] = timedelta(seconds=aggregates['cycle_sum'] / NS_PER_SECOND / num_cases)
+        kpis['min_cycle_time'] = timedelta(seconds=aggregates['cycle_min'] / NS_PER_SECOND)
+        kpis['max_cycle_time'] = timedelta(seconds=aggregates['cycle_max'] / NS_PER_SECOND)
     else:
         kpis['average_cycle_time'] = 'N/A'
         kpis['min_cycle_time'] = 'N/A'
         kpis['max_cycle_time'] = 'N/A'
 
     # Throughput (simple: cases completed per day)
-    num_cases = event_log['case_id'].nunique()
-    if not event_log.empty:
-        process_duration_days = (event_log['timestamp'].max() - event_log['timestamp'].min()).days
+    if num_cases:
+        process_duration_days = (aggregates['last_timestamp'] - aggregates['first_timestamp']) // NS_PER_DAY
         if process_duration_days > 0:
             kpis['throughput_cases_per_day'] = num_cases / process_duration_days
         else:
@@ -66,60 +89,209 @@ def calculate_kpis(event_log):
 
     return kpis
 
-def identify_bottlenecks(event_log):
+def calculate_kpis(event_log):
     """
-    Identifies potential bottlenecks based on average activity duration.
-    This is a simplification; a real bottleneck analysis would require more context.
+    Calculates key performance indicators (KPIs) like cycle time and throughput.
+    Accepts an event log DataFrame or a prebuilt CaseIndex.
+    """
+    return kpis_from_aggregates(kpi_aggregates(event_log))
+
+def activity_duration_aggregates(event_log, event_positions=None):
+    """
+    Mergeable per-activity duration aggregates: {activity: (total_ns, count, first_position)}.
+    The duration of an event is the wait until the next event of the same case.
+    first_position is the position of the activity's first timed event in the full log
+    (`event_positions` maps a partition's events back to it) and keeps tie order stable.
+    """
+    index = as_case_index(event_log)
+    has_successor = index.has_successor()
+    # Duration of an activity or wait time until next: the delta of the following event.
+    activity_codes = np.asarray(index.activity_codes)[has_successor]
+    durations = index.deltas[1:][has_successor[:-1]] if index.n_events else index.deltas
+    positions = np.flatnonzero(has_successor) if event_positions is None \
+        else np.asarray(event_positions)[has_successor]
+
+    n_activities = len(index.activities)
+    counts = np.bincount(activity_codes, minlength=n_activities)
+    sums = exact_grouped_sum(durations, activity_codes, n_activities)
+    seen_codes, first_seen = np.unique(activity_codes, return_index=True)
+    return {
+        index.activities[code]: (sums[code], int(counts[code]), int(positions[first]))
+        for code, first in zip(seen_codes, first_seen)
+    }
+
+def merge_activity_duration_aggregates(parts):
+    """
+    Combines activity_duration_aggregates of disjoint sets of cases.
     """
-    activity_durations = {}
-    for case_id, group in event_log.groupby('case_id'):
-        group = group.sort_values(by='timestamp').reset_index(drop=True)
-        for i in range(len(group) - 1):
-            activity_name = group.loc[i, 'activity']
-            start_time = group.loc[i, 'timestamp']
-            next_activity_time = group.loc[i+1, 'timestamp']
-            duration = (next_activity_time - start_time).total_seconds() # Duration of an activity or wait time until next
-            activity_durations.setdefault(activity_name, []).append(duration)
+    merged = {}
+    for part in parts:
+        for activity, (total, count, first_position) in part.items():
+            if activity in merged:
+                old_total, old_count, old_first = merged[activity]
+                merged[activity] = (old_total + total, old_count + count, min(old_first, first_position))
+            else:
+                merged[activity] = (total, count, first_position)
+    return merged
 
+def bottlenecks_from_aggregates(aggregates, top_n=3):
+    """
+    Ranks activities by average duration from activity_duration_aggregates.
+    """
+    # Report activities in order of first appearance so ties rank the same way as a per-case scan.
+    ordered = sorted(aggregates.items(), key=lambda item: item[1][2])
     avg_activity_durations = {
-        activity: timedelta(seconds=sum(durations) / len(durations))
-        for activity, durations in activity_durations.items()
+        activity: timedelta(seconds=total / NS_PER_SECOND / count)
+        for activity, (total, count, _) in ordered
     }
 
     if avg_activity_durations:
         # Sort activities by average duration in descending order
         bottlenecks = sorted(avg_activity_durations.items(), key=lambda item: item[1], reverse=True)
-        return bottlenecks[:3] # Top 3 longest activities/waits
+        return bottlenecks[:top_n] # Top N longest activities/waits
     return []
 
-def run_process_mining(file_path):
+def identify_bottlenecks(event_log):
+    """
+    Identifies potential bottlenecks based on average activity duration.
+    This is a simplification; a real bottleneck analysis would require more context.
+    Accepts an event log DataFrame or a prebuilt CaseIndex.
+    """
+    return bottlenecks_from_aggregates(activity_duration_aggregates(event_log))
+
+def rank_transitions(graph, top_n=5, min_count=1):
+    """
+    Returns the `top_n` slowest edges of a TransitionGraph as ((source, target), stats) pairs.
+    """
+    transitions = []
+    for edge in graph.top_transitions(n=top_n, by='mean_wait', min_count=min_count):
+        stats = {'count': int(graph.counts[edge])}
+        for stat in ('mean_wait', 'median_wait', 'p95_wait', 'max_wait'):
+            stats[stat] = timedelta(seconds=float(getattr(graph, stat)[edge]) / NS_PER_SECOND)
+        source = graph.activities[graph.sources[edge]]
+        target = graph.activities[graph.targets[edge]]
+        transitions.append(((source, target), stats))
+    return transitions
+
+def identify_bottleneck_transitions(event_log, top_n=5, min_count=1):
+    """
+    Ranks directly-follows transitions (activity A -> activity B) by their mean wait time.
+    Returns up to `top_n` ((source, target), stats) pairs, longest mean wait first, where stats
+    holds the transition count and its mean, median, p95 and max wait as timedeltas.
+    Accepts an event log DataFrame or a prebuilt CaseIndex.
+    """
+    return rank_transitions(build_transition_graph(event_log), top_n=top_n, min_count=min_count)
+
+def _summarize_process_sketched(event_log, top_k, recorder, cases_per_block=DEFAULT_CASES_PER_BLOCK):
+    """
+    Approximate summarize_process over consecutive blocks of whole cases, without a full CaseIndex,
+    VariantIndex or transition graph: each block is indexed on its own and folded in place into
+    running variant counts, per-edge transition aggregates and a ProcessSketch, so each block
+    costs the same however many came before.
+    """
+    log = event_log if hasattr(event_log, 'case_offsets') else CachedEventLog.from_event_log(event_log)
+    variants, transitions, sketch = {}, TransitionAggregator(), ProcessSketch()
+    first_case = 0
+    with recorder.stage('sketch_summary', rows=log.n_events):
+        for block in iter_case_blocks(log, cases_per_block):
+            block_index = CaseIndex(block)
+            case_positions = range(first_case, first_case + block_index.n_cases)
+            merge_variant_aggregates_into(variants, variant_aggregates(block_index, case_positions))
+            transitions.add(transition_aggregates(block_index, DEFAULT_QUANTILE_K))
+            sketch.update(block)
+            first_case += block_index.n_cases
+        graph = TransitionGraph.from_aggregates(log.activities, transitions.aggregates())
+    return {
+        'top_variants': top_variants_from_aggregates(variants, log.activities, top_k),
+        'n_variants': len(variants),
+        'kpis': sketch.kpis(),
+        'bottlenecks': sketch.bottlenecks(),
+        'transitions': rank_transitions(graph),
+    }
+
+def summarize_process(event_log, top_k=10, approximate=False, recorder=None):
+    """
+    Computes everything run_process_mining reports, on a single core.
+    Returns a dict with 'top_variants', 'n_variants', 'kpis', 'bottlenecks' and 'transitions'.
+    With approximate=True the log is processed in blocks of whole cases (see process_mining_sketch):
+    KPIs and bottlenecks come from KLL/HyperLogLog sketches, transition median/p95 waits from
+    per-edge KLL sketches, and variants and transition counts/means stay exact. Working memory is
+    then one block plus O(distinct variants + edges) rather than O(events); the input itself is
+    still held in memory unless it is a memory-mapped CachedEventLog from the event log cache.
+    Each step is timed as a stage of `recorder` (see instrumentation.StageRecorder).
+    """
+    recorder = as_recorder(recorder)
+    if approximate:
+        return _summarize_process_sketched(event_log, top_k, recorder)
+    index = as_case_index(event_log)
+    with recorder.stage('discovery', rows=index.n_events):
+        variant_index = build_variant_index(index)
+        top_variants = variant_index.top_variants(top_k)
+    with recorder.stage('kpis', rows=index.n_events):
+        kpis = calculate_kpis(index)
+    with recorder.stage('bottlenecks', rows=index.n_events):
+        bottlenecks = identify_bottlenecks(index)
+    with recorder.stage('transitions', rows=index.n_events):
+        transitions = identify_bottleneck_transitions(index)
+    return {
+        'top_variants': top_variants,
+        'n_variants': variant_index.n_variants,
+        'kpis': kpis,
+        'bottlenecks': bottlenecks,
+        'transitions': transitions,
+    }
+
+def run_process_mining(file_path, cache_dir=None, top_k=10, workers=None, approximate=False, recorder=None):
     """
     Main function to run the process mining analysis.
+    If `cache_dir` is given, the parsed and sorted log is reused from (or stored in)
+    the memory-mapped event log cache instead of re-reading the file.
+    Only the `top_k` most frequent process flows are listed.
+    With `workers` > 1 the cases are hash-partitioned across a process pool; the report is identical.
+    With `approximate` the KPIs, bottlenecks and transition quantiles are estimated from mergeable
+    sketches, block by block; combine it with `cache_dir` so the log is memory-mapped rather than
+    loaded, otherwise the loaded log itself still takes O(events) memory.
+    With a `recorder` (instrumentation.StageRecorder), time and memory of each stage are recorded.
     """
-    event_log = load_event_log(file_path)
-    if event_log is None or event_log.empty:
+    recorder = as_recorder(recorder)
+    with recorder.stage('load') as stage:
+        if cache_dir:
+            log = load_cached_event_log(file_path, cache_dir)
+        else:
+            event_log = load_event_log(file_path)
+            log = CachedEventLog.from_event_log(event_log) if event_log is not None else None
+            del event_log
+        stage.rows = log.n_events if log is not None else 0
+    if log is None or log.n_events == 0:
         print("No event log data to process.")
         return
 
+    if workers and workers > 1:
+        from process_mining_parallel import summarize_process_parallel
+        # Workers build their own indexes; a cached log is memory-mapped by each worker.
+        with recorder.stage('parallel_summary', rows=log.n_events):
+            summary = summarize_process_parallel(log, workers=workers, top_k=top_k, approximate=approximate)
+    else:
+        summary = summarize_process(log, top_k=top_k, approximate=approximate, recorder=recorder)
+
     print(f"\n--- Process Mining Report for: {file_path} ---")
 
     # 1. Process Discovery
     print("\n1. Discovered Process Flows:")
-    process_flows = discover_process_flow(event_log)
-    sorted_flows = sorted(process_flows.items(), key=lambda item: item[1], reverse=True)
-    for flow, count in sorted_flows:
+    for flow, count in summary['top_variants']:
         print(f"  - {' -> '.join(flow)} (Count: {count})")
-    print(f"\nTotal unique process paths discovered: {len(process_flows)}")
+    if summary['n_variants'] > top_k:
+        print(f"  ... {summary['n_variants'] - top_k} less frequent paths not shown")
+    print(f"\nTotal unique process paths discovered: {summary['n_variants']}")
 
     # 2. Key Performance Indicators (KPIs)
-    print("\n2. Key Performance Indicators (KPIs):")
-    kpis = calculate_kpis(event_log)
-    for kpi, value in kpis.items():
+    print("\n2. Key Performance Indicators (KPIs):" + (" (approximate)" if approximate else ""))
+    for kpi, value in summary['kpis'].items():
         print(f"  - {kpi.replace('_', ' ').title()}: {value}")
 
     # 3. Bottleneck Identification
-    print("\n3. Potential Bottleneck Activities (Simplified based on average duration):")
-    bottlenecks = identify_bottlenecks(event_log)
+    print("\n3. Potential Bottleneck Activities (Simplified based on average duration):" + (" (approximate)" if approximate else ""))
+    bottlenecks = summary['bottlenecks']
     if bottlenecks:
         for activity, avg_duration in bottlenecks:
             print(f"  - Activity/Transition '{activity}' (Avg Duration/Wait: {avg_duration})")
@@ -127,6 +299,16 @@ def run_process_mining(file_path):
     else:
         print("  No significant bottlenecks identified with this method or insufficient data.")
 
+    # 4. Bottleneck Transitions (directly-follows graph)
+    print("\n4. Slowest Transitions (Directly-Follows Graph, by mean wait):")
+    transitions = summary['transitions']
+    if transitions:
+        for (source, target), stats in transitions:
+            print(f"  - '{source}' -> '{target}' (Count: {stats['count']}, Mean: {stats['mean_wait']}, "
+                  f"Median: {stats['median_wait']}, P95: {stats['p95_wait']}, Max: {stats['max_wait']})")
+    else:
+        print("  No transitions found (every case has a single event).")
+
     print("\n--- End of Report ---")
 
 if __name__ == "__main__":
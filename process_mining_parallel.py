@@ -0,0 +1,130 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from case_index import CaseIndex, extract_cases
+from event_log_cache import CachedEventLog
+from transition_graph import (
+    TransitionGraph, transition_aggregates, merge_transition_aggregates, DEFAULT_QUANTILE_K,
+)
+from process_mining_sketch import ProcessSketch, sketch_event_log
+from variant_index import variant_aggregates, merge_variant_aggregates, top_variants_from_aggregates
+from process_mining_engine import (
+    kpi_aggregates, merge_kpi_aggregates, kpis_from_aggregates,
+    activity_duration_aggregates, merge_activity_duration_aggregates, bottlenecks_from_aggregates,
+    rank_transitions,
+)
+
+
+def partition_cases(index, n_partitions):
+    """
+    Assigns every case to one of `n_partitions` by a stable hash of its case_id, so the same
+    case always lands in the same partition regardless of log order or worker count history.
+    Returns an int array with the partition of each case.
+    """
+    hashes = pd.util.hash_array(np.asarray(index.case_ids))
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def partition_case_positions(index, n_partitions):
+    """
+    The case positions of every non-empty hash partition (see partition_cases), each in log
+    order, from one stable sort of the per-case partition numbers: O(cases), not O(events).
+    """
+    partition_of_case = partition_cases(index, n_partitions)
+    order = np.argsort(partition_of_case, kind='stable')
+    bounds = np.cumsum(np.bincount(partition_of_case, minlength=n_partitions))[:-1]
+    return [positions for positions in np.split(order, bounds) if len(positions)]
+
+
+def mine_partition(log, case_positions, event_positions, approximate=False, quantile_k=DEFAULT_QUANTILE_K):
+    """
+    Computes the mergeable partial results for one partition of cases: variant counts,
+    cycle-time sums/extrema, per-activity duration aggregates and per-edge transition aggregates
+    with every wait, sorted per edge, so merged quantiles are exact. All but the waits are
+    reduced to a size that does not grow with the number of events.
+    With approximate=True the KPI and duration aggregates are replaced by a ProcessSketch and
+    the waits by per-edge KLL sketches of size `quantile_k`.
+    """
+    index = CaseIndex(log)
+    partial = {
+        'variants': variant_aggregates(index, case_positions),
+        'transitions': transition_aggregates(index, quantile_k if approximate else None),
+    }
+    if approximate:
+        partial['sketch'] = sketch_event_log(index)
+    else:
+        partial['kpis'] = kpi_aggregates(index)
+        partial['activity_durations'] = activity_duration_aggregates(index, event_positions)
+    return partial
+
+
+def mine_cached_partition(entry_dir, case_positions, approximate=False, quantile_k=DEFAULT_QUANTILE_K):
+    """
+    mine_partition for a worker that memory-maps the event log cache entry itself and reads
+    only its own cases, so the parent never sends event data.
+    """
+    shard, event_positions = extract_cases(CachedEventLog.from_entry_dir(entry_dir), case_positions)
+    return mine_partition(shard, case_positions, event_positions, approximate, quantile_k)
+
+
+def merge_partials(partials, activities, top_k=10, approximate=False):
+    """
+    Merges the partial results of all partitions into the summary produced by summarize_process.
+    Every part merges exactly, so the summary does not depend on how cases were partitioned.
+    With approximate=True, transition median/p95 waits are exact for edges whose merged wait
+    sketch never had to compact (at most quantile_k transitions) and KLL estimates otherwise.
+    """
+    variants = merge_variant_aggregates(partial['variants'] for partial in partials)
+    graph = TransitionGraph.from_aggregates(
+        activities, merge_transition_aggregates(partial['transitions'] for partial in partials))
+    if approximate:
+        sketch = ProcessSketch()
+        for partial in partials:
+            sketch.merge(partial['sketch'])
+        kpis, bottlenecks = sketch.kpis(), sketch.bottlenecks()
+    else:
+        kpis = kpis_from_aggregates(merge_kpi_aggregates(partial['kpis'] for partial in partials))
+        bottlenecks = bottlenecks_from_aggregates(
+            merge_activity_duration_aggregates(partial['activity_durations'] for partial in partials))
+    return {
+        'top_variants': top_variants_from_aggregates(variants, activities, top_k),
+        'n_variants': len(variants),
+        'kpis': kpis,
+        'bottlenecks': bottlenecks,
+        'transitions': rank_transitions(graph),
+    }
+
+
+def summarize_process_parallel(event_log, workers=None, top_k=10, approximate=False, quantile_k=DEFAULT_QUANTILE_K):
+    """
+    Parallel version of summarize_process: cases are hash-partitioned by case_id across a
+    process pool of `workers` processes (default: all CPUs), each worker computes partial
+    aggregates for its cases, and the parent merges them into the same summary as the serial
+    path. The partials are small except for the sorted transition waits (one int64 per
+    transition), which exact quantiles need; with approximate=True those are replaced by
+    per-edge sketches of size `quantile_k`, so every partial is small.
+    `event_log` is a DataFrame, CachedEventLog or CaseIndex. For a CachedEventLog opened from
+    the event log cache, workers memory-map the cache entry and read their own cases; otherwise
+    the parent extracts each partition in one pass over the log and sends it to its worker.
+    """
+    log = event_log if hasattr(event_log, 'case_offsets') else CachedEventLog.from_event_log(event_log)
+    workers = workers or os.cpu_count() or 1
+    partitions = partition_case_positions(log, workers)
+    entry_dir = getattr(log, 'entry_dir', None)
+
+    partials = []
+    if partitions:
+        with ProcessPoolExecutor(max_workers=min(workers, len(partitions))) as pool:
+            if entry_dir:
+                futures = [pool.submit(mine_cached_partition, entry_dir, case_positions, approximate, quantile_k)
+                           for case_positions in partitions]
+            else:
+                futures = []
+                for case_positions in partitions:
+                    shard, event_positions = extract_cases(log, case_positions)
+                    futures.append(pool.submit(mine_partition, shard, case_positions, event_positions, approximate,
+                                               quantile_k))
+                    del shard, event_positions
+            partials = [future.result() for future in futures]
+    return merge_partials(partials, log.activities, top_k, approximate)
@@ -0,0 +1,177 @@
+from datetime import timedelta
+import numpy as np
+from case_index import NS_PER_SECOND, NS_PER_DAY
+from event_log_cache import CachedEventLog
+from sketches import KLLSketch, HyperLogLog
+
+DEFAULT_CASES_PER_BLOCK = 100_000
+
+
+class ProcessSketch:
+    """
+    Bounded-memory, mergeable summary of an event log for the approximate KPI and bottleneck mode.
+    Cycle times and per-activity waits go into KLL sketches and distinct cases into a HyperLogLog,
+    so the sketch's own memory depends on `k`, `hll_precision` and the number of activities, not
+    on the log size. The log it is fed from is a separate matter: feed it blocks of a memory-mapped
+    CachedEventLog (iter_case_blocks) to keep the whole pass bounded.
+    See sketches.py for the accuracy of each sketch.
+
+    Cycle times need whole cases: each update must contain complete cases, and sketches merged
+    together must cover disjoint cases (e.g. hash partitions of case_id). The case count is then
+    exact (one cycle time per case), and kpis() uses it. The HyperLogLog of case ids is only
+    needed where shards can overlap (the same case in several sketches); see distinct_cases().
+    """
+
+    def __init__(self, k=200, hll_precision=14, seed=0):
+        self.k = k
+        self.seed = seed
+        self.cycle_times = KLLSketch(k, seed=seed)
+        self.cases = HyperLogLog(hll_precision)
+        self.activity_waits = {}
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def _activity_sketch(self, activity):
+        sketch = self.activity_waits.get(activity)
+        if sketch is None:
+            seed = None if self.seed is None else self.seed + len(self.activity_waits) + 1
+            sketch = self.activity_waits[activity] = KLLSketch(self.k, seed=seed)
+        return sketch
+
+    def update(self, log):
+        """
+        Adds a block of complete cases given in the columnar layout of CachedEventLog
+        (a CachedEventLog, a slice of one, or a CaseIndex).
+        """
+        offsets = np.asarray(log.case_offsets)
+        if len(offsets) < 2:
+            return
+        timestamps = np.asarray(log.timestamps)
+        codes = np.asarray(log.activity_codes)
+        starts, ends = offsets[:-1] - offsets[0], offsets[1:] - offsets[0]
+
+        self.cycle_times.update((timestamps[ends - 1] - timestamps[starts]) / NS_PER_SECOND)
+        self.cases.update(log.case_ids)
+        block_first, block_last = int(timestamps[starts].min()), int(timestamps[ends - 1].max())
+        if self.first_timestamp is None or block_first < self.first_timestamp:
+            self.first_timestamp = block_first
+        if self.last_timestamp is None or block_last > self.last_timestamp:
+            self.last_timestamp = block_last
+
+        # Wait of an event = time until the next event of the same case.
+        has_successor = np.ones(len(timestamps), dtype=bool)
+        has_successor[ends - 1] = False
+        sources = codes[:-1][has_successor[:-1]]
+        waits = np.diff(timestamps)[has_successor[:-1]] / NS_PER_SECOND
+        order = np.argsort(sources, kind='stable')
+        sources, waits = sources[order], waits[order]
+        boundaries = np.flatnonzero(np.diff(sources)) + 1
+        for group_sources, group_waits in zip(np.split(sources, boundaries), np.split(waits, boundaries)):
+            if len(group_sources):
+                self._activity_sketch(log.activities[group_sources[0]]).update(group_waits)
+
+    def merge(self, other):
+        """
+        Folds a ProcessSketch built over a disjoint set of cases into this one and returns self.
+        """
+        self.cycle_times.merge(other.cycle_times)
+        self.cases.merge(other.cases)
+        for activity, sketch in other.activity_waits.items():
+            self._activity_sketch(activity).merge(sketch)
+        for timestamp in (other.first_timestamp, other.last_timestamp):
+            if timestamp is None:
+                continue
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+        return self
+
+    def kpis(self):
+        """
+        Approximate counterpart of calculate_kpis, with the same keys plus median and p95 cycle time.
+        Average, min and max cycle time and throughput are exact; the quantiles are estimates.
+        """
+        kpis = {}
+        cycle_times = self.cycle_times
+        if cycle_times.count:
+            kpis['average_cycle_time'] = timedelta(seconds=cycle_times.mean)
+            kpis['min_cycle_time'] = timedelta(seconds=cycle_times.min)
+            kpis['max_cycle_time'] = timedelta(seconds=cycle_times.max)
+            kpis['median_cycle_time'] = timedelta(seconds=cycle_times.quantile(0.5))
+            kpis['p95_cycle_time'] = timedelta(seconds=cycle_times.quantile(0.95))
+        else:
+            kpis['average_cycle_time'] = 'N/A'
+            kpis['min_cycle_time'] = 'N/A'
+            kpis['max_cycle_time'] = 'N/A'
+
+        if cycle_times.count:
+            num_cases = cycle_times.count
+            process_duration_days = (self.last_timestamp - self.first_timestamp) // NS_PER_DAY
+            if process_duration_days > 0:
+                kpis['throughput_cases_per_day'] = num_cases / process_duration_days
+            else:
+                kpis['throughput_cases_per_day'] = num_cases # All cases completed within a day
+        else:
+            kpis['throughput_cases_per_day'] = 0
+
+        return kpis
+
+    def distinct_cases(self):
+        """
+        Estimated number of distinct case ids fed to this sketch and those merged into it.
+        Unlike cycle_times.count, it does not count a case twice when shards overlap.
+        """
+        return self.cases.estimate()
+
+    def activity_wait_quantiles(self, quantiles=(0.5, 0.95)):
+        """
+        Approximate wait-time quantiles per activity: {activity: {q: timedelta}}.
+        """
+        return {
+            activity: {q: timedelta(seconds=sketch.quantile(q)) for q in quantiles}
+            for activity, sketch in self.activity_waits.items()
+        }
+
+    def bottlenecks(self, top_n=3):
+        """
+        Approximate counterpart of identify_bottlenecks: activities ranked by mean wait.
+        The means are exact; only the memory used for them is bounded.
+        """
+        avg_activity_durations = {
+            activity: timedelta(seconds=sketch.mean) for activity, sketch in self.activity_waits.items()
+        }
+        bottlenecks = sorted(avg_activity_durations.items(), key=lambda item: item[1], reverse=True)
+        return bottlenecks[:top_n]
+
+
+def iter_case_blocks(log, cases_per_block=DEFAULT_CASES_PER_BLOCK):
+    """
+    Yields consecutive blocks of whole cases from a CachedEventLog (or CaseIndex) as
+    CachedEventLog views. On a memory-mapped cache only the current block is paged in.
+    """
+    offsets = np.asarray(log.case_offsets)
+    n_cases = len(offsets) - 1
+    for first_case in range(0, n_cases, cases_per_block):
+        last_case = min(first_case + cases_per_block, n_cases)
+        first_event, last_event = offsets[first_case], offsets[last_case]
+        yield CachedEventLog(
+            activity_codes=log.activity_codes[first_event:last_event],
+            timestamps=log.timestamps[first_event:last_event],
+            case_offsets=offsets[first_case:last_case + 1] - first_event,
+            case_ids=log.case_ids[first_case:last_case],
+            activities=log.activities,
+        )
+
+
+def sketch_event_log(event_log, cases_per_block=DEFAULT_CASES_PER_BLOCK, k=200, hll_precision=14, seed=0):
+    """
+    Builds a ProcessSketch of an event log DataFrame, CachedEventLog or CaseIndex,
+    processing `cases_per_block` cases at a time.
+    """
+    if not hasattr(event_log, 'case_offsets'):
+        event_log = CachedEventLog.from_event_log(event_log)
+    sketch = ProcessSketch(k=k, hll_precision=hll_precision, seed=seed)
+    for block in iter_case_blocks(event_log, cases_per_block):
+        sketch.update(block)
+    return sketch
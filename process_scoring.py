@@ -0,0 +1,219 @@
+import weakref
+from collections import OrderedDict
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from activity_encoding import activity_names
+
+DEFAULT_SLA_SECONDS = timedelta(hours=1).total_seconds()
+DEFAULT_CACHE_SIZE = 100_000
+QUANTIZED_COLUMNS = ('time_since_start', 'current_activity_duration')
+
+
+def align_process_states(model, current_process_state_df):
+    """
+    Builds the model input for current process states.
+    Models trained with a FeatureSchema encode the states with the training vocabulary
+    (unseen activities fall into the reserved unknown bucket). Otherwise the columns are
+    aligned to the training columns in one reindex: missing activity columns become 0 and
+    columns the model never saw are dropped. The input frame is never modified.
+    """
+    schema = getattr(model, 'feature_schema_', None)
+    if schema is not None:
+        return schema.transform(current_process_state_df)
+    return current_process_state_df.reindex(columns=model.feature_names_in_, fill_value=0)
+
+
+class PredictionCache:
+    """
+    LRU cache of remaining-time predictions, keyed on the encoded features of a state with
+    time_since_start and current_activity_duration rounded to multiples of `time_quantum_seconds`.
+    Rounding only builds the key: a miss is predicted on the first raw state seen for that key,
+    and later states with the same key reuse its answer. With the default 1-second quantum this
+    is exact for logs with second-resolution timestamps; coarser quanta trade accuracy for hit rate.
+    Entries belong to one model: a model token (e.g. the artifact id) identifies it, or, without
+    one, a weak reference to the model object itself; predicting with another model clears the
+    cache first. `hits`, `misses` and `invalidations` count lookups and clears.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, time_quantum_seconds=1.0):
+        self.max_size = max_size
+        self.time_quantum_seconds = time_quantum_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._owner = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate, 'invalidations': self.invalidations}
+
+    def clear(self):
+        self._entries.clear()
+
+    def _quantize(self, states_df):
+        q = self.time_quantum_seconds
+        return states_df.assign(**{col: np.round(states_df[col].to_numpy(dtype=np.float64) / q) * q
+                                   for col in QUANTIZED_COLUMNS if col in states_df.columns})
+
+    def _keys(self, model, states_df):
+        schema = getattr(model, 'feature_schema_', None)
+        if schema is None:
+            return align_process_states(model, states_df).to_numpy(dtype=np.float64)
+        return np.column_stack([states_df[schema.numeric_columns].to_numpy(dtype=np.float64),
+                                schema.vocabulary.encode(activity_names(states_df))])
+
+    def predict(self, model, current_process_state_df, model_token=None):
+        """
+        Remaining-time predictions for the states, computing only keys that are not cached.
+        Repeated keys within one batch are predicted once. `model_token` identifies the model;
+        without it the cache follows the model object (by weak reference, so a new model that
+        reuses a freed model's address is not mistaken for it).
+        """
+        # Live weak references compare equal when their referents are the same object.
+        owner = weakref.ref(model) if model_token is None else model_token
+        if owner != self._owner:
+            if self._owner is not None and self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._owner = owner
+
+        states_df = current_process_state_df
+        keys = self._keys(model, self._quantize(states_df))
+        unique_keys, first_rows, inverse = np.unique(keys, axis=0,
+                                                     return_index=True, return_inverse=True)
+        keys = [tuple(key) for key in unique_keys.tolist()]
+        predictions = np.empty(len(keys), dtype=np.float64)
+        missing = []
+        for i, key in enumerate(keys):
+            value = self._entries.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                self._entries.move_to_end(key)
+                predictions[i] = value
+
+        n_missing_rows = int(np.isin(inverse, missing).sum()) if missing else 0
+        self.misses += n_missing_rows
+        self.hits += len(states_df) - n_missing_rows
+        if missing:
+            X = align_process_states(model, states_df.iloc[first_rows[missing]])
+            predictions[missing] = np.asarray(model.predict(X), dtype=np.float64)
+            for i in missing:
+                self._entries[keys[i]] = predictions[i]
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return predictions[inverse.ravel()]
+
+
+def score_process_states(model, current_process_state_df, sla_threshold_seconds=DEFAULT_SLA_SECONDS,
+                         cache=None, model_token=None):
+    """
+    Scores a batch of process states in one vectorized step.
+    Returns a DataFrame (same index as the input) with columns case_id, activity,
+    time_since_start, predicted_remaining_seconds, predicted_total_seconds and sla_breach.
+    No strings are formatted here; see render_alerts.
+    With a PredictionCache, predictions are looked up there first (see PredictionCache).
+    """
+    if cache is not None:
+        predicted_remaining = cache.predict(model, current_process_state_df, model_token)
+    else:
+        predicted_remaining = np.asarray(model.predict(align_process_states(model, current_process_state_df)),
+                                         dtype=np.float64)
+    time_since_start = current_process_state_df['time_since_start'].to_numpy(dtype=np.float64)
+    predicted_total = time_since_start + predicted_remaining
+    return pd.DataFrame({
+        'case_id': current_process_state_df['case_id'].to_numpy(),
+        'activity': activity_names(current_process_state_df).to_numpy(),
+        'time_since_start': time_since_start,
+        'predicted_remaining_seconds': predicted_remaining,
+        'predicted_total_seconds': predicted_total,
+        'sla_breach': predicted_total > sla_threshold_seconds,
+    }, index=current_process_state_df.index)
+
+
+def render_alerts(scores, only_breaches=True):
+    """
+    Formats alert strings for scored states (output of score_process_states).
+    By default only SLA breaches are rendered; only_breaches=False also renders
+    the on-track predictions, as predict_and_alert does.
+    """
+    if only_breaches:
+        scores = scores[scores['sla_breach']]
+
+    alerts = []
+    for case_id, activity, pred_rem_time, total_predicted_time, breach in zip(
+            scores['case_id'], scores['activity'], scores['predicted_remaining_seconds'],
+            scores['predicted_total_seconds'], scores['sla_breach']):
+        if breach:
+            alerts.append(f"ALERT: Case {case_id} ({activity}) is predicted to exceed SLA. "
+                          f"Predicted total time: {timedelta(seconds=total_predicted_time)}. "
+                          f"Remaining: {timedelta(seconds=pred_rem_time)}")
+        else:
+            alerts.append(f"Prediction: Case {case_id} ({activity}) will complete within "
+                          f"approx. {timedelta(seconds=total_predicted_time)}. Remaining: {timedelta(seconds=pred_rem_time)}")
+    return alerts
+
+
+class ProcessPredictor:
+    """
+    Inference entry point for a saved model artifact (see model_artifacts.py).
+    Nothing is read until the first prediction; the model is then loaded memory-mapped.
+    Only pandas, NumPy, joblib and the estimator's own modules are imported, not the
+    training pipeline. refresh() picks up a newer artifact published to the same directory.
+    With `cache_size` > 0, predictions go through a PredictionCache that is cleared whenever
+    a different artifact is loaded.
+    """
+
+    def __init__(self, model_dir, version=None, mmap=True, cache_size=0, time_quantum_seconds=1.0):
+        self.model_dir = model_dir
+        self.pinned_version = version
+        self.mmap = mmap
+        self.cache = PredictionCache(cache_size, time_quantum_seconds) if cache_size else None
+        self._artifact = None
+        self._signature = None
+
+    @property
+    def artifact(self):
+        if self._artifact is None:
+            from model_artifacts import load_model_artifact, artifact_signature
+
+            self._signature = artifact_signature(self.model_dir)
+            self._artifact = load_model_artifact(self.model_dir, self.pinned_version, mmap=self.mmap)
+        return self._artifact
+
+    @property
+    def model(self):
+        return self.artifact.model
+
+    def refresh(self):
+        """
+        Drops the loaded model if LATEST has moved since it was loaded. Returns True if it did.
+        """
+        if self._artifact is None or self.pinned_version is not None:
+            return False
+        from model_artifacts import artifact_signature
+
+        if artifact_signature(self.model_dir) == self._signature:
+            return False
+        self._artifact = None
+        return True
+
+    def score(self, current_process_state_df, sla_threshold_seconds=DEFAULT_SLA_SECONDS):
+        """
+        score_process_states with the artifact's model.
+        """
+        return score_process_states(self.model, current_process_state_df, sla_threshold_seconds,
+                                    cache=self.cache, model_token=self.artifact.artifact_id)
+
+    def alerts(self, current_process_state_df, sla_threshold_seconds=DEFAULT_SLA_SECONDS, only_breaches=True):
+        return render_alerts(self.score(current_process_state_df, sla_threshold_seconds), only_breaches)
@@ -0,0 +1,318 @@
+import asyncio
+import csv
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from case_index import NS_PER_SECOND
+from process_scoring import DEFAULT_SLA_SECONDS, ProcessPredictor, score_process_states, render_alerts
+
+DEFAULT_MAX_BATCH_SIZE = 1024
+DEFAULT_MAX_LATENCY_SECONDS = 0.05
+_EVENT_FIELDS = ('case_id', 'activity', 'timestamp')
+_STOP = object()
+
+
+def parse_event(line, fields=_EVENT_FIELDS):
+    """
+    Parses one event from a line of text: a JSON object with case_id, activity and timestamp,
+    or a CSV row whose columns are `fields`. Returns (case_id, activity, timestamp in ns),
+    or None for blank lines and CSV header rows.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('{'):
+        record = json.loads(line)
+        case_id, activity, timestamp = record['case_id'], record['activity'], record['timestamp']
+    else:
+        row = dict(zip(fields, next(csv.reader([line]))))
+        case_id, activity, timestamp = row['case_id'], row['activity'], row['timestamp']
+        if case_id == 'case_id':
+            return None
+    if isinstance(case_id, str):
+        try:
+            case_id = int(case_id)
+        except ValueError:
+            pass
+    try:
+        timestamp_ns = pd.Timestamp(datetime.fromisoformat(timestamp)).value
+    except (TypeError, ValueError):
+        timestamp_ns = pd.Timestamp(timestamp).value
+    return case_id, activity, timestamp_ns
+
+
+class CaseStateTracker:
+    """
+    Running state of every open case: start time, time of the latest event and event count.
+    Each event updates its case in O(1) and yields the same features feature_engineer_process_data
+    computes for that event (activities_completed, time_since_start, current_activity_duration),
+    assuming the events of a case arrive in timestamp order.
+    """
+
+    def __init__(self):
+        self._cases = {}
+
+    def __len__(self):
+        return len(self._cases)
+
+    def observe(self, case_id, timestamp_ns):
+        """
+        Records an event and returns its (activities_completed, time_since_start, current_activity_duration).
+        """
+        state = self._cases.get(case_id)
+        if state is None:
+            self._cases[case_id] = [timestamp_ns, timestamp_ns, 1]
+            return 1, 0.0, 0.0
+        start, last, count = state
+        state[1] = timestamp_ns
+        state[2] = count + 1
+        return count + 1, (timestamp_ns - start) / NS_PER_SECOND, (timestamp_ns - last) / NS_PER_SECOND
+
+    def close(self, case_id):
+        """
+        Forgets a finished case.
+        """
+        self._cases.pop(case_id, None)
+
+    def evict_idle(self, now_ns, max_idle_seconds):
+        """
+        Forgets cases whose latest event is older than `max_idle_seconds` before `now_ns`.
+        Returns the number of cases removed.
+        """
+        cutoff = now_ns - int(max_idle_seconds * NS_PER_SECOND)
+        idle = [case_id for case_id, (_, last, _) in self._cases.items() if last < cutoff]
+        for case_id in idle:
+            del self._cases[case_id]
+        return len(idle)
+
+
+class StreamingScorer:
+    """
+    Scores live events as they arrive. Events are queued by submit() and scored in
+    micro-batches: a batch is closed when it holds `max_batch_size` events or when its oldest
+    event has waited `max_latency_seconds`, whichever comes first, so throughput comes from
+    vectorized scoring while no event waits longer than the latency budget (plus scoring time).
+
+    `predictor` is a fitted model or a ProcessPredictor; with a ProcessPredictor a newly
+    published artifact is picked up between batches. Each scored batch (the columnar output of
+    score_process_states) is passed to `on_scores`, and an alert string for every SLA breach to
+    `on_alert` (print by default). Cases whose activity is in `end_activities` are forgotten
+    after their last event is scored.
+    """
+
+    def __init__(self, predictor, sla_threshold_seconds=DEFAULT_SLA_SECONDS, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_latency_seconds=DEFAULT_MAX_LATENCY_SECONDS, on_scores=None, on_alert=print,
+                 end_activities=()):
+        self.predictor = predictor
+        self.sla_threshold_seconds = sla_threshold_seconds
+        self.max_batch_size = max_batch_size
+        self.max_latency_seconds = max_latency_seconds
+        self.on_scores = on_scores
+        self.on_alert = on_alert
+        self.end_activities = frozenset(end_activities)
+        self.cases = CaseStateTracker()
+        self.stats = {'events': 0, 'batches': 0, 'alerts': 0, 'max_latency_seconds': 0.0}
+        # Bounded, so fast sources are throttled instead of queueing past the latency budget.
+        self._queue = asyncio.Queue(maxsize=2 * max_batch_size)
+        self._task = None
+
+    def _resolve_model(self):
+        """
+        The model to score the next batch with and its cache token. Blocking: with a
+        ProcessPredictor this checks for a newer artifact and loads it, so run it in an executor.
+        """
+        if isinstance(self.predictor, ProcessPredictor):
+            self.predictor.refresh()
+            artifact = self.predictor.artifact
+            return artifact.model, artifact.artifact_id
+        return self.predictor, None
+
+    async def _put(self, item):
+        """
+        Queues `item`, giving up if run() exits meanwhile (e.g. it failed) instead of waiting for
+        a queue nobody drains. Returns True if the item was queued.
+        """
+        task = self._task
+        if task is None:
+            # run() has not started yet; it will drain the queue when it does.
+            await self._queue.put(item)
+            return True
+        if task.done():
+            return False
+        put = asyncio.ensure_future(self._queue.put(item))
+        await asyncio.wait({put, task}, return_when=asyncio.FIRST_COMPLETED)
+        if put.done():
+            return True
+        put.cancel()
+        return False
+
+    async def submit(self, case_id, activity, timestamp_ns):
+        """
+        Queues an event for scoring. Raises RuntimeError if run() has exited.
+        """
+        if not await self._put((case_id, activity, timestamp_ns, asyncio.get_running_loop().time())):
+            raise RuntimeError("StreamingScorer is not running; its run() task has exited.")
+
+    async def stop(self):
+        """
+        Asks run() to score what is queued and return. Returns at once if run() has already exited.
+        """
+        await self._put(_STOP)
+
+    def _build_batch(self, events, model):
+        case_ids, activities = [], []
+        features = np.empty((len(events), 3), dtype=np.float64)
+        for i, (case_id, activity, timestamp_ns, _) in enumerate(events):
+            features[i] = self.cases.observe(case_id, timestamp_ns)
+            case_ids.append(case_id)
+            activities.append(activity)
+        batch = pd.DataFrame({
+            'case_id': case_ids,
+            'activity': activities,
+            'activities_completed': features[:, 0].astype(np.int64),
+            'time_since_start': features[:, 1],
+            'current_activity_duration': features[:, 2],
+        })
+        if getattr(model, 'feature_schema_', None) is None:
+            # Models trained on pre-encoded columns expect activity_<name> dummies.
+            batch = pd.get_dummies(batch, columns=['activity'], prefix='activity')
+        return batch
+
+    async def _score(self, events):
+        loop = asyncio.get_running_loop()
+        # Resolved once per batch, so a refresh cannot swap the model between encoding and scoring.
+        # Loading an artifact and scoring are blocking; run them off the event loop so sources
+        # keep reading meanwhile.
+        model, model_token = await loop.run_in_executor(None, self._resolve_model)
+        batch = self._build_batch(events, model)
+        cache = self.predictor.cache if isinstance(self.predictor, ProcessPredictor) else None
+        scores = await loop.run_in_executor(None, score_process_states, model, batch, self.sla_threshold_seconds,
+                                            cache, model_token)
+        latency = loop.time() - events[0][3]
+        self.stats['events'] += len(events)
+        self.stats['batches'] += 1
+        self.stats['max_latency_seconds'] = max(self.stats['max_latency_seconds'], latency)
+
+        if self.on_scores is not None:
+            self.on_scores(scores)
+        if self.on_alert is not None:
+            for alert in render_alerts(scores):
+                self.stats['alerts'] += 1
+                self.on_alert(alert)
+        if self.end_activities:
+            for case_id, activity, _, _ in events:
+                if activity in self.end_activities:
+                    self.cases.close(case_id)
+
+    async def run(self):
+        """
+        Consumes the queue until stop() is called. Returns the stats dict.
+        """
+        loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        # Load the model up front so the first batch does not pay for it.
+        await loop.run_in_executor(None, self._resolve_model)
+        stopping = False
+        while not stopping:
+            event = await self._queue.get()
+            if event is _STOP:
+                break
+            events = [event]
+            deadline = event[3] + self.max_latency_seconds
+            while len(events) < self.max_batch_size:
+                try:
+                    event = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        event = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if event is _STOP:
+                    stopping = True
+                    break
+                events.append(event)
+            await self._score(events)
+        return self.stats
+
+
+def _parse_or_skip(line, fields):
+    """
+    parse_event, reporting and skipping (returning None for) malformed lines.
+    """
+    try:
+        return parse_event(line, fields)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Skipping malformed event {line.strip()!r}: {e}")
+        return None
+
+
+async def feed_from_file(scorer, file_path, follow=False, poll_interval=0.5, fields=_EVENT_FIELDS):
+    """
+    Submits the events of a CSV (header case_id,activity,timestamp) or JSON-lines file.
+    With `follow`, keeps waiting for appended lines like `tail -f` until cancelled.
+    Malformed lines are reported and skipped.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            event = _parse_or_skip(line, fields)
+            if event is not None:
+                await scorer.submit(*event)
+
+
+async def serve_socket(scorer, host='127.0.0.1', port=9099, fields=_EVENT_FIELDS):
+    """
+    Accepts TCP connections and submits one event per received line (CSV or JSON),
+    until cancelled. Malformed lines are reported and skipped.
+    """
+    async def handle(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                event = _parse_or_skip(line.decode('utf-8', errors='replace'), fields)
+                if event is not None:
+                    await scorer.submit(*event)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def run_streaming_scorer(model_dir, source, sla_threshold_seconds=DEFAULT_SLA_SECONDS,
+                         max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_latency_seconds=DEFAULT_MAX_LATENCY_SECONDS,
+                         follow=False, end_activities=()):
+    """
+    Scores an event stream with the latest model artifact in `model_dir` and prints SLA alerts.
+    `source` is a file path (CSV or JSON lines) or 'tcp://host:port' to listen on a socket.
+    Returns the scorer's stats once a (non-followed) file is exhausted.
+    """
+    async def main():
+        scorer = StreamingScorer(ProcessPredictor(model_dir), sla_threshold_seconds, max_batch_size,
+                                 max_latency_seconds, end_activities=end_activities)
+        consumer = asyncio.create_task(scorer.run())
+        if source.startswith('tcp://'):
+            host, _, port = source[len('tcp://'):].rpartition(':')
+            producer = serve_socket(scorer, host or '127.0.0.1', int(port))
+        else:
+            producer = feed_from_file(scorer, source, follow=follow)
+        try:
+            await producer
+        finally:
+            await scorer.stop()
+            stats = await consumer
+        return stats
+
+    return asyncio.run(main())
@@ -0,0 +1,190 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Part of every cache key, so changing how polarity is computed never serves stale scores.
+SCORER_VERSION = 'textblob-polarity-1'
+DEFAULT_MEMORY_CACHE_SIZE = 100_000
+DEFAULT_CHUNK_SIZE = 5_000
+# Fewer new texts than this are scored inline: shipping them to worker processes costs more.
+DEFAULT_PARALLEL_MIN_TEXTS = 20_000
+_SQLITE_MAX_PARAMS = 900
+
+
+def textblob_polarity(texts):
+    """
+    TextBlob polarity (-1..1) of each text. Module-level so process pool workers can run it.
+    """
+    from textblob import TextBlob
+
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+def text_key(text, scorer_version=SCORER_VERSION):
+    """
+    Cache key of a text: SHA-1 of the scorer version and the UTF-8 text.
+    """
+    return hashlib.sha1(f'{scorer_version}\0{text}'.encode('utf-8')).hexdigest()
+
+
+class DiskSentimentCache:
+    """
+    Persistent {text key: polarity} store in a SQLite file, looked up and written in batches.
+    Safe to share between processes and runs; only hashes are stored, never the texts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS sentiment (key TEXT PRIMARY KEY, polarity REAL NOT NULL)')
+        self._connection.commit()
+
+    def get_many(self, keys):
+        """
+        {key: polarity} for the keys that are stored.
+        """
+        found = {}
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+            chunk = keys[start:start + _SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self._connection.execute(
+                f'SELECT key, polarity FROM sentiment WHERE key IN ({placeholders})', chunk))
+        return found
+
+    def put_many(self, items):
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO sentiment (key, polarity) VALUES (?, ?)', items)
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM sentiment').fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class SentimentScorer:
+    """
+    Scores text polarity with TextBlob (or another picklable `score_fn(list of texts) -> list`),
+    computing each distinct text at most once:
+    1. the input is deduplicated, so repeated texts in a batch are scored once;
+    2. distinct texts are looked up in an in-memory LRU (`memory_size` entries), then in the
+       on-disk cache at `cache_path` (if given), keyed by text_key;
+    3. the remaining texts are scored in chunks of `chunk_size` and written to both caches.
+       At least `parallel_min_texts` of them are spread across `workers` processes
+       (workers=None uses os.cpu_count()); smaller batches are scored inline.
+    The process pool is started on first use and kept for later calls; close() (or leaving a
+    `with` block) shuts it down and closes the disk cache.
+    `stats` counts memory hits, disk hits and newly scored texts (all per distinct text).
+    """
+
+    def __init__(self, cache_path=None, memory_size=DEFAULT_MEMORY_CACHE_SIZE, workers=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, score_fn=textblob_polarity, scorer_version=SCORER_VERSION,
+                 parallel_min_texts=DEFAULT_PARALLEL_MIN_TEXTS):
+        self.memory_size = memory_size
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.parallel_min_texts = parallel_min_texts
+        self.score_fn = score_fn
+        self.scorer_version = scorer_version
+        self.disk = DiskSentimentCache(cache_path) if cache_path else None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'scored': 0}
+        self._memory = OrderedDict()
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the worker processes, if any were started, and closes the disk cache.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def _remember(self, key, polarity):
+        self._memory[key] = polarity
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _score_new(self, texts):
+        chunks = [texts[start:start + self.chunk_size] for start in range(0, len(texts), self.chunk_size)]
+        if self.workers > 1 and len(chunks) > 1 and len(texts) >= self.parallel_min_texts:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._executor.map(self.score_fn, chunks))
+        else:
+            results = [self.score_fn(chunk) for chunk in chunks]
+        return [polarity for chunk in results for polarity in chunk]
+
+    def score(self, texts):
+        """
+        Polarity of each text, as a float array aligned with `texts` (missing texts score 0).
+        """
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna(''))
+        unique_texts = [str(text) for text in uniques]
+        keys = [text_key(text, self.scorer_version) for text in unique_texts]
+        polarities = np.empty(len(keys), dtype=np.float64)
+
+        missing = []
+        for i, key in enumerate(keys):
+            polarity = self._memory.get(key)
+            if polarity is None:
+                missing.append(i)
+            else:
+                self._memory.move_to_end(key)
+                polarities[i] = polarity
+        self.stats['memory_hits'] += len(keys) - len(missing)
+
+        if missing and self.disk is not None:
+            stored = self.disk.get_many([keys[i] for i in missing])
+            still_missing = []
+            for i in missing:
+                polarity = stored.get(keys[i])
+                if polarity is None:
+                    still_missing.append(i)
+                else:
+                    polarities[i] = polarity
+                    self._remember(keys[i], polarity)
+            self.stats['disk_hits'] += len(missing) - len(still_missing)
+            missing = still_missing
+
+        if missing:
+            scored = self._score_new([unique_texts[i] for i in missing])
+            polarities[missing] = scored
+            for i, polarity in zip(missing, scored):
+                self._remember(keys[i], polarity)
+            if self.disk is not None:
+                self.disk.put_many([(keys[i], polarity) for i, polarity in zip(missing, scored)])
+            self.stats['scored'] += len(missing)
+
+        return polarities[codes]
+
+
+_default_scorer = None
+
+
+def score_sentiment(texts):
+    """
+    Polarity of each text with a process-wide SentimentScorer (in-memory cache only; set
+    the SENTIMENT_CACHE_PATH environment variable to also use a persistent on-disk cache).
+    """
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = SentimentScorer(cache_path=os.environ.get('SENTIMENT_CACHE_PATH'))
+        atexit.register(_default_scorer.close)
+    return _default_scorer.score(texts)
@@ -0,0 +1,179 @@
+"""
+Mergeable, bounded-memory sketches used by the approximate process-mining mode.
+
+KLLSketch (quantiles)
+    Keeps O(k * log(n / k)) samples however many values are added; in practice a few
+    thousand floats for k=200. The rank error of a quantile query is about 1.65% of n
+    at k=200 (99% confidence) and shrinks roughly as 1/k, so k=400 gives ~0.8%.
+    min, max, count and sum are tracked exactly, so q=0, q=1 and the mean are exact.
+
+HyperLogLog (distinct counts)
+    Uses 2**p one-byte registers (16 KiB at the default p=14). The relative standard error
+    of the estimate is 1.04 / sqrt(2**p), i.e. ~0.81% at p=14 and ~1.6% at p=12;
+    small cardinalities are corrected with linear counting and are near exact.
+
+Both sketches merge losslessly with sketches of the same parameters, so shards and time
+windows can be summarized independently and combined afterwards.
+"""
+import numpy as np
+import pandas as pd
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch over float values. Items live in levels; an item at level h stands
+    for 2**h original values. When the sketch outgrows its capacity, the lowest overfull level
+    is sorted and every other item (random offset) is promoted to the next level.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _size(self):
+        return sum(len(items) for items in self._levels)
+
+    def _compress(self):
+        while self._size() > sum(self._capacity(level) for level in range(len(self._levels))):
+            level = next(level for level, items in enumerate(self._levels) if len(items) > self._capacity(level))
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(self._levels[level])
+            leftover = items[-1:] if len(items) % 2 else items[:0]
+            promoted = items[int(self._rng.integers(2)):len(items) - len(leftover):2]
+            self._levels[level] = leftover
+            self._levels[level + 1] = np.concatenate((self._levels[level + 1], promoted))
+
+    def update(self, values):
+        """
+        Adds an array (or scalar) of values.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+
+    def merge(self, other):
+        """
+        Folds another KLLSketch into this one (in place) and returns self.
+        """
+        self.k = min(self.k, other.k)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate((self._levels[level], items))
+        self._compress()
+        return self
+
+    @property
+    def is_exact(self):
+        """
+        True while nothing has been compacted, i.e. the sketch still holds every value added.
+        """
+        return len(self._levels) == 1
+
+    def values(self):
+        """
+        All values added so far, sorted; only available while is_exact.
+        """
+        if not self.is_exact:
+            raise ValueError("KLLSketch has compacted its values; only approximate quantiles are available.")
+        return np.sort(self._levels[0])
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def quantile(self, q):
+        """
+        Approximate q-quantile (0 <= q <= 1) of all values added so far; NaN when empty.
+        """
+        if not self.count:
+            return np.nan
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(items[order][min(position, len(items) - 1)])
+
+
+def _bit_length(values):
+    """
+    Vectorized int.bit_length for uint64 arrays.
+    """
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = values >= (np.uint64(1) << np.uint64(shift))
+        lengths += wide * shift
+        values = np.where(wide, values >> np.uint64(shift), values)
+    return lengths + (values > 0)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter over arbitrary hashable values (hashed with pandas' stable
+    64-bit hash, so equal values hash equally across processes and runs).
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Adds an array-like of values.
+        """
+        values = np.asarray(values)
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(values)
+        suffix_bits = 64 - self.p
+        buckets = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        ranks = (suffix_bits - _bit_length(suffix) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def merge(self, other):
+        """
+        Folds another HyperLogLog with the same precision into this one (in place) and returns self.
+        """
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog sketches with different precision ({self.p} vs {other.p}).")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """
+        Estimated number of distinct values added so far.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return m * np.log(m / empty)
+        return float(raw)
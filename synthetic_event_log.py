@@ -0,0 +1,164 @@
+import math
+import numpy as np
+import pandas as pd
+from event_log_loader import detect_file_format, DEFAULT_TIMESTAMP_FORMAT
+
+VARIANT_DISTRIBUTIONS = ('zipf', 'uniform')
+WAIT_DISTRIBUTIONS = ('exponential', 'lognormal', 'uniform', 'constant')
+DEFAULT_CASES_PER_CHUNK = 500_000
+
+
+class EventLogModel:
+    """
+    The process a synthetic log is drawn from: `n_variants` activity sequences over an alphabet
+    of `n_activities` activities (lengths 3 to n_activities + 2), their popularity, and a mean
+    wait per activity (`mean_wait_seconds` scaled by a random factor between 0.2 and 3).
+    - variant_distribution: 'zipf' (weight 1 / rank**zipf_exponent), 'uniform', or a sequence
+      of n_variants weights
+    - wait_distribution: 'exponential', 'lognormal' (with `wait_sigma`), 'uniform' (0 to twice
+      the mean) or 'constant'
+    Everything is derived from `seed`, so equal arguments always describe the same process.
+    """
+
+    def __init__(self, n_activities=8, n_variants=20, variant_distribution='zipf', zipf_exponent=1.0,
+                 wait_distribution='exponential', mean_wait_seconds=3600, wait_sigma=1.0, seed=0):
+        if wait_distribution not in WAIT_DISTRIBUTIONS:
+            raise ValueError(f"Unknown wait distribution '{wait_distribution}'. Expected one of {WAIT_DISTRIBUTIONS}.")
+        if isinstance(variant_distribution, str):
+            if variant_distribution not in VARIANT_DISTRIBUTIONS:
+                raise ValueError(f"Unknown variant distribution '{variant_distribution}'. "
+                                 f"Expected one of {VARIANT_DISTRIBUTIONS} or a list of weights.")
+            weights = 1.0 / np.arange(1, n_variants + 1) ** zipf_exponent if variant_distribution == 'zipf' \
+                else np.ones(n_variants)
+        else:
+            weights = np.asarray(variant_distribution, dtype=np.float64)
+            if len(weights) != n_variants:
+                raise ValueError(f"Expected {n_variants} variant weights, got {len(weights)}.")
+
+        self.seed = seed
+        self.activities = [f'Activity {i + 1}' for i in range(n_activities)]
+        self.variant_weights = weights / weights.sum()
+        self.wait_distribution = wait_distribution
+        self.wait_sigma = wait_sigma
+
+        rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+        self.variant_lengths = rng.integers(3, n_activities + 3, size=n_variants)
+        self.variant_codes = rng.integers(0, n_activities, size=(n_variants, self.variant_lengths.max()))
+        self.activity_mean_wait = mean_wait_seconds * rng.uniform(0.2, 3.0, size=n_activities)
+
+    @property
+    def expected_case_length(self):
+        return float(np.dot(self.variant_weights, self.variant_lengths))
+
+    def cases_for_events(self, n_events):
+        """
+        Number of cases that gives about `n_events` events on average.
+        """
+        return max(1, math.ceil(n_events / self.expected_case_length))
+
+    def sample_waits(self, rng, codes):
+        means = self.activity_mean_wait[codes]
+        if self.wait_distribution == 'exponential':
+            waits = rng.exponential(means)
+        elif self.wait_distribution == 'lognormal':
+            waits = rng.lognormal(np.log(means) - self.wait_sigma ** 2 / 2, self.wait_sigma)
+        elif self.wait_distribution == 'uniform':
+            waits = rng.uniform(0, 2 * means)
+        else:
+            waits = means
+        return waits.astype(np.int64)
+
+
+def _generate_cases(model, rng, first_case, n_cases, start_seconds, span_seconds, start):
+    case_variant = rng.choice(len(model.variant_weights), size=n_cases, p=model.variant_weights)
+    case_lengths = model.variant_lengths[case_variant]
+    case_offsets = np.concatenate(([0], np.cumsum(case_lengths)))
+    event_case = np.repeat(np.arange(n_cases), case_lengths)
+    event_position = np.arange(case_offsets[-1]) - case_offsets[event_case]
+    codes = model.variant_codes[case_variant[event_case], event_position]
+
+    # The wait recorded on an event is the time since the previous event of its case.
+    waits = model.sample_waits(rng, codes)
+    waits = np.concatenate(([0], waits[:-1]))
+    waits[case_offsets[:-1]] = 0
+    elapsed = np.cumsum(waits)
+    elapsed -= np.repeat(elapsed[case_offsets[:-1]], case_lengths)
+
+    case_start = start_seconds + np.sort(rng.integers(0, max(1, span_seconds), size=n_cases))
+    seconds = case_start[event_case] + elapsed
+
+    return pd.DataFrame({
+        'case_id': first_case + event_case,
+        'activity': pd.Categorical.from_codes(codes, categories=model.activities),
+        # Nanosecond resolution, like the timestamps of load_event_log.
+        'timestamp': np.datetime64(pd.Timestamp(start).value, 'ns') + seconds.astype('timedelta64[s]'),
+    })
+
+
+def iter_event_log_chunks(n_cases, cases_per_chunk=DEFAULT_CASES_PER_CHUNK, seed=0, start='2023-01-01',
+                          cases_per_day=50, model=None, **model_options):
+    """
+    Yields a synthetic log in chunks of `cases_per_chunk` whole cases (case_ids 1..n_cases, each
+    chunk sorted by case_id and timestamp), so logs of any size can be written with bounded
+    memory. Case starts are spread uniformly over n_cases / cases_per_day days, chunk by chunk.
+    `model` (an EventLogModel) or `model_options` describe the process; see EventLogModel.
+    """
+    model = model or EventLogModel(seed=seed, **model_options)
+    n_chunks = max(1, math.ceil(n_cases / cases_per_chunk))
+    chunk_seeds = np.random.SeedSequence(seed).spawn(n_chunks + 1)[1:]
+    seconds_per_case = 86400 / cases_per_day
+    for chunk, chunk_seed in enumerate(chunk_seeds):
+        first = chunk * cases_per_chunk
+        size = min(cases_per_chunk, n_cases - first)
+        if size <= 0:
+            break
+        yield _generate_cases(model, np.random.default_rng(chunk_seed), first + 1, size,
+                              int(first * seconds_per_case), int(size * seconds_per_case), start)
+
+
+def generate_event_log(n_cases, n_activities=8, n_variants=20, seed=0, start='2023-01-01',
+                       mean_wait_seconds=3600, cases_per_day=50, **model_options):
+    """
+    Seeded synthetic event log with columns case_id, activity and timestamp (whole seconds),
+    sorted by case_id and timestamp like load_event_log's output. The same arguments always give
+    the same log. Further options (variant_distribution, zipf_exponent, wait_distribution,
+    wait_sigma) are described in EventLogModel.
+    """
+    chunks = iter_event_log_chunks(n_cases, cases_per_chunk=max(n_cases, 1), seed=seed, start=start,
+                                   cases_per_day=cases_per_day, n_activities=n_activities, n_variants=n_variants,
+                                   mean_wait_seconds=mean_wait_seconds, **model_options)
+    return next(chunks)
+
+
+def write_event_log(file_path, n_cases, file_format=None, cases_per_chunk=DEFAULT_CASES_PER_CHUNK, **options):
+    """
+    Writes a synthetic log of `n_cases` cases to CSV (timestamps in DEFAULT_TIMESTAMP_FORMAT) or
+    Parquet, chunk by chunk, so 100M-event logs never need to fit in memory. The format follows
+    the file extension unless `file_format` is given. Options are those of iter_event_log_chunks.
+    Returns the number of events written.
+    """
+    file_format = file_format or detect_file_format(file_path)
+    if file_format not in ('csv', 'parquet'):
+        raise ValueError(f"Unsupported output format '{file_format}'. Expected 'csv' or 'parquet'.")
+
+    n_events = 0
+    writer = None
+    try:
+        for chunk_number, chunk in enumerate(iter_event_log_chunks(n_cases, cases_per_chunk, **options)):
+            if file_format == 'csv':
+                chunk.to_csv(file_path, mode='w' if chunk_number == 0 else 'a', header=chunk_number == 0,
+                             index=False, date_format=DEFAULT_TIMESTAMP_FORMAT)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                # Plain strings keep the schema identical across chunks (no per-chunk dictionaries).
+                table = pa.Table.from_pandas(chunk.astype({'activity': str}), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(file_path, table.schema)
+                writer.write_table(table)
+            n_events += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_events
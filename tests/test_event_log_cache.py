@@ -0,0 +1,80 @@
+import os
+import warnings
+import pandas as pd
+import pytest
+import event_log_cache
+from event_log_cache import CachedEventLog, load_cached_event_log, open_event_log_cache
+from event_log_loader import read_event_log
+from process_mining_engine import calculate_kpis, discover_process_flow
+
+CSV_LOG = """case_id,activity,timestamp
+{a},A,2024-01-01 00:00:00
+{a},B,2024-01-01 01:00:00
+{b},A,2024-01-02 00:00:00
+{b},C,2024-01-02 03:00:00
+{c},A,2024-01-03 00:00:00
+{c},B,2024-01-03 02:00:00
+"""
+
+
+def _write_log(tmp_path, a=1, b=2, c=3):
+    path = tmp_path / 'events.csv'
+    path.write_text(CSV_LOG.format(a=a, b=b, c=c))
+    return str(path)
+
+
+def _fail_read(*args, **kwargs):
+    raise AssertionError("the log was re-read instead of served from the cache")
+
+
+def test_unchanged_file_is_served_from_the_cache(tmp_path, monkeypatch):
+    path, cache_dir = _write_log(tmp_path), str(tmp_path / 'cache')
+    first = load_cached_event_log(path, cache_dir)
+    monkeypatch.setattr(event_log_cache, 'read_event_log', _fail_read)
+    second = load_cached_event_log(path, cache_dir)
+    assert second.entry_dir == first.entry_dir
+    assert list(second.case_ids) == [1, 2, 3]
+
+
+def test_changed_mtime_invalidates_the_cache(tmp_path):
+    path, cache_dir = _write_log(tmp_path), str(tmp_path / 'cache')
+    load_cached_event_log(path, cache_dir)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert open_event_log_cache(path, cache_dir) is None
+    assert load_cached_event_log(path, cache_dir) is not None
+    assert len(os.listdir(cache_dir)) == 1 # the stale entry is pruned
+
+
+def test_changed_size_invalidates_the_cache(tmp_path):
+    path, cache_dir = _write_log(tmp_path), str(tmp_path / 'cache')
+    load_cached_event_log(path, cache_dir)
+    with open(path, 'a') as f:
+        f.write('4,A,2024-01-04 00:00:00\n')
+    assert open_event_log_cache(path, cache_dir) is None
+    assert list(load_cached_event_log(path, cache_dir).case_ids) == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('case_ids', [(1, 2, 3), ('x', 'y', 'z'), ('1', '', '3')],
+                         ids=['int', 'str', 'missing'])
+def test_cached_log_round_trips_like_the_loader(tmp_path, case_ids):
+    path = _write_log(tmp_path, *case_ids)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore') # the missing case_id is dropped with a warning
+        expected = read_event_log(path)
+        cached = load_cached_event_log(path, str(tmp_path / 'cache'))
+    frame = cached.to_frame()
+    pd.testing.assert_series_equal(frame['case_id'].astype(object), expected['case_id'].astype(object),
+                                   check_index=False)
+    assert discover_process_flow(frame) == discover_process_flow(expected)
+    assert calculate_kpis(frame) == calculate_kpis(expected)
+
+
+def test_missing_case_ids_are_rejected_when_building_directly():
+    event_log = pd.DataFrame({
+        'case_id': [1, None, 2],
+        'activity': ['A', 'A', 'B'],
+        'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+    })
+    with pytest.raises(ValueError):
+        CachedEventLog.from_event_log(event_log)
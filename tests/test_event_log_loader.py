@@ -0,0 +1,37 @@
+import warnings
+import pytest
+from event_log_loader import read_event_log
+from process_mining_engine import discover_process_flow
+
+CSV_LOG = """case_id,activity,timestamp
+1,A,2024-01-01 00:00:00
+2,A,2024-01-01 00:10:00
+1,B,2024-01-01 01:00:00
+3,C,2024-01-01 00:00:00
+1,C,2024-01-01 02:00:00
+10,C,2024-01-01 03:00:00
+"""
+
+
+@pytest.fixture
+def csv_log(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text(CSV_LOG)
+    return str(path)
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 1000])
+def test_results_do_not_depend_on_chunk_size(csv_log, chunksize):
+    event_log = read_event_log(csv_log, chunksize=chunksize)
+    assert list(event_log['case_id'].cat.categories) == [1, 2, 3, 10]
+    assert discover_process_flow(event_log) == {('A', 'B', 'C'): 1, ('A',): 1, ('C',): 2}
+
+
+def test_unparseable_timestamps_are_dropped_with_a_warning(csv_log):
+    with open(csv_log, 'a') as f:
+        f.write('3,D,not a time\n')
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        event_log = read_event_log(csv_log)
+    assert len(event_log) == 6
+    assert any('Dropped 1 events' in str(warning.message) for warning in caught)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from predictive_analytics_process import feature_engineer_process_data
+from synthetic_event_log import generate_event_log
+
+
+def feature_engineer_process_data_reference(event_log):
+    """
+    Engineers features from event log data for predictive modeling.
+    Calculates features like:
+    - total_activities_in_case
+    - time_since_start
+    - current_activity_duration (simplified as time between current and previous, or 0 for first)
+    - one-hot encoding for activity
+    - target: remaining_cycle_time
+    Original per-event loop, kept as the reference that the vectorized
+    feature_engineer_process_data is checked against.
+    """
+    features = []
+    for case_id, group in event_log.groupby('case_id', observed=True):
+        group = group.sort_values(by='timestamp').reset_index(drop=True)
+        start_time = group['timestamp'].min()
+        end_time = group['timestamp'].max()
+        full_cycle_time = (end_time - start_time).total_seconds() if pd.notna(start_time) and pd.notna(end_time) else 0
+
+        for i in range(len(group)):
+            current_time = group.loc[i, 'timestamp']
+            activity = group.loc[i, 'activity']
+            
+            # Features for the current state
+            time_since_start = (current_time - start_time).total_seconds()
+            activities_completed = i + 1
+            
+            # Simplified activity duration
+            current_activity_duration = 0
+            if i > 0:
+                current_activity_duration = (current_time - group.loc[i-1, 'timestamp']).total_seconds()
+
+            # Target: Remaining cycle time
+            remaining_cycle_time = full_cycle_time - time_since_start
+            if remaining_cycle_time < 0: remaining_cycle_time = 0 # Handle cases where current_time > end_time due to max calculation
+
+            features.append({
+                'case_id': case_id,
+                'activity': activity,
+                'timestamp': current_time,
+                'activities_completed': activities_completed,
+                'time_since_start': time_since_start,
+                'current_activity_duration': current_activity_duration,
+                'remaining_cycle_time': remaining_cycle_time,
+                'full_cycle_time': full_cycle_time
+            })
+    
+    features_df = pd.DataFrame(features)
+    
+    # One-hot encode the 'activity' column
+    features_df = pd.get_dummies(features_df, columns=['activity'], prefix='activity')
+    
+    return features_df
+
+
+SAMPLE_LOG = pd.DataFrame({
+    'case_id': [1, 1, 1, 1, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4],
+    'activity': [
+        'Start Order', 'Process Payment', 'Pick Items', 'Ship Order',
+        'Start Order', 'Pick Items', 'Ship Order',
+        'Start Order', 'Process Payment', 'Pick Items', 'Deliver',
+        'Start Order', 'Pick Items', 'Deliver'
+    ],
+    'timestamp': pd.to_datetime([
+        '2023-01-01 08:00:00', '2023-01-01 08:15:00', '2023-01-01 08:45:00', '2023-01-01 09:30:00',
+        '2023-01-02 10:00:00', '2023-01-02 10:40:00', '2023-01-02 11:10:00',
+        '2023-01-03 13:00:00', '2023-01-03 13:20:00', '2023-01-03 14:00:00', '2023-01-03 15:00:00',
+        '2023-01-04 09:00:00', '2023-01-04 09:40:00', '2023-01-04 10:30:00'
+    ]).astype('datetime64[ns]'), # like load_event_log
+})
+
+
+def _with_case_ids(event_log, case_ids):
+    mapping = dict(zip(sorted(event_log['case_id'].unique()), case_ids))
+    return event_log.assign(case_id=event_log['case_id'].map(mapping))
+
+
+@pytest.mark.parametrize('case_ids', [
+    [1, 2, 3, 4],
+    ['a', 'b', 'c', 'd'],
+    ['case-10', 'case-2', 'case-100', 'x'],
+], ids=['int', 'str', 'mixed-length'])
+def test_matches_reference_on_sample_log(case_ids):
+    event_log = _with_case_ids(SAMPLE_LOG, case_ids)
+    pd.testing.assert_frame_equal(feature_engineer_process_data(event_log),
+                                  feature_engineer_process_data_reference(event_log))
+
+
+def test_matches_reference_on_synthetic_log():
+    event_log = generate_event_log(300, seed=7)
+    pd.testing.assert_frame_equal(feature_engineer_process_data(event_log),
+                                  feature_engineer_process_data_reference(event_log))
+
+
+def test_remaining_cycle_time_ends_at_zero():
+    features = feature_engineer_process_data(generate_event_log(50, seed=3), encode_activities=False)
+    last_events = features.groupby('case_id').tail(1)
+    assert (last_events['remaining_cycle_time'] == 0).all()
+    assert np.allclose(features['time_since_start'] + features['remaining_cycle_time'], features['full_cycle_time'])
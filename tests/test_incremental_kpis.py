@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from incremental_kpis import IncrementalKPIs
+from process_mining_engine import calculate_kpis
+from synthetic_event_log import generate_event_log
+
+
+@pytest.fixture(scope='module')
+def event_log():
+    return generate_event_log(300, seed=3)
+
+
+@pytest.mark.parametrize('order', ['time', 'shuffled'])
+@pytest.mark.parametrize('n_chunks', [1, 7, 50])
+def test_chunked_updates_match_calculate_kpis(event_log, order, n_chunks):
+    if order == 'time':
+        events = event_log.sort_values('timestamp', kind='stable')
+    else:
+        events = event_log.sample(frac=1.0, random_state=0)
+    incremental = IncrementalKPIs()
+    for chunk in np.array_split(np.arange(len(events)), n_chunks):
+        incremental.update(events.iloc[chunk])
+    assert incremental.kpis() == calculate_kpis(event_log)
+
+
+def test_min_cycle_time_follows_growing_cases():
+    # Both cases tie on the minimum first; case 'a' then grows, so 'b' alone holds it.
+    batches = [
+        pd.DataFrame({'case_id': ['a', 'a', 'b', 'b'],
+                      'timestamp': pd.to_datetime(['2024-01-01 00:00', '2024-01-01 01:00',
+                                                   '2024-01-01 00:00', '2024-01-01 01:00'])}),
+        pd.DataFrame({'case_id': ['a'], 'timestamp': pd.to_datetime(['2024-01-01 05:00'])}),
+    ]
+    incremental = IncrementalKPIs()
+    for batch in batches:
+        incremental.update(batch)
+    assert incremental.kpis() == calculate_kpis(pd.concat(batches).assign(activity='x').sort_values(
+        ['case_id', 'timestamp'], kind='stable'))
+
+
+def test_empty_state_reports_no_cycle_times():
+    kpis = IncrementalKPIs().kpis()
+    assert kpis['average_cycle_time'] == kpis['min_cycle_time'] == kpis['max_cycle_time'] == 'N/A'
+    assert kpis['throughput_cases_per_day'] == 0
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import pandas as pd
+import pytest
+from event_log_cache import CachedEventLog, load_cached_event_log
+from process_mining_engine import run_process_mining, summarize_process
+from process_mining_parallel import summarize_process_parallel
+from synthetic_event_log import generate_event_log, write_event_log
+
+N_CASES = 2000
+
+
+@pytest.fixture(scope='module')
+def event_log():
+    # Busy edges see far more than DEFAULT_QUANTILE_K transitions, so sketched quantiles would differ.
+    return CachedEventLog.from_event_log(generate_event_log(N_CASES, seed=0))
+
+
+@pytest.fixture(scope='module')
+def log_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('logs') / 'events.csv')
+    write_event_log(path, N_CASES, seed=0)
+    return path
+
+
+def _report(*args, **kwargs):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_process_mining(*args, **kwargs)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('workers', [2, 3, 4])
+def test_parallel_summary_equals_serial(event_log, workers):
+    assert summarize_process_parallel(event_log, workers=workers) == summarize_process(event_log)
+
+
+@pytest.mark.parametrize('workers', [2, 4])
+def test_parallel_report_equals_serial(log_path, workers):
+    serial = _report(log_path)
+    assert 'Discovered Process Flows' in serial
+    assert _report(log_path, workers=workers) == serial
+
+
+def test_workers_on_a_cached_log_equal_serial(log_path, tmp_path):
+    cached = load_cached_event_log(log_path, str(tmp_path / 'cache'))
+    assert cached.entry_dir is not None # workers memory-map the entry themselves
+    assert summarize_process_parallel(cached, workers=2) == summarize_process(cached)
+
+
+@pytest.mark.parametrize('approximate', [False, True])
+def test_empty_log(approximate):
+    empty = pd.DataFrame({
+        'case_id': pd.Series([], dtype='int64'),
+        'activity': pd.Series([], dtype=object),
+        'timestamp': pd.Series([], dtype='datetime64[ns]'),
+    })
+    summary = summarize_process_parallel(empty, workers=2, approximate=approximate)
+    assert summary['n_variants'] == 0
+    assert summary['kpis']['average_cycle_time'] == 'N/A'
+    assert summary['transitions'] == []
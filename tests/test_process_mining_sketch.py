@@ -0,0 +1,30 @@
+import pytest
+from event_log_cache import CachedEventLog
+from instrumentation import NULL_RECORDER
+from process_mining_engine import _summarize_process_sketched, summarize_process
+from synthetic_event_log import generate_event_log
+
+
+@pytest.fixture(scope='module')
+def event_log():
+    return CachedEventLog.from_event_log(generate_event_log(3000, seed=1))
+
+
+@pytest.fixture(scope='module')
+def exact(event_log):
+    return summarize_process(event_log)
+
+
+def _counts_and_means(transitions):
+    return [(edge, stats['count'], stats['mean_wait'], stats['max_wait']) for edge, stats in transitions]
+
+
+@pytest.mark.parametrize('cases_per_block', [100, 1000, 100_000])
+def test_exact_parts_of_the_approximate_summary(event_log, exact, cases_per_block):
+    approximate = _summarize_process_sketched(event_log, 10, NULL_RECORDER, cases_per_block)
+    assert approximate['top_variants'] == exact['top_variants']
+    assert approximate['n_variants'] == exact['n_variants']
+    for kpi in ('average_cycle_time', 'min_cycle_time', 'max_cycle_time', 'throughput_cases_per_day'):
+        assert approximate['kpis'][kpi] == exact['kpis'][kpi]
+    assert [activity for activity, _ in approximate['bottlenecks']] == [activity for activity, _ in exact['bottlenecks']]
+    assert _counts_and_means(approximate['transitions']) == _counts_and_means(exact['transitions'])
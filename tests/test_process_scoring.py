@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from model_artifacts import save_model_artifact
+from predictive_analytics_process import feature_engineer_process_data, train_predictive_model
+from process_scoring import PredictionCache, ProcessPredictor, score_process_states
+from synthetic_event_log import generate_event_log
+
+
+@pytest.fixture(scope='module')
+def features():
+    return feature_engineer_process_data(generate_event_log(200, seed=7), encode_activities=False)
+
+
+def _train(features, backend='random_forest'):
+    model, _, _ = train_predictive_model(features, backend=backend)
+    return model
+
+
+@pytest.fixture(scope='module')
+def model(features):
+    return _train(features)
+
+
+def test_cached_scores_equal_uncached_scores(model, features):
+    # The synthetic log has whole-second timestamps, so the default 1-second quantum is exact.
+    cache = PredictionCache()
+    expected = score_process_states(model, features)
+    # Twice: the first pass fills the cache, the second is served from it.
+    for _ in range(2):
+        pd.testing.assert_frame_equal(score_process_states(model, features, cache=cache), expected)
+    assert cache.hits >= len(features)
+
+
+def test_cache_follows_the_model_object(model, features):
+    cache = PredictionCache()
+    cache.predict(model, features)
+    other = _train(features, backend='linear')
+    np.testing.assert_array_equal(cache.predict(other, features), other.predict(other.feature_schema_.transform(features)))
+    assert cache.invalidations == 1
+
+
+def test_new_artifact_invalidates_the_predictor_cache(model, features, tmp_path):
+    model_dir = str(tmp_path / 'models')
+    save_model_artifact(model, model_dir)
+    predictor = ProcessPredictor(model_dir, cache_size=10_000)
+    np.testing.assert_array_equal(predictor.score(features)['predicted_remaining_seconds'],
+                                  score_process_states(model, features)['predicted_remaining_seconds'])
+
+    newer = _train(features, backend='linear')
+    save_model_artifact(newer, model_dir)
+    assert predictor.refresh()
+    scores = predictor.score(features)
+    assert predictor.cache.invalidations == 1
+    np.testing.assert_array_equal(scores['predicted_remaining_seconds'],
+                                  score_process_states(newer, features)['predicted_remaining_seconds'])
@@ -0,0 +1,109 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from predictive_analytics_process import feature_engineer_process_data, train_predictive_model
+from process_scoring import score_process_states
+from process_streaming import StreamingScorer, feed_from_file, parse_event
+from synthetic_event_log import generate_event_log
+
+SLA_SECONDS = 8 * 3600
+
+
+@pytest.fixture(scope='module')
+def event_log():
+    return generate_event_log(50, seed=5)
+
+
+@pytest.fixture(scope='module', params=['schema', 'dummies'])
+def model(request, event_log):
+    # Models trained on a FeatureSchema and on pre-encoded activity_* columns take different paths.
+    features = feature_engineer_process_data(event_log, encode_activities=request.param == 'dummies')
+    model, _, _ = train_predictive_model(features, backend='linear')
+    return model
+
+
+def _replay(model, events, **options):
+    batches = []
+
+    async def main():
+        scorer = StreamingScorer(model, SLA_SECONDS, on_scores=batches.append, on_alert=None, **options)
+        consumer = asyncio.create_task(scorer.run())
+        for case_id, activity, timestamp in events:
+            await scorer.submit(case_id, activity, timestamp)
+        await scorer.stop()
+        return await consumer
+
+    stats = asyncio.run(main())
+    return pd.concat(batches, ignore_index=True), stats
+
+
+def _expected(model, event_log):
+    encode_activities = getattr(model, 'feature_schema_', None) is None
+    features = feature_engineer_process_data(event_log, encode_activities=encode_activities)
+    return score_process_states(model, features, SLA_SECONDS).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('max_batch_size', [1, 16, 1024])
+def test_replay_equals_batch_scoring(model, event_log, max_batch_size):
+    # Events arrive in global time order; within a case that is the log order.
+    replay = event_log.sort_values('timestamp', kind='stable')
+    events = zip(replay['case_id'].tolist(), replay['activity'].astype(str).tolist(),
+                 replay['timestamp'].to_numpy().view(np.int64).tolist())
+    scores, stats = _replay(model, events, max_batch_size=max_batch_size)
+    assert stats['events'] == len(event_log)
+
+    # Back to log order: a stable sort by case keeps each case's events in arrival order.
+    scores = scores.sort_values('case_id', kind='stable').reset_index(drop=True)
+    expected = _expected(model, event_log)
+    pd.testing.assert_series_equal(scores['case_id'], expected['case_id'], check_dtype=False)
+    assert scores['activity'].astype(str).tolist() == expected['activity'].astype(str).tolist()
+    for column in ('time_since_start', 'predicted_remaining_seconds', 'predicted_total_seconds'):
+        np.testing.assert_allclose(scores[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9)
+    assert scores['sla_breach'].tolist() == expected['sla_breach'].tolist()
+
+
+def test_file_replay_skips_malformed_lines(model, tmp_path, capsys):
+    path = tmp_path / 'events.csv'
+    path.write_text('case_id,activity,timestamp\n'
+                    '1,Activity 1,2023-01-01 00:00:00\n'
+                    '{not json\n'
+                    '1,Activity 2,not a time\n'
+                    '1,Activity 2,2023-01-01 01:00:00\n')
+    batches = []
+
+    async def main():
+        scorer = StreamingScorer(model, SLA_SECONDS, on_scores=batches.append, on_alert=None)
+        consumer = asyncio.create_task(scorer.run())
+        await feed_from_file(scorer, str(path))
+        await scorer.stop()
+        return await consumer
+
+    assert asyncio.run(main())['events'] == 2
+    assert capsys.readouterr().out.count('Skipping malformed event') == 2
+
+
+def test_stop_returns_when_the_consumer_has_died():
+    class BrokenModel:
+        def predict(self, X):
+            raise RuntimeError('broken')
+
+    async def main():
+        scorer = StreamingScorer(BrokenModel(), max_batch_size=1, on_alert=None)
+        consumer = asyncio.create_task(scorer.run())
+        with pytest.raises(RuntimeError):
+            for case_id in range(100):
+                await asyncio.wait_for(scorer.submit(case_id, 'A', case_id), timeout=5)
+        await asyncio.wait_for(scorer.stop(), timeout=5)
+        assert consumer.done()
+        with pytest.raises(Exception):
+            consumer.result()
+
+    asyncio.run(main())
+
+
+def test_parse_event_reads_csv_and_json():
+    assert parse_event('case_id,activity,timestamp') is None
+    assert parse_event('7,A,2023-01-01 00:00:01') == (7, 'A', 1672531201 * 10**9)
+    assert parse_event('{"case_id": "x", "activity": "A", "timestamp": "2023-01-01T00:00:01"}') == \
+        ('x', 'A', 1672531201 * 10**9)
@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+from case_index import as_case_index
+from sketches import KLLSketch
+
+WAIT_QUANTILES = {'median_wait': 0.5, 'p95_wait': 0.95}
+# Size of the per-edge wait sketches of approximate transition_aggregates; edges with at most
+# this many transitions keep every wait, so their quantiles stay exact after merging.
+DEFAULT_QUANTILE_K = 200
+
+
+def _segment_sums(values, starts):
+    """
+    Sums of int64 `values` over the contiguous segments beginning at `starts`, as float64.
+    Each value is split into 32-bit halves so the int64 accumulators cannot overflow.
+    """
+    high, low = np.divmod(values, 1 << 32)
+    high_sums = np.add.reduceat(high, starts) if len(values) else np.zeros(0, dtype=np.int64)
+    low_sums = np.add.reduceat(low, starts) if len(values) else np.zeros(0, dtype=np.int64)
+    return high_sums.astype(np.float64) * float(1 << 32) + low_sums.astype(np.float64)
+
+
+def _segment_quantiles(sorted_values, starts, counts, q):
+    """
+    Linear-interpolated quantile (numpy's default method) of each sorted segment.
+    """
+    position = (counts - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, counts - 1)
+    fraction = position - lower
+    low_values = sorted_values[starts + lower].astype(np.float64)
+    high_values = sorted_values[starts + upper].astype(np.float64)
+    return low_values + (high_values - low_values) * fraction
+
+
+def _edge_segments(edge_keys):
+    """
+    Start offset and length of each run of equal keys in sorted `edge_keys`.
+    """
+    if not len(edge_keys):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(edge_keys)) + 1)).astype(np.int64)
+    return starts, np.diff(np.append(starts, len(edge_keys)))
+
+
+def _sort_by_edge_and_wait(edge_keys, waits):
+    """
+    Sorts transitions by (edge, wait). When both fit in 63 bits they are packed into one
+    int64 and sorted with a plain np.sort, which is several times faster than a lexsort.
+    """
+    if not len(waits):
+        return edge_keys, waits
+    wait_bits = max(int(waits.max()).bit_length(), 1)
+    edge_bits = max(int(edge_keys.max()).bit_length(), 1)
+    if waits.min() >= 0 and wait_bits + edge_bits <= 63:
+        packed = np.sort((edge_keys << wait_bits) | waits)
+        return packed >> wait_bits, packed & ((1 << wait_bits) - 1)
+    order = np.lexsort((waits, edge_keys))
+    return edge_keys[order], waits[order]
+
+
+def directly_follows_pairs(event_log):
+    """
+    Returns the raw transitions of a log as three aligned arrays:
+    source activity codes, target activity codes and the wait (int64 ns) between them.
+    Built from arrays shifted by one event, keeping only pairs inside the same case.
+    """
+    index = as_case_index(event_log)
+    codes = np.asarray(index.activity_codes)
+    within_case = index.has_successor()[:-1] if index.n_events else np.zeros(0, dtype=bool)
+    sources = codes[:-1][within_case]
+    targets = codes[1:][within_case]
+    waits = index.deltas[1:][within_case]
+    return sources, targets, waits
+
+
+class TransitionGraph:
+    """
+    Directly-follows graph of an event log: one edge per observed (activity A -> activity B)
+    transition, stored sparsely as parallel arrays sorted by (source, target).
+    Per edge it keeps the count and the mean, median, p95 and max wait time in nanoseconds.
+    """
+
+    def __init__(self, activities, sources, targets, counts, total_wait, mean_wait, median_wait, p95_wait,
+                 max_wait):
+        self.activities = list(activities)
+        self.sources = sources
+        self.targets = targets
+        self.counts = counts
+        self.total_wait = total_wait
+        self.mean_wait = mean_wait
+        self.median_wait = median_wait
+        self.p95_wait = p95_wait
+        self.max_wait = max_wait
+
+    @classmethod
+    def from_transitions(cls, activities, sources, targets, waits):
+        """
+        Aggregates raw (source, target, wait) transitions into edge statistics in one vectorized pass:
+        a single sort by (edge, wait) gives counts, sums, maxima and any quantile by offset arithmetic.
+        `sources`, `targets` and `waits` may be concatenated from several partitions; the result
+        does not depend on their order.
+        """
+        n_activities = max(len(activities), 1)
+        edge_keys = sources.astype(np.int64) * n_activities + targets.astype(np.int64)
+        waits = np.asarray(waits, dtype=np.int64)
+        edge_keys, waits = _sort_by_edge_and_wait(edge_keys, waits)
+
+        starts, counts = _edge_segments(edge_keys)
+        total_wait = _segment_sums(waits, starts)
+        keys = edge_keys[starts]
+
+        return cls(
+            activities=activities,
+            sources=keys // n_activities,
+            targets=keys % n_activities,
+            counts=counts,
+            total_wait=total_wait,
+            mean_wait=total_wait / np.maximum(counts, 1),
+            median_wait=_segment_quantiles(waits, starts, counts, WAIT_QUANTILES['median_wait']),
+            p95_wait=_segment_quantiles(waits, starts, counts, WAIT_QUANTILES['p95_wait']),
+            max_wait=waits[starts + counts - 1] if len(starts) else np.zeros(0, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_aggregates(cls, activities, aggregates):
+        """
+        Builds the graph from (merged) transition_aggregates. Exact aggregates give the same
+        graph as from_transitions on the same transitions. With sketches, counts, means and
+        maxima are still identical; median and p95 are exact for edges whose wait sketch still
+        holds every wait and KLL estimates otherwise.
+        """
+        n_activities = max(len(activities), 1)
+        keys, counts = aggregates['edge_keys'], aggregates['counts']
+        total_wait = aggregates['wait_high'].astype(np.float64) * float(1 << 32) \
+            + aggregates['wait_low'].astype(np.float64)
+        quantiles = {}
+        if 'waits' in aggregates:
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64) if len(counts) \
+                else np.zeros(0, dtype=np.int64)
+            for name, q in WAIT_QUANTILES.items():
+                quantiles[name] = _segment_quantiles(aggregates['waits'], starts, counts, q)
+        else:
+            for name, q in WAIT_QUANTILES.items():
+                quantiles[name] = np.array([
+                    _segment_quantiles(sketch.values(), np.zeros(1, dtype=np.int64), np.array([sketch.count]), q)[0]
+                    if sketch.is_exact else sketch.quantile(q)
+                    for sketch in aggregates['sketches']
+                ], dtype=np.float64)
+        return cls(
+            activities=activities,
+            sources=keys // n_activities,
+            targets=keys % n_activities,
+            counts=counts,
+            total_wait=total_wait,
+            mean_wait=total_wait / np.maximum(counts, 1),
+            max_wait=aggregates['max_wait'],
+            **quantiles,
+        )
+
+    @property
+    def n_edges(self):
+        return len(self.counts)
+
+    def to_sparse(self, values='counts'):
+        """
+        Returns an n_activities x n_activities scipy.sparse CSR matrix of `values`
+        ('counts', 'total_wait', 'mean_wait', 'median_wait', 'p95_wait' or 'max_wait'),
+        indexed by activity code as listed in `activities`.
+        """
+        from scipy.sparse import csr_matrix
+
+        n = len(self.activities)
+        return csr_matrix((getattr(self, values), (self.sources, self.targets)), shape=(n, n))
+
+    def to_frame(self):
+        """
+        Returns one row per edge with activity names, count and wait statistics as timedeltas.
+        """
+        names = np.asarray(self.activities, dtype=object)
+        frame = pd.DataFrame({
+            'source': names[self.sources] if self.n_edges else [],
+            'target': names[self.targets] if self.n_edges else [],
+            'count': self.counts,
+        })
+        for column in ('mean_wait', 'median_wait', 'p95_wait', 'max_wait'):
+            frame[column] = pd.to_timedelta(np.round(getattr(self, column)).astype(np.int64), unit='ns')
+        return frame
+
+    def top_transitions(self, n=5, by='mean_wait', min_count=1):
+        """
+        Positions of the `n` edges with the largest `by` statistic among edges seen at least
+        `min_count` times, largest first. Uses argpartition so ranking is O(edges), not a full sort.
+        """
+        candidates = np.flatnonzero(self.counts >= min_count)
+        values = getattr(self, by)[candidates]
+        if len(candidates) > n:
+            keep = np.argpartition(-values, n - 1)[:n]
+            candidates, values = candidates[keep], values[keep]
+        # Stable sort on the survivors; ties keep (source, target) order.
+        return candidates[np.argsort(-values, kind='stable')]
+
+
+def build_transition_graph(event_log):
+    """
+    Builds the directly-follows graph of an event log DataFrame, CachedEventLog or CaseIndex.
+    """
+    index = as_case_index(event_log)
+    sources, targets, waits = directly_follows_pairs(index)
+    return TransitionGraph.from_transitions(index.activities, sources, targets, waits)
+
+
+def transition_aggregates(event_log, quantile_k=None):
+    """
+    Mergeable per-edge statistics of a log, or of one partition of its cases: edge keys
+    (source * n_activities + target, sorted), counts, wait sums as exact 32-bit high/low int64
+    parts and max wait. Quantiles need the waits themselves: by default every wait (ns) is kept,
+    sorted by edge and wait, so merged quantiles are exact. With `quantile_k`, each edge's
+    waits are summarized by a KLLSketch instead, which keeps the result O(edges) in size.
+    """
+    index = as_case_index(event_log)
+    n_activities = max(len(index.activities), 1)
+    sources, targets, waits = directly_follows_pairs(index)
+    edge_keys = sources.astype(np.int64) * n_activities + targets.astype(np.int64)
+    edge_keys, waits = _sort_by_edge_and_wait(edge_keys, np.asarray(waits, dtype=np.int64))
+    starts, counts = _edge_segments(edge_keys)
+
+    high, low = np.divmod(waits, 1 << 32)
+    aggregates = {
+        'edge_keys': edge_keys[starts],
+        'counts': counts,
+        'wait_high': np.add.reduceat(high, starts) if len(waits) else np.zeros(0, dtype=np.int64),
+        'wait_low': np.add.reduceat(low, starts) if len(waits) else np.zeros(0, dtype=np.int64),
+        'max_wait': waits[starts + counts - 1] if len(waits) else np.zeros(0, dtype=np.int64),
+    }
+    if quantile_k is None:
+        aggregates['waits'] = waits
+        return aggregates
+    sketches = []
+    for key, start, count in zip(edge_keys[starts].tolist(), starts.tolist(), counts.tolist()):
+        sketch = KLLSketch(quantile_k, seed=key)
+        sketch.update(waits[start:start + count])
+        sketches.append(sketch)
+    aggregates['sketches'] = sketches
+    return aggregates
+
+
+def merge_transition_aggregates(parts):
+    """
+    Combines transition_aggregates of disjoint sets of cases of the same log (same activities),
+    all exact or all sketched. Sums, counts and maxima merge exactly; exact waits are re-sorted
+    by (edge, wait) and wait sketches are merged edge by edge.
+    """
+    parts = list(parts)
+    all_keys = np.concatenate([part['edge_keys'] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+    edge_keys, slots = np.unique(all_keys, return_inverse=True)
+    merged = {'edge_keys': edge_keys}
+    for name in ('counts', 'wait_high', 'wait_low'):
+        totals = np.zeros(len(edge_keys), dtype=np.int64)
+        np.add.at(totals, slots, np.concatenate([part[name] for part in parts]) if parts else totals[:0])
+        merged[name] = totals
+    max_wait = np.full(len(edge_keys), np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(max_wait, slots, np.concatenate([part['max_wait'] for part in parts]) if parts else max_wait[:0])
+    merged['max_wait'] = max_wait
+
+    if not parts or 'waits' in parts[0]:
+        wait_keys = np.concatenate([np.repeat(part['edge_keys'], part['counts']) for part in parts]) if parts \
+            else np.zeros(0, dtype=np.int64)
+        waits = np.concatenate([part['waits'] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+        merged['waits'] = _sort_by_edge_and_wait(wait_keys, waits)[1]
+        return merged
+    sketches = [None] * len(edge_keys)
+    for slot, sketch in zip(slots.tolist(), (sketch for part in parts for sketch in part['sketches'])):
+        sketches[slot] = sketch if sketches[slot] is None else sketches[slot].merge(sketch)
+    merged['sketches'] = sketches
+    return merged
+
+
+class TransitionAggregator:
+    """
+    Running merge of sketched transition_aggregates (quantile_k given) of disjoint blocks of
+    cases. Each add() folds a block in place in O(edges of the block), however many blocks came
+    before; aggregates() returns the merged result in the layout of merge_transition_aggregates.
+    """
+
+    def __init__(self):
+        self._edges = {}
+
+    def add(self, part):
+        for key, count, high, low, max_wait, sketch in zip(
+                part['edge_keys'].tolist(), part['counts'].tolist(), part['wait_high'].tolist(),
+                part['wait_low'].tolist(), part['max_wait'].tolist(), part['sketches']):
+            entry = self._edges.get(key)
+            if entry is None:
+                self._edges[key] = [count, high, low, max_wait, sketch]
+            else:
+                entry[0] += count
+                entry[1] += high
+                entry[2] += low
+                entry[3] = max(entry[3], max_wait)
+                entry[4].merge(sketch)
+
+    def aggregates(self):
+        keys = sorted(self._edges)
+        entries = [self._edges[key] for key in keys]
+        merged = {'edge_keys': np.array(keys, dtype=np.int64)}
+        for column, name in enumerate(('counts', 'wait_high', 'wait_low', 'max_wait')):
+            merged[name] = np.array([entry[column] for entry in entries], dtype=np.int64)
+        merged['sketches'] = [entry[4] for entry in entries]
+        return merged
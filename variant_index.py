@@ -0,0 +1,218 @@
+import heapq
+import numpy as np
+from case_index import as_case_index
+
+
+class VariantIndex:
+    """
+    Index of the distinct activity sequences (variants) of an event log.
+    Cases are grouped by hashing their integer-encoded trace, and each distinct trace is
+    stored once in a prefix trie over activity codes. Every trie node knows how many cases
+    pass through it, and the cases below a node occupy one contiguous slice of `case_order`
+    (cases are laid out in depth-first trie order), so "cases sharing prefix X" is a walk of
+    len(X) nodes plus a slice rather than a scan over all cases.
+    """
+
+    def __init__(self, index):
+        self.activities = list(index.activities)
+        self.case_ids = index.case_ids
+        self._activity_codes = {name: code for code, name in enumerate(self.activities)}
+
+        codes = np.asarray(index.activity_codes)
+        variant_of_trace = {}
+        variant_traces = []
+        case_variant = np.empty(index.n_cases, dtype=np.int64)
+        for case_pos, (start, end) in enumerate(zip(index.case_starts, index.case_ends)):
+            trace = codes[start:end].tobytes()
+            variant = variant_of_trace.get(trace)
+            if variant is None:
+                variant = variant_of_trace[trace] = len(variant_traces)
+                variant_traces.append(trace)
+            case_variant[case_pos] = variant
+        del variant_of_trace
+
+        # Variant ids follow first appearance in case order, which keeps tie-breaking in
+        # top_variants identical to a stable sort of a per-case scan.
+        self.case_variant = case_variant
+        self.variant_counts = np.bincount(case_variant, minlength=len(variant_traces))
+
+        # Trie over activity codes; node 0 is the root (empty prefix).
+        self._children = [{}]
+        parents = [-1]
+        node_codes = [-1]
+        self.variant_nodes = np.empty(len(variant_traces), dtype=np.int64)
+        for variant, trace in enumerate(variant_traces):
+            node = 0
+            for code in np.frombuffer(trace, dtype=codes.dtype).tolist():
+                child = self._children[node].get(code)
+                if child is None:
+                    child = len(parents)
+                    self._children[node][code] = child
+                    self._children.append({})
+                    parents.append(node)
+                    node_codes.append(code)
+                node = child
+            self.variant_nodes[variant] = node
+        self.node_parents = np.asarray(parents, dtype=np.int64)
+        self.node_codes = np.asarray(node_codes, dtype=np.int64)
+
+        self._layout_cases()
+
+    def _layout_cases(self):
+        """
+        Orders variants depth-first through the trie and lays cases out in that order,
+        recording for each node the [lo, hi) slice of `case_order` holding its subtree.
+        """
+        n_nodes = len(self._children)
+        node_variant = np.full(n_nodes, -1, dtype=np.int64)
+        node_variant[self.variant_nodes] = np.arange(len(self.variant_nodes))
+
+        self.node_lo = np.zeros(n_nodes, dtype=np.int64)
+        self.node_hi = np.zeros(n_nodes, dtype=np.int64)
+        variant_rank = np.empty(len(self.variant_nodes), dtype=np.int64)
+        position = 0
+        rank = 0
+        stack = [(0, False)]
+        while stack:
+            node, exiting = stack.pop()
+            if exiting:
+                self.node_hi[node] = position
+                continue
+            self.node_lo[node] = position
+            variant = node_variant[node]
+            if variant >= 0:
+                variant_rank[variant] = rank
+                rank += 1
+                position += self.variant_counts[variant]
+            stack.append((node, True))
+            for code in sorted(self._children[node], reverse=True):
+                stack.append((self._children[node][code], False))
+
+        self.case_order = np.argsort(variant_rank[self.case_variant], kind='stable')
+
+    @property
+    def n_variants(self):
+        return len(self.variant_nodes)
+
+    @property
+    def node_case_counts(self):
+        """
+        Number of cases whose trace starts with each node's prefix.
+        """
+        return self.node_hi - self.node_lo
+
+    def variant_activities(self, variant):
+        """
+        Activity names of a variant, reconstructed by walking up from its trie node.
+        """
+        codes = []
+        node = self.variant_nodes[variant]
+        while node > 0:
+            codes.append(self.node_codes[node])
+            node = self.node_parents[node]
+        return tuple(self.activities[code] for code in reversed(codes))
+
+    def top_variants(self, k=10):
+        """
+        The `k` most frequent variants as (activity tuple, case count), most frequent first.
+        Uses a heap, so only k variants are ever sorted.
+        """
+        top = heapq.nlargest(k, range(self.n_variants), key=self.variant_counts.__getitem__)
+        return [(self.variant_activities(variant), int(self.variant_counts[variant])) for variant in top]
+
+    def _find_node(self, prefix):
+        node = 0
+        for name in prefix:
+            code = self._activity_codes.get(name)
+            node = self._children[node].get(code) if code is not None else None
+            if node is None:
+                return None
+        return node
+
+    def count_prefix(self, prefix):
+        """
+        Number of cases whose trace starts with the activity sequence `prefix`.
+        """
+        node = self._find_node(prefix)
+        return 0 if node is None else int(self.node_hi[node] - self.node_lo[node])
+
+    def cases_with_prefix(self, prefix):
+        """
+        case_ids of all cases whose trace starts with the activity sequence `prefix`.
+        """
+        node = self._find_node(prefix)
+        if node is None:
+            return self.case_ids[:0]
+        return self.case_ids[self.case_order[self.node_lo[node]:self.node_hi[node]]]
+
+    def variant_of_case(self, case_id):
+        """
+        Activity sequence of the case with the given case_id, or None if it is not in the log.
+        case_ids are sorted, so the lookup is a binary search.
+        """
+        case_pos = np.searchsorted(self.case_ids, case_id)
+        if case_pos >= len(self.case_ids) or self.case_ids[case_pos] != case_id:
+            return None
+        return self.variant_activities(self.case_variant[case_pos])
+
+    def to_flow_counts(self):
+        """
+        Variant counts as {activity tuple: count}, in first-appearance order.
+        """
+        return {self.variant_activities(variant): int(count) for variant, count in enumerate(self.variant_counts)}
+
+
+def build_variant_index(event_log):
+    """
+    Builds the VariantIndex of an event log DataFrame, CachedEventLog or CaseIndex.
+    """
+    return VariantIndex(as_case_index(event_log))
+
+
+def variant_aggregates(event_log, case_positions=None):
+    """
+    Mergeable variant counts of a log or of one partition of its cases:
+    {trace: (case count, first case position)}, where a trace is the bytes of its int32
+    activity codes and `case_positions` maps the partition's cases back to the full log.
+    """
+    index = as_case_index(event_log)
+    codes = np.asarray(index.activity_codes, dtype=np.int32)
+    if case_positions is None:
+        case_positions = range(index.n_cases)
+    aggregates = {}
+    for case_pos, start, end in zip(case_positions, index.case_starts, index.case_ends):
+        trace = codes[start:end].tobytes()
+        entry = aggregates.get(trace)
+        aggregates[trace] = (entry[0] + 1, entry[1]) if entry else (1, int(case_pos))
+    return aggregates
+
+
+def merge_variant_aggregates_into(merged, part):
+    """
+    Adds one part's variant_aggregates to `merged` in place, in O(variants of the part).
+    Returns `merged`.
+    """
+    for trace, (count, first_case) in part.items():
+        entry = merged.get(trace)
+        merged[trace] = (entry[0] + count, min(entry[1], first_case)) if entry else (count, first_case)
+    return merged
+
+
+def merge_variant_aggregates(parts):
+    """
+    Combines variant_aggregates of disjoint sets of cases.
+    """
+    merged = {}
+    for part in parts:
+        merge_variant_aggregates_into(merged, part)
+    return merged
+
+
+def top_variants_from_aggregates(aggregates, activities, k=10):
+    """
+    The `k` most frequent variants in variant_aggregates, as (activity tuple, count) pairs.
+    Ties are broken by first appearance, exactly like VariantIndex.top_variants.
+    """
+    top = heapq.nlargest(k, aggregates.items(), key=lambda item: (item[1][0], -item[1][1]))
+    return [(tuple(activities[code] for code in np.frombuffer(trace, dtype=np.int32).tolist()), count)
+            for trace, (count, _) in top]